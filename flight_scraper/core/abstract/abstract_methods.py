@@ -7,14 +7,19 @@ class FlightScraper(ABC):
     航班爬虫的抽象基类，定义所有爬虫实现必须提供的接口
     """
 
-    def __init__(self, config):
+    def __init__(self, config, session=None):
         """
         初始化爬虫
 
         Args:
             config: 配置对象或配置数据
+            session: 共享的HttpSession，None则使用进程内默认会话
         """
         self._config = config
+        if session is None:
+            from flight_scraper.core.http.session import get_default_session
+            session = get_default_session()
+        self._session = session
         self._initialize_common()
 
     def _initialize_common(self):
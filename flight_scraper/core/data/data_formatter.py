@@ -1,3 +1,11 @@
+import re
+
+import numpy as np
+
+# ISO时间中秒之后的部分：可选的小数秒和时区
+_ISO_SUFFIX = re.compile(r"^(?:\.\d+)?(?:(Z)|([+-])(\d{2}):?(\d{2}))?$")
+
+
 def format_time_duration(seconds) -> str:
     """将秒数格式化为小时和分钟"""
     hours = seconds // 3600
@@ -15,3 +23,47 @@ def parse_iso_time(time_str):
     return datetime(year, month, day, hour, minute, second)
 
 
+def _utc_offset_seconds(suffix):
+    """解析时间后缀中的时区偏移（秒）"""
+    match = _ISO_SUFFIX.match(suffix)
+    if match is None:
+        raise ValueError(f"无法解析的时间后缀: {suffix!r}")
+    if not match.group(2):
+        return 0
+    offset = int(match.group(3)) * 3600 + int(match.group(4)) * 60
+    return -offset if match.group(2) == "-" else offset
+
+
+def parse_iso_times(time_strs):
+    """
+    批量解析ISO格式时间字符串
+
+    支持 2025-07-14T10:15:00、2025-07-14T10:15:00.000、2025-07-14T10:15:00+02:00 和 ...Z 等格式，
+    整批一起转换，不逐个调用datetime
+
+    Args:
+        time_strs: 时间字符串序列
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (当地时间, UTC时间)，都是datetime64[s]数组；
+        没有时区信息的时间按当地时间处理，UTC时间与当地时间相同
+
+    Raises:
+        ValueError: 有无法解析的时间
+    """
+    values = np.asarray(time_strs, dtype=str)
+    if values.size == 0:
+        empty = np.array([], dtype="datetime64[s]")
+        return empty, empty.copy()
+
+    # 前19个字符是到秒为止的当地时间
+    base = values.astype("U19")
+    local = base.astype("datetime64[s]")
+
+    utc = local
+    if (np.char.str_len(values) > 19).any():
+        # 后缀的种类很少，只解析不同的后缀，再按索引展开
+        suffixes, inverse = np.unique(np.char.replace(values, base, ""), return_inverse=True)
+        offsets = np.array([_utc_offset_seconds(suffix) for suffix in suffixes], dtype="int64")
+        utc = local - offsets[inverse].astype("timedelta64[s]")
+    return local, utc
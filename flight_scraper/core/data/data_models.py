@@ -1,11 +1,46 @@
 # flight_scraper/core/data/data_models.py
-from dataclasses import dataclass
-from typing import List, Optional, Dict
+import threading
+from dataclasses import dataclass, fields
+from typing import Dict, Optional, Tuple
 
-@dataclass
+from flight_scraper.core.data.data_formatter import format_time_duration
+
+
+def _slotted(cls):
+    """
+    为dataclass添加__slots__，去掉每个实例的__dict__
+
+    Python 3.10+可以直接用dataclass(slots=True)，这里兼容3.9
+    """
+    field_names = tuple(f.name for f in fields(cls))
+    cls_dict = dict(cls.__dict__)
+    cls_dict["__slots__"] = field_names
+    for name in field_names:
+        # 默认值已经记录在生成的__init__里，类属性会和slot冲突
+        cls_dict.pop(name, None)
+    cls_dict.pop("__dict__", None)
+    cls_dict.pop("__weakref__", None)
+    new_cls = type(cls)(cls.__name__, cls.__bases__, cls_dict)
+
+    if cls.__dataclass_params__.frozen:
+        # 不可变对象没有__dict__时，pickle需要自定义状态的读写
+        def __getstate__(self):
+            return [getattr(self, name) for name in field_names]
+
+        def __setstate__(self, state):
+            for name, value in zip(field_names, state):
+                object.__setattr__(self, name, value)
+
+        new_cls.__getstate__ = __getstate__
+        new_cls.__setstate__ = __setstate__
+    return new_cls
+
+
+@_slotted
+@dataclass(frozen=True)
 class Airport:
     """
-    机场信息
+    机场信息，同一个机场在所有航班间共享一个实例，见intern_airport
     """
 
     name: str
@@ -14,24 +49,98 @@ class Airport:
     country: Optional[str] = None
     city_name: Optional[str] = None
 
-@dataclass
+
+@_slotted
+@dataclass(frozen=True)
 class Carrier:
     """
-    航空公司信息
+    航空公司信息，同一个航空公司在所有航班间共享一个实例，见intern_carrier
     """
     name: str
     code: Optional[str] = None
     logo: Optional[str] = None
 
+    def to_dict(self) -> Dict[str, str]:
+        return {"name": self.name, "code": self.code or "", "logo": self.logo or ""}
+
+
+@_slotted
+@dataclass(frozen=True)
+class Luggage:
+    """
+    行李额信息，相同的行李额在所有航班间共享一个实例，见intern_luggage
+    """
+    personal: Optional[str] = None
+    cabin: Optional[str] = None
+    checked: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Optional[str]]:
+        return {"personal": self.personal, "cabin": self.cabin, "checked": self.checked}
+
+
+# 价格的小数位数，未列出的货币按2位处理
+_CURRENCY_EXPONENTS = {"JPY": 0, "KRW": 0, "VND": 0, "CLP": 0, "ISK": 0, "HUF": 2, "KWD": 3, "BHD": 3}
+
+
+@_slotted
+@dataclass(frozen=True)
+class Price:
+    """
+    价格，以货币最小单位（例如分）的整数保存，避免浮点误差
+    """
+    minor_units: int
+    currency: str = "EUR"
+
+    @classmethod
+    def from_units_nanos(cls, units, nanos, currency="EUR"):
+        """
+        根据接口返回的units和nanos创建价格
+
+        Args:
+            units: 整数部分
+            nanos: 小数部分，单位为十亿分之一
+            currency: 货币代码
+        """
+        exponent = _CURRENCY_EXPONENTS.get(currency, 2)
+        minor_units = int(units) * 10 ** exponent + round(int(nanos) / 10 ** (9 - exponent))
+        return cls(minor_units, currency)
+
+    @property
+    def exponent(self) -> int:
+        return _CURRENCY_EXPONENTS.get(self.currency, 2)
+
+    @property
+    def total(self) -> float:
+        return self.minor_units / 10 ** self.exponent
+
+    @property
+    def units(self) -> int:
+        return self.minor_units // 10 ** self.exponent
+
+    @property
+    def nanos(self) -> int:
+        return (self.minor_units % 10 ** self.exponent) * 10 ** (9 - self.exponent)
+
+    def to_dict(self) -> Dict:
+        """转换为旧版的价格字典：total、currency、units、nanos"""
+        return {"total": self.total, "currency": self.currency, "units": self.units, "nanos": self.nanos}
+
+
+@_slotted
 @dataclass
 class LayoverInfo:
     """
     中转信息
     """
-    airport: str
+    airport: Airport
     layover_time_seconds: int
-    layover_time_formatted: str
 
+    @property
+    def layover_time_formatted(self) -> str:
+        return format_time_duration(self.layover_time_seconds)
+
+
+@_slotted
 @dataclass
 class TimeInfo:
     """
@@ -40,30 +149,96 @@ class TimeInfo:
     departure_time: str
     arrival_time: str
     total_time_seconds: int
-    total_time_formatted: str
-    layovers: List[LayoverInfo]
+    layovers: Tuple[LayoverInfo, ...] = ()
+
+    @property
+    def total_time_formatted(self) -> str:
+        return format_time_duration(self.total_time_seconds)
+
+    def to_dict(self) -> Dict:
+        """转换为旧版的时间字典"""
+        return {
+            "departure_time": self.departure_time,
+            "arrival_time": self.arrival_time,
+            "total_time_seconds": self.total_time_seconds,
+            "total_time_formatted": self.total_time_formatted,
+            "layovers": list(self.layovers),
+        }
 
+
+@_slotted
 @dataclass
 class SegmentInfo:
     """
     航班段信息
     """
-    departure: str
-    arrival: str
-    transit: List[str]
-    main_carrier: Dict[str, str]
-    leg_carriers: List[Dict[str, str]]
-    time_info: Dict
+    departure: Airport
+    arrival: Airport
+    transit: Tuple[Airport, ...]
+    main_carrier: Optional[Carrier]
+    leg_carriers: Tuple[Carrier, ...]
+    time_info: TimeInfo
+
 
+@_slotted
 @dataclass
 class FlightOffer:
     """
     航班报价信息
     """
     id: int
-    price: Dict
+    price: Price
     outbound: SegmentInfo
     inbound: SegmentInfo
-    luggage: Dict
+    luggage: Luggage
     token: str
-    booking_link: str
\ No newline at end of file
+    booking_link: str
+    # 行程指纹，相同航段、承运商、航班号和时间的航班指纹相同，见fingerprint_legs
+    fingerprint: str = ""
+
+
+_intern_lock = threading.Lock()
+_airports: Dict[tuple, Airport] = {}
+_carriers: Dict[tuple, Carrier] = {}
+_luggages: Dict[tuple, Luggage] = {}
+
+
+def _intern(pool, key, factory):
+    instance = pool.get(key)
+    if instance is None:
+        with _intern_lock:
+            instance = pool.setdefault(key, factory())
+    return instance
+
+
+def intern_airport(name, code=None, city=None, country=None, city_name=None) -> Airport:
+    """
+    获取共享的机场实例，相同的机场只创建一次
+
+    Returns:
+        Airport: 机场
+    """
+    key = (name, code, city, country, city_name)
+    return _intern(_airports, key, lambda: Airport(*key))
+
+
+def intern_carrier(name, code=None, logo=None) -> Carrier:
+    """
+    获取共享的航空公司实例，相同的航空公司只创建一次
+
+    Returns:
+        Carrier: 航空公司
+    """
+    key = (name, code, logo)
+    return _intern(_carriers, key, lambda: Carrier(*key))
+
+
+def intern_luggage(personal=None, cabin=None, checked=None) -> Luggage:
+    """
+    获取共享的行李额实例，相同的行李额只创建一次
+
+    Returns:
+        Luggage: 行李额
+    """
+    key = (personal, cabin, checked)
+    return _intern(_luggages, key, lambda: Luggage(*key))
@@ -0,0 +1,231 @@
+# flight_scraper/core/data/exporters.py
+import csv
+import logging
+import os
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Dict, Optional, Type
+
+import pandas as pd
+
+from flight_scraper.core.data.offer_table import CATEGORY_COLUMNS, EXPORT_COLUMNS, TABLE_COLUMNS, OfferTable
+
+# 预订链接在Excel中显示的文本
+LINK_TEXT = "预订链接"
+
+
+class OfferWriter(ABC):
+    """
+    导出格式的基类
+
+    所有格式都从同一张OfferTable读取，CSV和Excel按块读取to_export_frame展开后的行，
+    边展开边写入，导出时的内存占用只与块大小有关
+    """
+
+    # 文件扩展名
+    extension = ""
+
+    @abstractmethod
+    def write(self, table: OfferTable, path: str) -> None:
+        """
+        把表格写入文件
+
+        Args:
+            table: 航班表格
+            path: 输出文件路径
+        """
+        pass
+
+
+class CsvWriter(OfferWriter):
+    """逐块写入标准格式的CSV，引用所有字段，链接中的逗号不会导致分列，字段中的双引号写成两个双引号"""
+
+    extension = "csv"
+
+    def write(self, table: OfferTable, path: str) -> None:
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+            writer.writerow(EXPORT_COLUMNS)
+            for chunk in table.export_chunks():
+                writer.writerows(chunk.itertuples(index=False, name=None))
+
+
+class XlsxWriter(OfferWriter):
+    """
+    使用openpyxl的只写模式逐行写入Excel
+
+    预订链接显示为"预订链接"文本，超链接和样式在写入该行时一起设置，不需要回头遍历单元格
+    """
+
+    extension = "xlsx"
+
+    def write(self, table: OfferTable, path: str) -> None:
+        from openpyxl import Workbook
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Font
+
+        workbook = Workbook(write_only=True)
+        worksheet = workbook.create_sheet("Flights")
+        worksheet.append(EXPORT_COLUMNS)
+
+        link_col = EXPORT_COLUMNS.index("booking_link")
+        link_font = Font(color="0563C1", underline="single")
+        for chunk in table.export_chunks():
+            for row in chunk.itertuples(index=False, name=None):
+                row = list(row)
+                link = row[link_col]
+                if link:
+                    cell = WriteOnlyCell(worksheet, value=LINK_TEXT)
+                    cell.hyperlink = link
+                    cell.font = link_font
+                    row[link_col] = cell
+                worksheet.append(row)
+        workbook.save(path)
+
+
+def parquet_frame(table: OfferTable, observed_at: float) -> pd.DataFrame:
+    """
+    把表格转换为Parquet导出使用的类型化DataFrame
+
+    日期为date，时间为不带时区的当地时间，价格保留浮点和最小单位两列，分类列还原为字符串
+    （Parquet本身会做字典编码），并增加UTC的观察时间列
+
+    Args:
+        table: 航班表格
+        observed_at: 观察时间（Unix时间戳）
+
+    Returns:
+        pd.DataFrame: 按出发日期和价格排序的数据，行组统计可以用于下推过滤
+    """
+    frame = table.frame.copy()
+    for column in CATEGORY_COLUMNS:
+        frame[column] = frame[column].astype(str)
+    for column in ("depart_date", "return_date"):
+        frame[column] = pd.to_datetime(frame[column], format="%Y-%m-%d").dt.date
+    frame["observed_at"] = pd.Timestamp(observed_at, unit="s", tz="UTC").floor("s")
+    return frame.sort_values(["depart_date", "price_minor"], kind="mergesort", ignore_index=True)
+
+
+def parquet_schema():
+    """Parquet导出的列类型"""
+    import pyarrow as pa
+
+    string_columns = [
+        "currency", "origin", "destination", "airline", "inbound_airline", "outbound_transit", "inbound_transit",
+        "personal_item", "cabin_baggage", "checked_baggage", "booking_link", "fingerprint",
+    ]
+    types = {
+        "depart_date": pa.date32(),
+        "return_date": pa.date32(),
+        "flight_index": pa.int32(),
+        "price": pa.float64(),
+        "price_minor": pa.int64(),
+        "outbound_departure_time": pa.timestamp("s"),
+        "outbound_arrival_time": pa.timestamp("s"),
+        "outbound_duration": pa.int64(),
+        "outbound_stops": pa.int8(),
+        "inbound_departure_time": pa.timestamp("s"),
+        "inbound_arrival_time": pa.timestamp("s"),
+        "inbound_duration": pa.int64(),
+        "inbound_stops": pa.int8(),
+        "copies": pa.int32(),
+        "max_price_minor": pa.int64(),
+        "price_spread": pa.float64(),
+        "observed_at": pa.timestamp("s", tz="UTC"),
+    }
+    types.update({column: pa.string() for column in string_columns})
+    return pa.schema([(column, types[column]) for column in TABLE_COLUMNS + ["observed_at"]])
+
+
+class ParquetWriter(OfferWriter):
+    """
+    按航线和观察日期分区写入Parquet数据集
+
+    path为数据集根目录，每次运行在 route=<航线>/observed_date=<日期>/ 下新增一个文件，
+    追加不需要读取或改写已有文件；文件内按出发日期和价格排序，分析工具可以按这两列下推过滤。
+    需要安装pyarrow
+    """
+
+    extension = "parquet"
+
+    # 每个行组的行数，行组越小，按出发日期和价格过滤时能跳过的数据越多
+    ROW_GROUP_SIZE = 50000
+
+    def __init__(self, route: str = "", observed_at: Optional[float] = None):
+        """
+        Args:
+            route: 航线标识，作为分区
+            observed_at: 观察时间（Unix时间戳），None则使用当前时间
+        """
+        self._route = route or "unknown"
+        self._observed_at = observed_at if observed_at is not None else datetime.now(timezone.utc).timestamp()
+
+    def partition_dir(self, root: str) -> str:
+        """本次运行写入的分区目录"""
+        observed_date = datetime.fromtimestamp(self._observed_at, timezone.utc).strftime("%Y-%m-%d")
+        return os.path.join(root, f"route={self._route}", f"observed_date={observed_date}")
+
+    def write(self, table: OfferTable, path: str) -> None:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("导出Parquet需要安装pyarrow: pip install pyarrow")
+
+        directory = self.partition_dir(path)
+        os.makedirs(directory, exist_ok=True)
+        timestamp = datetime.fromtimestamp(self._observed_at, timezone.utc).strftime("%Y%m%dT%H%M%S")
+        filename = os.path.join(directory, f"part-{timestamp}-{uuid.uuid4().hex[:8]}.parquet")
+
+        arrow_table = pa.Table.from_pandas(parquet_frame(table, self._observed_at), schema=parquet_schema(),
+                                           preserve_index=False)
+        # 先写临时文件再改名，读取方不会看到写了一半的文件
+        temp_path = filename + ".tmp"
+        pq.write_table(arrow_table, temp_path, row_group_size=self.ROW_GROUP_SIZE)
+        os.replace(temp_path, filename)
+
+
+WRITERS: Dict[str, Type[OfferWriter]] = {
+    CsvWriter.extension: CsvWriter,
+    XlsxWriter.extension: XlsxWriter,
+    ParquetWriter.extension: ParquetWriter,
+}
+
+
+def get_writer(fmt: str, **options) -> OfferWriter:
+    """
+    获取指定格式的导出器
+
+    Args:
+        fmt: 导出格式，例如 "csv"、"xlsx" 或 "parquet"
+        **options: 导出器的参数，例如ParquetWriter的route和observed_at
+
+    Returns:
+        OfferWriter: 导出器实例
+
+    Raises:
+        ValueError: 不支持的导出格式
+    """
+    writer_cls = WRITERS.get(fmt.lower())
+    if writer_cls is None:
+        raise ValueError(f"不支持的导出格式: {fmt}")
+    return writer_cls(**options)
+
+
+def export_table(table: OfferTable, path: str, fmt: str, **options) -> str:
+    """
+    把表格导出为指定格式
+
+    Args:
+        table: 航班表格
+        path: 输出文件路径，Parquet为数据集根目录
+        fmt: 导出格式
+        **options: 导出器的参数
+
+    Returns:
+        str: 输出文件路径
+    """
+    get_writer(fmt, **options).write(table, path)
+    logging.debug(f"已导出 {len(table)} 个航班到 {path}")
+    return path
@@ -0,0 +1,87 @@
+# flight_scraper/core/data/fingerprint.py
+import hashlib
+from typing import Dict, Iterable, Optional, Tuple
+
+
+def fingerprint_legs(legs: Iterable[Tuple]) -> str:
+    """
+    根据航段生成行程指纹
+
+    同一个实际行程（相同的航段、承运商、航班号和时间）在不同的票价品牌、
+    不同的搜索日期和多次运行中得到相同的指纹
+
+    Args:
+        legs: 每个航段一个元组，例如 (出发机场, 到达机场, 出发时间, 到达时间, 承运商, 航班号)，
+              往返行程的去程和返程航段按顺序排在一起，段之间用None分隔
+
+    Returns:
+        str: 16位十六进制指纹
+    """
+    text = "|".join("-" if leg is None else ",".join("" if part is None else str(part) for part in leg)
+                    for leg in legs)
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+
+
+class FingerprintStats:
+    """同一行程所有副本的统计"""
+
+    __slots__ = ("copies", "min_price", "max_price")
+
+    def __init__(self, price):
+        self.copies = 0
+        self.min_price = price
+        self.max_price = price
+
+    @property
+    def spread(self) -> int:
+        """最高价和最低价之差（货币最小单位）"""
+        return self.max_price - self.min_price
+
+
+class FingerprintIndex:
+    """
+    行程指纹的哈希索引
+
+    记录每个行程出现的次数和价格范围，添加和查询都是O(1)，
+    配合TopKCollector的group参数在一次遍历中把重复的行程合并为最便宜的副本
+    """
+
+    def __init__(self):
+        self._stats: Dict[str, FingerprintStats] = {}
+
+    def add(self, fingerprint: str, price: int, copies: int = 1,
+            max_price: Optional[int] = None) -> FingerprintStats:
+        """
+        记录一个副本
+
+        Args:
+            fingerprint: 行程指纹
+            price: 价格（货币最小单位）
+            copies: 该记录代表的副本数量，合并其他索引的统计时使用
+            max_price: 该记录代表的副本中的最高价，None则与price相同
+
+        Returns:
+            FingerprintStats: 该行程更新后的统计
+        """
+        stats = self._stats.get(fingerprint)
+        if stats is None:
+            stats = self._stats[fingerprint] = FingerprintStats(price)
+        stats.copies += copies
+        stats.min_price = min(stats.min_price, price)
+        stats.max_price = max(stats.max_price, price if max_price is None else max_price)
+        return stats
+
+    def get(self, fingerprint: str) -> Optional[FingerprintStats]:
+        return self._stats.get(fingerprint)
+
+    def __contains__(self, fingerprint):
+        return fingerprint in self._stats
+
+    def __len__(self):
+        """不同行程的数量"""
+        return len(self._stats)
+
+    @property
+    def duplicates(self) -> int:
+        """被合并掉的重复副本数量"""
+        return sum(stats.copies for stats in self._stats.values()) - len(self._stats)
@@ -0,0 +1,107 @@
+# flight_scraper/core/data/lazy_offers.py
+import logging
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from flight_scraper.core.data.data_models import FlightOffer, Price
+from flight_scraper.core.data.fingerprint import FingerprintIndex
+
+# 按顺序访问时每次预先处理的航班数量
+MATERIALIZE_BATCH_SIZE = 16
+
+
+class LazyOfferList:
+    """
+    按价格排好序、按需处理的航班列表
+
+    第一阶段只读取每个航班的价格和token并排序；第二阶段的航段、行李和预订链接提取
+    只在航班被访问时执行，结果会被缓存。处理失败的航班在被访问时从列表中移除，由limit之外的
+    后备航班依次补上，后备航班用完后列表长度才会在访问后变小
+    """
+
+    def __init__(self, entries: List[Tuple[Price, int, str, Any]],
+                 materialize: Callable[[Sequence[Tuple[int, Any]]], List[Optional[FlightOffer]]],
+                 fingerprints: Optional[FingerprintIndex] = None, limit: Optional[int] = None):
+        """
+        Args:
+            entries: 已按价格排序的 (价格, 原始序号, token, 原始航班) 列表
+            materialize: 批量处理原始航班的函数，参数为 (原始序号, 原始航班) 列表，
+                         返回对应的FlightOffer，处理失败的位置为None
+            fingerprints: 去重时各行程的副本数和价格范围，未去重时为None
+            limit: 列表对外的最大长度，entries中超出的部分作为后备，None则不限制
+        """
+        self._entries = entries
+        self._offers: List[Optional[FlightOffer]] = [None] * len(entries)
+        self._materialize = materialize
+        self.fingerprints = fingerprints
+        self._limit = limit
+
+    def __len__(self):
+        if self._limit is None:
+            return len(self._entries)
+        return min(self._limit, len(self._entries))
+
+    def __bool__(self):
+        return len(self) > 0
+
+    @property
+    def materialized_count(self) -> int:
+        """已经完整处理过的航班数量"""
+        return sum(offer is not None for offer in self._offers)
+
+    def price(self, index: int) -> Price:
+        """第index个航班的价格，不触发完整处理"""
+        return self._entries[index][0]
+
+    def token(self, index: int) -> str:
+        """第index个航班的token，不触发完整处理"""
+        return self._entries[index][2]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step == 1:
+                self._ensure(start, stop)
+                # 处理失败的航班会被移除，重新计算范围
+                start, stop, _ = index.indices(len(self))
+            return [self[i] for i in range(start, stop, step) if i < len(self)]
+
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("航班索引超出范围")
+        self._ensure(index, min(len(self), index + 1))
+        if index >= len(self):
+            raise IndexError("航班索引超出范围")
+        return self._offers[index]
+
+    def __iter__(self):
+        index = 0
+        while index < len(self):
+            self._ensure(index, min(len(self), index + MATERIALIZE_BATCH_SIZE))
+            stop = min(len(self), index + MATERIALIZE_BATCH_SIZE)
+            for i in range(index, stop):
+                yield self._offers[i]
+            index = stop
+
+    def _ensure(self, start: int, stop: int) -> None:
+        """确保[start, stop)范围内的航班都已处理，处理失败的航班被移除后由后面的航班继续补齐"""
+        while True:
+            pending = [i for i in range(start, min(stop, len(self))) if self._offers[i] is None]
+            if not pending:
+                return
+            offers = self._materialize([(self._entries[i][1], self._entries[i][3]) for i in pending])
+            failed = []
+            for i, offer in zip(pending, offers):
+                if offer is None:
+                    failed.append(i)
+                else:
+                    self._offers[i] = offer
+                    # 完整处理后不再需要原始数据
+                    price, original_index, token, _ = self._entries[i]
+                    self._entries[i] = (price, original_index, token, None)
+            if not failed:
+                return
+            logging.debug(f"{len(failed)} 个航班处理失败，已从列表中移除")
+            for i in reversed(failed):
+                del self._entries[i]
+                del self._offers[i]
@@ -0,0 +1,282 @@
+# flight_scraper/core/data/offer_table.py
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from flight_scraper.core.data.data_models import FlightOffer, Price
+from flight_scraper.core.data.fingerprint import FingerprintStats
+
+# 导出文件的列，顺序与原来的CSV/Excel一致
+EXPORT_COLUMNS = [
+    "departure_date", "return_date", "price", "currency",
+    "origin", "destination", "outbound_departure_time", "outbound_arrival_time",
+    "outbound_flight_time", "outbound_transit", "airline",
+    "inbound_departure_time", "inbound_arrival_time", "inbound_flight_time",
+    "inbound_transit", "inbound_airline", "personal_item",
+    "cabin_baggage", "checked_baggage", "booking_link"
+]
+
+# 取值重复度高的列保存为分类类型
+CATEGORY_COLUMNS = [
+    "depart_date", "return_date", "currency", "origin", "destination",
+    "outbound_transit", "inbound_transit", "airline", "inbound_airline",
+    "personal_item", "cabin_baggage", "checked_baggage",
+]
+
+TIME_COLUMNS = [
+    "outbound_departure_time", "outbound_arrival_time",
+    "inbound_departure_time", "inbound_arrival_time",
+]
+
+TABLE_COLUMNS = [
+    "depart_date", "return_date", "flight_index", "price", "price_minor", "currency",
+    "origin", "destination", "airline", "inbound_airline",
+    "outbound_departure_time", "outbound_arrival_time", "outbound_duration", "outbound_stops", "outbound_transit",
+    "inbound_departure_time", "inbound_arrival_time", "inbound_duration", "inbound_stops", "inbound_transit",
+    "personal_item", "cabin_baggage", "checked_baggage", "booking_link",
+    "fingerprint", "copies", "max_price_minor", "price_spread",
+]
+
+# 导出时每次展开的行数
+EXPORT_CHUNK_SIZE = 10000
+
+
+def offer_row(depart_date: str, return_date: str, flight_index: int, offer: FlightOffer,
+              stats: Optional[FingerprintStats] = None) -> Dict[str, Any]:
+    """
+    把一个航班展开为表格的一行
+
+    Args:
+        depart_date: 搜索的出发日期
+        return_date: 搜索的返程日期
+        flight_index: 航班在该日期结果中的序号
+        offer: 处理后的航班
+        stats: 该航班行程的去重统计，None表示只有这一个副本
+
+    Returns:
+        Dict[str, Any]: 一行数据，键为TABLE_COLUMNS
+    """
+    outbound, inbound = offer.outbound, offer.inbound
+    price = offer.price
+    max_price_minor = stats.max_price if stats is not None else price.minor_units
+    return {
+        "depart_date": depart_date,
+        "return_date": return_date,
+        "flight_index": flight_index,
+        "price": price.total,
+        "price_minor": price.minor_units,
+        "currency": price.currency,
+        "origin": outbound.departure.name,
+        "destination": outbound.arrival.name,
+        "airline": outbound.main_carrier.name if outbound.main_carrier else "",
+        "inbound_airline": inbound.main_carrier.name if inbound.main_carrier else "",
+        "outbound_departure_time": outbound.time_info.departure_time,
+        "outbound_arrival_time": outbound.time_info.arrival_time,
+        "outbound_duration": outbound.time_info.total_time_seconds,
+        "outbound_stops": len(outbound.transit),
+        "outbound_transit": " → ".join(airport.name for airport in outbound.transit),
+        "inbound_departure_time": inbound.time_info.departure_time,
+        "inbound_arrival_time": inbound.time_info.arrival_time,
+        "inbound_duration": inbound.time_info.total_time_seconds,
+        "inbound_stops": len(inbound.transit),
+        "inbound_transit": " → ".join(airport.name for airport in inbound.transit),
+        "personal_item": offer.luggage.personal or "",
+        "cabin_baggage": offer.luggage.cabin or "",
+        "checked_baggage": offer.luggage.checked or "",
+        "booking_link": offer.booking_link or "",
+        "fingerprint": offer.fingerprint,
+        "copies": stats.copies if stats is not None else 1,
+        "max_price_minor": max_price_minor,
+        "price_spread": Price(max_price_minor - price.minor_units, price.currency).total,
+    }
+
+
+def offer_rows(depart_date: str, return_date: str, offers, depth: int) -> List[Dict[str, Any]]:
+    """
+    把一个日期组合最便宜的depth个航班展开为表格的行
+
+    Args:
+        depart_date: 搜索的出发日期
+        return_date: 搜索的返程日期
+        offers: 按价格排序的LazyOfferList，去重时带有fingerprints统计
+        depth: 保留最便宜的几个航班
+
+    Returns:
+        List[Dict[str, Any]]: 表格的行，航班序号为航班在响应中的原始序号
+    """
+    fingerprints = getattr(offers, "fingerprints", None)
+    return [
+        offer_row(depart_date, return_date, offer.id, offer,
+                  fingerprints.get(offer.fingerprint) if fingerprints is not None else None)
+        for offer in offers[:depth]
+    ]
+
+
+def _format_durations(seconds: pd.Series) -> pd.Series:
+    """批量把秒数格式化为 "Xh Ym"，与format_time_duration一致"""
+    seconds = seconds.astype("int64")
+    return (seconds // 3600).astype(str) + "h " + ((seconds % 3600) // 60).astype(str) + "m"
+
+
+def _format_times(times: pd.Series) -> pd.Series:
+    """批量把时间格式化为 "YYYY-MM-DD HH:MM:SS"，缺失值为空字符串"""
+    return times.dt.strftime("%Y-%m-%d %H:%M:%S").fillna("")
+
+
+class OfferTable:
+    """
+    一次运行中所有航班的列式表格
+
+    价格、飞行时长、中转次数和时间为数值列，机场、航空公司和行李额为分类列，
+    排序、筛选和汇总都是向量化操作，所有导出格式都从这一张表读取
+    """
+
+    def __init__(self, frame: Optional[pd.DataFrame] = None):
+        """
+        Args:
+            frame: 已有的DataFrame，None则创建空表
+        """
+        if frame is None:
+            frame = self._typed(pd.DataFrame(columns=TABLE_COLUMNS))
+        self._frame = frame
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict[str, Any]]) -> "OfferTable":
+        """根据offer_row生成的行创建表格"""
+        frame = pd.DataFrame(list(rows), columns=TABLE_COLUMNS)
+        return cls(cls._typed(frame))
+
+    @classmethod
+    def from_offers(cls, entries: Iterable[Tuple[str, str, int, FlightOffer]]) -> "OfferTable":
+        """
+        根据航班创建表格
+
+        Args:
+            entries: (出发日期, 返程日期, 序号, FlightOffer) 的可迭代对象
+        """
+        return cls.from_rows(offer_row(*entry) for entry in entries)
+
+    @staticmethod
+    def _typed(frame: pd.DataFrame) -> pd.DataFrame:
+        """设置各列的类型"""
+        frame = frame.astype({
+            "flight_index": "int32",
+            "price": "float64",
+            "price_minor": "int64",
+            "outbound_duration": "int64",
+            "inbound_duration": "int64",
+            "outbound_stops": "int8",
+            "inbound_stops": "int8",
+            "copies": "int32",
+            "max_price_minor": "int64",
+            "price_spread": "float64",
+        })
+        for column in TIME_COLUMNS:
+            # 保存当地时间，时间带时区偏移或小数秒时只取前19个字符
+            frame[column] = pd.to_datetime(frame[column].astype(str).str.slice(0, 19),
+                                           format="%Y-%m-%dT%H:%M:%S", errors="coerce")
+        for column in CATEGORY_COLUMNS:
+            frame[column] = frame[column].astype("category")
+        return frame
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        return self._frame
+
+    def __len__(self):
+        return len(self._frame)
+
+    def __bool__(self):
+        return not self._frame.empty
+
+    def sort_by_price(self) -> "OfferTable":
+        """按价格排序，价格相同时保持原有顺序"""
+        return OfferTable(self._frame.sort_values("price_minor", kind="mergesort", ignore_index=True))
+
+    def cheapest(self, n: int) -> "OfferTable":
+        """最便宜的n个航班"""
+        return OfferTable(self._frame.nsmallest(n, "price_minor", keep="first").reset_index(drop=True))
+
+    def filter(self, max_price: Optional[float] = None, max_stops: Optional[int] = None,
+               max_duration: Optional[int] = None, airlines: Optional[Iterable[str]] = None) -> "OfferTable":
+        """
+        按条件筛选航班
+
+        Args:
+            max_price: 最高价格
+            max_stops: 单程最多中转次数
+            max_duration: 单程最长飞行时间（秒）
+            airlines: 只保留这些航空公司（去程主要承运商）
+
+        Returns:
+            OfferTable: 筛选后的表格
+        """
+        frame = self._frame
+        mask = pd.Series(True, index=frame.index)
+        if max_price is not None:
+            mask &= frame["price"] <= max_price
+        if max_stops is not None:
+            mask &= (frame["outbound_stops"] <= max_stops) & (frame["inbound_stops"] <= max_stops)
+        if max_duration is not None:
+            mask &= (frame["outbound_duration"] <= max_duration) & (frame["inbound_duration"] <= max_duration)
+        if airlines is not None:
+            mask &= frame["airline"].isin(list(airlines))
+        return OfferTable(frame[mask].reset_index(drop=True))
+
+    def cheapest_by_date(self) -> pd.DataFrame:
+        """每个日期组合的最低价格和航班数量"""
+        return (self._frame.groupby(["depart_date", "return_date"], observed=True, sort=False)
+                .agg(min_price=("price", "min"), offers=("price", "size"))
+                .reset_index()
+                .sort_values("min_price", kind="mergesort", ignore_index=True))
+
+    def records(self) -> List[Dict[str, Any]]:
+        """转换为字典列表"""
+        return self._frame.to_dict("records")
+
+    def export_chunks(self, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+        """
+        按块生成用于导出的DataFrame，每块最多chunk_size行，格式与to_export_frame一致
+
+        Args:
+            chunk_size: 每块的行数
+
+        Yields:
+            pd.DataFrame: 列为EXPORT_COLUMNS的一块数据
+        """
+        for start in range(0, len(self._frame), chunk_size):
+            yield OfferTable(self._frame.iloc[start:start + chunk_size]).to_export_frame()
+
+    def to_export_frame(self) -> pd.DataFrame:
+        """
+        生成用于导出的DataFrame，列名和格式与原来的CSV/Excel一致
+
+        Returns:
+            pd.DataFrame: 列为EXPORT_COLUMNS，时间和飞行时长已格式化
+        """
+        frame = self._frame
+        if frame.empty:
+            return pd.DataFrame(columns=EXPORT_COLUMNS)
+        export = pd.DataFrame({
+            "departure_date": frame["depart_date"].astype(str),
+            "return_date": frame["return_date"].astype(str),
+            "price": frame["price"],
+            "currency": frame["currency"].astype(str),
+            "origin": frame["origin"].astype(str),
+            "destination": frame["destination"].astype(str),
+            "outbound_departure_time": _format_times(frame["outbound_departure_time"]),
+            "outbound_arrival_time": _format_times(frame["outbound_arrival_time"]),
+            "outbound_flight_time": _format_durations(frame["outbound_duration"]),
+            "outbound_transit": frame["outbound_transit"].astype(str).replace("", "Direct"),
+            "airline": frame["airline"].astype(str),
+            "inbound_departure_time": _format_times(frame["inbound_departure_time"]),
+            "inbound_arrival_time": _format_times(frame["inbound_arrival_time"]),
+            "inbound_flight_time": _format_durations(frame["inbound_duration"]),
+            "inbound_transit": frame["inbound_transit"].astype(str).replace("", "Direct"),
+            "inbound_airline": frame["inbound_airline"].astype(str),
+            "personal_item": frame["personal_item"].astype(str),
+            "cabin_baggage": frame["cabin_baggage"].astype(str),
+            "checked_baggage": frame["checked_baggage"].astype(str),
+            "booking_link": frame["booking_link"],
+        })
+        return export[EXPORT_COLUMNS]
@@ -1,124 +1,297 @@
 # flight_scraper/core/data/platform_processors/booking_processor.py
-from flight_scraper.core.data.data_models import FlightOffer, SegmentInfo, LayoverInfo
-from flight_scraper.core.data.data_formatter import format_time_duration, parse_iso_time
+from flight_scraper.core.data.data_models import (FlightOffer, SegmentInfo, LayoverInfo, Price, TimeInfo,
+                                                  intern_airport, intern_carrier, intern_luggage)
+from flight_scraper.core.data.data_formatter import parse_iso_times
+from flight_scraper.core.data.fingerprint import FingerprintIndex, fingerprint_legs
+from flight_scraper.core.data.lazy_offers import LazyOfferList
+from flight_scraper.core.data.top_k import TopKCollector
+import itertools
 import logging
 
+import numpy as np
+
 from flight_scraper.core.data.processor.data_processor import FlightDataProcessor
 
 
+# 流式处理时每批解码时间的航班数量
+STREAM_BATCH_SIZE = 32
+
+# 只保留最便宜的几个航班时额外保留的原始航班数量，前面的航班处理失败时依次补上
+RANK_RESERVE = 5
+
+
 class BookingDataProcessor(FlightDataProcessor):
     """处理Booking平台的航班数据"""
 
-    def process(self):
+    def process(self, keep=None, dedupe=False):
         """
         处理Booking平台原始数据，转换为结构化的FlightOffer对象
 
+        分两个阶段：先只读取所有航班的价格并排序，航段等完整信息在航班被访问时才提取
+
+        Args:
+            keep: 只保留最便宜的几个航班，None则全部保留
+            dedupe: 是否把行程相同的航班合并为最便宜的一个
+
         Returns:
-            List[FlightOffer]: 处理后的航班列表
+            LazyOfferList: 按价格排序、按需处理的航班列表
         """
         if not self.raw_data or "flightOffers" not in self.raw_data:
-            return []
+            return self.rank([])
+
+        self.processed_offers = self.rank(self.raw_data["flightOffers"], keep, dedupe)
+        return self.processed_offers
+
+    def rank(self, flight_offers, keep=None, dedupe=False):
+        """
+        第一阶段：只读取价格和token，按价格排序
 
-        flight_offers = self.raw_data["flightOffers"]
+        Args:
+            flight_offers: 原始航班的可迭代对象，可以是边下载边解码的生成器
+            keep: 只保留最便宜的几个航班，None则全部保留；另外保留RANK_RESERVE个后备航班的原始数据
+            dedupe: 是否把行程相同的航班（例如同一航班的不同票价品牌）合并为最便宜的一个，
+                    合并的副本数和价格范围记录在返回列表的fingerprints中
 
+        Returns:
+            LazyOfferList: 按价格排序（价格相同时按原始顺序）的航班列表
+        """
+        collector = TopKCollector(None if keep is None else keep + RANK_RESERVE)
+        fingerprints = FingerprintIndex() if dedupe else None
         for i, offer in enumerate(flight_offers):
-            try:
-                # 处理价格
-                price_info = self._extract_price(offer)
+            if not isinstance(offer, dict) or "segments" not in offer:
+                logging.error(f"航班 {i} 缺少航段信息，已跳过")
+                continue
+            price = self._extract_price(offer)
+            token = offer.get("token", "")
+            group = None
+            if fingerprints is not None:
+                group = self.fingerprint(offer)
+                fingerprints.add(group, price.minor_units)
+            collector.push((price.minor_units, i), (price, i, token, offer), group)
+        if fingerprints is not None and fingerprints.duplicates:
+            logging.info(f"合并了 {fingerprints.duplicates} 个重复行程的航班")
+        return LazyOfferList(collector.sorted_items(), self._materialize, fingerprints, limit=keep)
+
+    @staticmethod
+    def fingerprint(offer):
+        """
+        计算原始航班的行程指纹
+
+        由每个航段的机场、起降时间、承运商和航班号组成，与价格、票价品牌和token无关
+
+        Args:
+            offer: 原始航班
+
+        Returns:
+            str: 行程指纹，航段数据无效时退回为token
+        """
+        try:
+            legs = []
+            for segment in offer["segments"]:
+                for leg in segment["legs"]:
+                    flight_info = leg.get("flightInfo") or {}
+                    carrier_info = flight_info.get("carrierInfo") or {}
+                    carriers = leg.get("carriersData") or [{}]
+                    legs.append((
+                        leg["departureAirport"]["code"],
+                        leg["arrivalAirport"]["code"],
+                        leg["departureTime"],
+                        leg["arrivalTime"],
+                        carrier_info.get("marketingCarrier") or carriers[0].get("code"),
+                        flight_info.get("flightNumber"),
+                    ))
+                legs.append(None)
+            return fingerprint_legs(legs)
+        except (KeyError, IndexError, TypeError, AttributeError):
+            return offer.get("token") or str(id(offer))
+
+    def _materialize(self, indexed_offers):
+        """第二阶段：批量提取航段、行李和预订链接"""
+        offers = [offer for _, offer in indexed_offers]
+        return [
+            self._process_offer(i, offer, layover_seconds)
+            for (i, offer), layover_seconds in zip(indexed_offers, self._decode_layover_seconds(offers))
+        ]
+
+    def iter_offers(self, flight_offers, batch_size=STREAM_BATCH_SIZE):
+        """
+        逐个处理航班，每处理完一个就产出，适合配合流式解码使用
 
-                # 处理出发段
-                outbound_segment = self._extract_segment(offer["segments"][0])
+        航班按batch_size分批，每批的中转时间一次性批量解码；与process不同，每个航班都会被完整处理
 
-                # 处理返程段
-                inbound_segment = self._extract_segment(offer["segments"][1])
+        Args:
+            flight_offers: 原始航班的可迭代对象，可以是列表，也可以是边下载边解码的生成器
+            batch_size: 每批的航班数量
 
-                # 处理行李
-                luggage_info = self._extract_luggage(offer)
+        Yields:
+            FlightOffer: 处理后的航班，处理失败的航班会被跳过
+        """
+        offers = iter(flight_offers)
+        index = 0
+        while True:
+            batch = list(itertools.islice(offers, batch_size))
+            if not batch:
+                return
+            for offer, layover_seconds in zip(batch, self._decode_layover_seconds(batch)):
+                flight_offer = self._process_offer(index, offer, layover_seconds)
+                index += 1
+                if flight_offer is not None:
+                    yield flight_offer
+
+    def _decode_layover_seconds(self, batch):
+        """
+        批量计算一批航班所有中转的停留时间
 
-                # 处理token
-                token = offer.get("token", "")
+        先收集所有相邻航段的到达和出发时间，整批解析为UTC时间后做向量减法，
+        带时区偏移的时间也能得到正确的停留时间
 
-                # 创建FlightOffer对象
-                flight_offer = FlightOffer(
-                    id=i,
-                    price=price_info,
-                    outbound=outbound_segment,
-                    inbound=inbound_segment,
-                    luggage=luggage_info,
-                    token=token,
-                    booking_link=self._generate_booking_link(offer, outbound_segment, inbound_segment)
-                )
+        Args:
+            batch: 原始航班列表
 
-                self.processed_offers.append(flight_offer)
+        Returns:
+            list: 每个航班对应一个列表，包含去程和返程各自的停留秒数列表；航班结构无效时为None
+        """
+        arrivals, departures = [], []
+        shapes = []
+        for offer in batch:
+            start = len(arrivals)
+            try:
+                shape = []
+                for segment in offer["segments"][:2]:
+                    legs = segment["legs"]
+                    shape.append(len(legs) - 1)
+                    for i in range(len(legs) - 1):
+                        arrivals.append(legs[i]["arrivalTime"])
+                        departures.append(legs[i + 1]["departureTime"])
+            except (KeyError, IndexError, TypeError):
+                del arrivals[start:], departures[start:]
+                shape = None
+            shapes.append(shape)
 
-            except Exception as e:
-                logging.error(f"处理航班 {i} 时出错: {e}")
+        try:
+            _, arrival_utc = parse_iso_times(arrivals)
+            _, departure_utc = parse_iso_times(departures)
+        except ValueError:
+            if len(batch) == 1:
+                return [None]
+            # 有无法解析的时间，逐个航班重新解码，只跳过出错的航班
+            return [self._decode_layover_seconds([offer])[0] for offer in batch]
+
+        seconds = (departure_utc - arrival_utc).astype(np.int64).tolist()
+        result = []
+        position = 0
+        for shape in shapes:
+            if shape is None:
+                result.append(None)
                 continue
+            per_segment = []
+            for count in shape:
+                per_segment.append(seconds[position:position + count])
+                position += count
+            result.append(per_segment)
+        return result
+
+    def _process_offer(self, i, offer, layover_seconds=None):
+        """
+        处理单个航班，失败时返回None
 
-        return self.processed_offers
+        Args:
+            i: 航班序号
+            offer: 原始航班
+            layover_seconds: _decode_layover_seconds计算的停留时间，None则单独计算
+        """
+        try:
+            if layover_seconds is None:
+                layover_seconds = self._decode_layover_seconds([offer])[0]
+            if layover_seconds is None:
+                raise ValueError("航段或时间数据无效")
+
+            # 处理价格
+            price_info = self._extract_price(offer)
+
+            # 处理出发段
+            outbound_segment = self._extract_segment(offer["segments"][0], layover_seconds[0])
+
+            # 处理返程段
+            inbound_segment = self._extract_segment(offer["segments"][1], layover_seconds[1])
+            if outbound_segment is None or inbound_segment is None:
+                raise ValueError("航段信息无效")
+
+            # 处理行李
+            luggage_info = self._extract_luggage(offer)
+
+            # 处理token
+            token = offer.get("token", "")
+
+            # 创建FlightOffer对象
+            return FlightOffer(
+                id=i,
+                price=price_info,
+                outbound=outbound_segment,
+                inbound=inbound_segment,
+                luggage=luggage_info,
+                token=token,
+                booking_link=self._generate_booking_link(offer, outbound_segment, inbound_segment),
+                fingerprint=self.fingerprint(offer),
+            )
+
+        except Exception as e:
+            logging.error(f"处理航班 {i} 时出错: {e}")
+            return None
 
     def _extract_price(self, offer):
         """提取价格信息 - Booking平台特定实现"""
         try:
             price_breakdown = offer.get("priceBreakdown", {})
             total = price_breakdown.get("total", {})
-            units = total.get("units", 0)
-            nanos = total.get("nanos", 0)
-            price_total = units + nanos / 1000000000
-            currency = price_breakdown.get("currencyCode", "EUR")
-
-            return {
-                "total": price_total,
-                "currency": currency,
-                "units": units,
-                "nanos": nanos
-            }
+            currency = price_breakdown.get("currencyCode") or total.get("currencyCode") or "EUR"
+            return Price.from_units_nanos(total.get("units", 0), total.get("nanos", 0), currency)
         except Exception:
-            return {"total": 0, "currency": "EUR", "units": 0, "nanos": 0}
+            return Price(0, "EUR")
+
+    @staticmethod
+    def _extract_airport(airport):
+        """把接口的机场数据转换为共享的Airport实例"""
+        return intern_airport(
+            airport["name"],
+            code=airport.get("code"),
+            city=airport.get("city"),
+            country=airport.get("country"),
+            city_name=airport.get("cityName"),
+        )
+
+    @staticmethod
+    def _extract_carrier(leg):
+        """提取航段第一个承运商，没有承运商数据时返回None"""
+        carriers = leg.get("carriersData")
+        if not carriers:
+            return None
+        carrier = carriers[0]
+        return intern_carrier(carrier.get("name", ""), code=carrier.get("code", ""), logo=carrier.get("logo", ""))
 
-    def _extract_segment(self, segment):
+    def _extract_segment(self, segment, layover_seconds):
         """提取航段信息 - Booking平台特定实现"""
         try:
+            legs = segment["legs"]
+
             # 提取起始机场
-            departure = segment["departureAirport"]["name"]
-            arrival = segment["arrivalAirport"]["name"]
+            departure = self._extract_airport(segment["departureAirport"])
+            arrival = self._extract_airport(segment["arrivalAirport"])
 
             # 提取中转机场
-            transit_airports = []
-            if len(segment["legs"]) > 1:
-                for i in range(1, len(segment["legs"])):
-                    transit_airport = segment["legs"][i - 1]["arrivalAirport"]["name"]
-                    transit_airports.append(transit_airport)
-
-            # 提取主要承运商
-            main_carrier = {}
-            if "legs" in segment and segment["legs"] and "carriersData" in segment["legs"][0]:
-                carrier_data = segment["legs"][0]["carriersData"][0]
-                main_carrier = {
-                    "name": carrier_data.get("name", ""),
-                    "code": carrier_data.get("code", ""),
-                    "logo": carrier_data.get("logo", "")
-                }
-
-            # 提取各段承运商
-            leg_carriers = []
-            for leg in segment["legs"]:
-                if "carriersData" in leg and leg["carriersData"]:
-                    carrier = leg["carriersData"][0]
-                    leg_carriers.append({
-                        "name": carrier.get("name", ""),
-                        "code": carrier.get("code", ""),
-                        "logo": carrier.get("logo", "")
-                    })
+            transit_airports = tuple(self._extract_airport(leg["arrivalAirport"]) for leg in legs[:-1])
+
+            # 提取各段承运商，第一段的承运商为主要承运商
+            leg_carriers = tuple(carrier for carrier in map(self._extract_carrier, legs) if carrier is not None)
+            main_carrier = self._extract_carrier(legs[0]) if legs else None
 
             # 提取时间信息
-            time_info = {
-                "departure_time": segment["departureTime"],
-                "arrival_time": segment["arrivalTime"],
-                "total_time_seconds": segment["totalTime"],
-                "total_time_formatted": format_time_duration(segment["totalTime"]),
-                "layovers": self._extract_layovers(segment)
-            }
+            time_info = TimeInfo(
+                departure_time=segment["departureTime"],
+                arrival_time=segment["arrivalTime"],
+                total_time_seconds=segment["totalTime"],
+                layovers=self._extract_layovers(transit_airports, layover_seconds),
+            )
 
             # 创建SegmentInfo对象
             return SegmentInfo(
@@ -133,30 +306,18 @@ class BookingDataProcessor(FlightDataProcessor):
             logging.error(f"提取航段信息失败: {e}")
             return None
 
-    def _extract_layovers(self, segment):
-        """提取中转停留信息 - Booking平台特定实现"""
-        layovers = []
-
-        if len(segment["legs"]) > 1:
-            for i in range(len(segment["legs"]) - 1):
-                current_leg_arrival = segment["legs"][i]["arrivalTime"]
-                next_leg_departure = segment["legs"][i + 1]["departureTime"]
-
-                # 将时间字符串转换为datetime对象
-                arrival_time = parse_iso_time(current_leg_arrival)
-                departure_time = parse_iso_time(next_leg_departure)
-
-                # 计算停留时间（秒）
-                layover_seconds = (departure_time - arrival_time).total_seconds()
-
-                layover_info = LayoverInfo(
-                    airport=segment["legs"][i]["arrivalAirport"]["name"],
-                    layover_time_seconds=int(layover_seconds),
-                    layover_time_formatted=format_time_duration(int(layover_seconds))
-                )
-                layovers.append(layover_info)
+    def _extract_layovers(self, transit_airports, layover_seconds):
+        """
+        生成中转停留信息 - Booking平台特定实现
 
-        return layovers
+        Args:
+            transit_airports: 中转机场
+            layover_seconds: 批量计算好的每次中转的停留秒数
+        """
+        return tuple(
+            LayoverInfo(airport=airport, layover_time_seconds=seconds)
+            for airport, seconds in zip(transit_airports, layover_seconds)
+        )
 
     def _extract_luggage(self, offer):
         """提取行李信息 - Booking平台特定实现"""
@@ -180,9 +341,9 @@ class BookingDataProcessor(FlightDataProcessor):
                 elif feature_name == "CHECK_BAGGAGE":
                     luggage_info['checked'] = label
 
-            return luggage_info
+            return intern_luggage(**luggage_info)
         except Exception:
-            return {'personal': None, 'cabin': None, 'checked': None}
+            return intern_luggage()
 
     def _generate_booking_link(self, offer, outbound, inbound):
         """生成预订链接 - Booking平台特定实现"""
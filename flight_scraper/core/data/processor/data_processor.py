@@ -1,29 +1,49 @@
 # flight_scraper/core/data/data_processor.py
+from abc import ABC, abstractmethod
+
 from flight_scraper.core.data.data_models import FlightOffer, SegmentInfo
 
 
-class FlightDataProcessor:
-    """处理航班数据的类"""
+class FlightDataProcessor(ABC):
+    """处理航班数据的抽象基类，各平台的处理器实现process和iter_offers"""
 
-    def __init__(self, raw_data):
+    def __init__(self, raw_data=None):
         """
         初始化数据处理器
 
         Args:
-            raw_data: 原始航班数据
+            raw_data: 原始航班数据，流式处理时可以为None
         """
         self.raw_data = raw_data
         self.processed_offers = []
 
-    def process(self):
+    @abstractmethod
+    def process(self, keep=None, dedupe=False):
         """
         处理原始数据，转换为结构化的FlightOffer对象
 
+        Args:
+            keep: 只保留最便宜的几个航班，None则全部保留
+            dedupe: 是否把行程相同的航班合并为最便宜的一个
+
         Returns:
             List[FlightOffer]: 处理后的航班列表
         """
         pass
 
+    @abstractmethod
+    def iter_offers(self, flight_offers):
+        """
+        逐个处理原始航班并产出FlightOffer对象
+
+        Args:
+            flight_offers: 原始航班的可迭代对象
+
+        Yields:
+            FlightOffer: 处理后的航班
+        """
+        pass
+
     def _extract_price(self, offer):
         """提取价格信息"""
         pass
@@ -0,0 +1,91 @@
+# flight_scraper/core/data/processor/process_pool.py
+import json
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+from flight_scraper.core.data.offer_table import offer_rows
+from flight_scraper.core.data.processor.processor_factory import DataProcessorFactory
+
+
+def decode_offer_rows(platform_name, body, depart_date, return_date, depth, dedupe=False):
+    """
+    解码一个响应并处理最便宜的depth个航班，在子进程中执行
+
+    只把OfferTable的行（基本类型组成的字典）传回父进程，不传整个原始数据
+
+    Args:
+        platform_name: 平台名称
+        body: 响应字节
+        depart_date: 搜索的出发日期
+        return_date: 搜索的返程日期
+        depth: 保留最便宜的几个航班
+        dedupe: 是否合并行程相同的航班
+
+    Returns:
+        List[Dict]: OfferTable的行
+
+    Raises:
+        ValueError: 响应不是有效的JSON
+    """
+    raw_data = json.loads(body)
+    offers = DataProcessorFactory.create_processor(platform_name, raw_data).process(keep=depth, dedupe=dedupe)
+    return offer_rows(depart_date, return_date, offers, depth)
+
+
+class OfferProcessPool:
+    """
+    在多个进程中解码和处理响应
+
+    请求变快之后，JSON解码和航班处理受GIL限制只能串行，放到进程池里可以用满多个CPU核。
+    进程启动有开销，任务数少时应该直接在当前进程处理，见create
+    """
+
+    def __init__(self, workers):
+        """
+        Args:
+            workers: 进程数
+        """
+        self._workers = workers
+        self._executor = ProcessPoolExecutor(max_workers=workers)
+
+    @classmethod
+    def create(cls, processing_config, task_count):
+        """
+        根据配置创建进程池
+
+        Args:
+            processing_config: 包含workers和min_pool_tasks的字典
+            task_count: 本次运行的响应数量
+
+        Returns:
+            OfferProcessPool: 进程池，未启用或任务数太少时返回None（在当前进程处理）
+        """
+        workers = processing_config.get("workers", 0)
+        if workers <= 0:
+            return None
+        if task_count < processing_config.get("min_pool_tasks", 20):
+            logging.info(f"只有 {task_count} 个日期组合，在当前进程处理响应")
+            return None
+        logging.info(f"使用 {workers} 个进程解码和处理响应")
+        return cls(workers)
+
+    @property
+    def workers(self):
+        return self._workers
+
+    def decode(self, platform_name, body, depart_date, return_date, depth, dedupe=False):
+        """
+        在进程池中执行decode_offer_rows并等待结果，参数和返回值与decode_offer_rows相同
+        """
+        future = self._executor.submit(decode_offer_rows, platform_name, body, depart_date, return_date, depth,
+                                       dedupe)
+        return future.result()
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -3,12 +3,12 @@
 class DataProcessorFactory:
 
     @staticmethod
-    def create_processor(platform_name, raw_data):
+    def create_processor(platform_name, raw_data=None):
         """创建指定平台的数据处理器实例
 
         Args:
             platform_name: 平台名称
-            raw_data: 原始数据
+            raw_data: 原始数据，流式处理时为None
 
         Returns:
             FlightDataProcessor: 数据处理器实例
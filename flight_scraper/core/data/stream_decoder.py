@@ -0,0 +1,212 @@
+# flight_scraper/core/data/stream_decoder.py
+import codecs
+import json
+import re
+
+# 字符串外需要关注的结构字符
+_STRUCTURAL = re.compile(r'["\[\]{},]')
+# 字符串内需要关注的字符
+_STRING_SPECIAL = re.compile(r'["\\]')
+# 数字、true/false/null 等标量元素的结束位置
+_SCALAR_END = re.compile(r'[,\]]')
+
+_WHITESPACE = " \t\r\n"
+
+
+class JsonArrayStreamDecoder:
+    """
+    增量解析JSON顶层对象中某个键对应的数组
+
+    数据按块喂入，每凑齐一个完整的数组元素就解析并返回，
+    缓冲区只保留尚未解析完的那个元素，不需要把整个响应读入内存
+    """
+
+    SEEK = "seek"
+    ARRAY = "array"
+    DONE = "done"
+
+    def __init__(self, key):
+        """
+        Args:
+            key: 顶层对象中数组的键名，例如 "flightOffers"
+        """
+        self._key = key
+        self._buf = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._state = self.SEEK
+
+        # 查找键名阶段的状态
+        self._expect_key = False
+        self._key_start = None
+        self._last_key = None
+
+        # 数组阶段的状态
+        self._array_depth = None
+        self._element_start = None
+
+    @property
+    def done(self):
+        """数组是否已经读完"""
+        return self._state == self.DONE
+
+    @property
+    def found(self):
+        """是否找到了目标数组"""
+        return self._state != self.SEEK
+
+    def feed(self, text):
+        """
+        喂入一段文本
+
+        Args:
+            text: 新到达的文本
+
+        Returns:
+            list: 本次解析出的完整数组元素
+        """
+        if self._state == self.DONE:
+            return []
+        self._buf += text
+        items = []
+        self._scan(items)
+        self._compact()
+        return items
+
+    def _scan(self, items):
+        buf = self._buf
+        length = len(buf)
+
+        while self._state != self.DONE:
+            if self._in_string:
+                match = _STRING_SPECIAL.search(buf, self._pos)
+                if match is None:
+                    self._pos = length
+                    return
+                if match.group() == "\\":
+                    if match.end() >= length:
+                        # 转义字符被截断，等下一块数据
+                        self._pos = match.start()
+                        return
+                    self._pos = match.end() + 1
+                    continue
+                self._in_string = False
+                self._pos = match.end()
+                self._on_string_end(buf, items)
+                continue
+
+            if self._state == self.ARRAY and self._element_start is None:
+                while self._pos < length and buf[self._pos] in _WHITESPACE + ",":
+                    self._pos += 1
+                if self._pos >= length:
+                    return
+                char = buf[self._pos]
+                if char == "]":
+                    self._state = self.DONE
+                    return
+                if char in "{[":
+                    self._element_start = self._pos
+                    self._depth += 1
+                    self._pos += 1
+                elif char == '"':
+                    self._element_start = self._pos
+                    self._in_string = True
+                    self._pos += 1
+                else:
+                    match = _SCALAR_END.search(buf, self._pos)
+                    if match is None:
+                        # 标量可能被截断，等下一块数据后从头再读
+                        return
+                    items.append(json.loads(buf[self._pos:match.start()]))
+                    self._pos = match.start()
+                continue
+
+            match = _STRUCTURAL.search(buf, self._pos)
+            if match is None:
+                self._pos = length
+                return
+            char = match.group()
+            self._pos = match.end()
+
+            if char == '"':
+                self._in_string = True
+                if self._state == self.SEEK and self._depth == 1 and self._expect_key:
+                    self._key_start = match.start()
+                    self._expect_key = False
+            elif char in "{[":
+                if (char == "[" and self._state == self.SEEK and self._depth == 1
+                        and self._last_key == self._key):
+                    self._state = self.ARRAY
+                    self._depth += 1
+                    self._array_depth = self._depth
+                    continue
+                self._depth += 1
+                if self._depth == 1 and char == "{":
+                    self._expect_key = True
+            elif char in "}]":
+                self._depth -= 1
+                if (self._state == self.ARRAY and self._element_start is not None
+                        and self._depth == self._array_depth):
+                    items.append(json.loads(buf[self._element_start:self._pos]))
+                    self._element_start = None
+            elif char == "," and self._state == self.SEEK and self._depth == 1:
+                self._expect_key = True
+                self._last_key = None
+
+    def _on_string_end(self, buf, items):
+        """字符串结束：记录顶层键名，或者输出字符串类型的数组元素"""
+        if self._state == self.SEEK and self._key_start is not None:
+            self._last_key = json.loads(buf[self._key_start:self._pos])
+            self._key_start = None
+        elif (self._state == self.ARRAY and self._element_start is not None
+              and self._depth == self._array_depth):
+            items.append(json.loads(buf[self._element_start:self._pos]))
+            self._element_start = None
+
+    def _compact(self):
+        """丢弃已经处理完的缓冲区内容"""
+        keep = self._pos
+        if self._element_start is not None:
+            keep = min(keep, self._element_start)
+        if self._key_start is not None:
+            keep = min(keep, self._key_start)
+        if keep <= 0:
+            return
+        self._buf = self._buf[keep:]
+        self._pos -= keep
+        if self._element_start is not None:
+            self._element_start -= keep
+        if self._key_start is not None:
+            self._key_start -= keep
+
+
+def iter_json_array(chunks, key, encoding="utf-8"):
+    """
+    从字节块流中逐个产出顶层对象中某个数组的元素
+
+    Args:
+        chunks: 字节块（或文本块）的可迭代对象，例如 response.iter_content()
+        key: 数组的键名
+        encoding: 字节块的编码
+
+    Yields:
+        数组中的每一个元素
+
+    Raises:
+        ValueError: 数据中没有该数组，或者数据在数组结束前中断
+    """
+    text_decoder = codecs.getincrementaldecoder(encoding)()
+    decoder = JsonArrayStreamDecoder(key)
+    for chunk in chunks:
+        text = text_decoder.decode(chunk) if isinstance(chunk, (bytes, bytearray, memoryview)) else chunk
+        for item in decoder.feed(text):
+            yield item
+        if decoder.done:
+            return
+    for item in decoder.feed(text_decoder.decode(b"", final=True)):
+        yield item
+    if not decoder.found:
+        raise ValueError(f"数据中没有找到数组: {key}")
+    if not decoder.done:
+        raise ValueError(f"数组 {key} 不完整，数据提前结束")
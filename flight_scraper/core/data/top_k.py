@@ -0,0 +1,126 @@
+# flight_scraper/core/data/top_k.py
+import heapq
+import itertools
+import threading
+from typing import Any, Hashable, Iterable, List, Optional, Tuple
+
+
+class TopKCollector:
+    """
+    只保留键最小的K个元素的收集器
+
+    内部是大小为K的最大堆，新元素比堆顶更好时替换堆顶，
+    内存占用与K有关，与收集的元素总数无关。线程安全，可以在每个日期完成时直接合并。
+    指定分组时同组只保留最好的一个，结果与收集顺序无关
+    """
+
+    def __init__(self, k: Optional[int] = None):
+        """
+        Args:
+            k: 保留的元素数量，None或<=0表示全部保留
+        """
+        self._k = k if k and k > 0 else None
+        self._heap = []
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._seen = 0
+        # 每组见过的最小键，以及该组当前在堆中的元素
+        self._group_keys = {}
+        self._group_entries = {}
+
+    @property
+    def k(self) -> Optional[int]:
+        return self._k
+
+    @property
+    def seen(self) -> int:
+        """累计收集过的元素数量"""
+        return self._seen
+
+    def __len__(self):
+        return len(self._heap)
+
+    def push(self, key: Tuple, item: Any, group: Optional[Hashable] = None) -> bool:
+        """
+        收集一个元素
+
+        Args:
+            key: 排序键，越小越好；键相同时先收集的元素排在前面
+            item: 元素
+            group: 分组（例如行程指纹），同组只保留键最小的一个元素，None表示不分组
+
+        Returns:
+            bool: 元素是否被保留
+        """
+        with self._lock:
+            return self._push(key, item, group)
+
+    def extend(self, entries: Iterable[Tuple[Tuple, Any]]) -> None:
+        """批量收集 (键, 元素) 或 (键, 元素, 分组)"""
+        with self._lock:
+            for entry in entries:
+                self._push(*entry)
+
+    def _push(self, key, item, group=None):
+        self._seen += 1
+        if group is not None:
+            best = self._group_keys.get(group)
+            if best is not None and not key < best:
+                # 同组已有更好的元素
+                return False
+            self._group_keys[group] = key
+            # 同组较差的元素还在堆中时用新元素替换，堆的大小不变
+            self._remove(self._group_entries.pop(group, None))
+        # heapq是最小堆，取负数变成最大堆，堆顶是当前最差的元素
+        entry = (_Reversed(key), -next(self._counter), item, group)
+        if self._k is None or len(self._heap) < self._k:
+            heapq.heappush(self._heap, entry)
+        elif key < self._heap[0][0].key:
+            evicted = heapq.heapreplace(self._heap, entry)
+            if evicted[3] is not None:
+                self._group_entries.pop(evicted[3], None)
+        else:
+            return False
+        if group is not None:
+            self._group_entries[group] = entry
+        return True
+
+    def _remove(self, entry):
+        """从堆中移除指定的元素，O(K)"""
+        if entry is None:
+            return
+        for index, candidate in enumerate(self._heap):
+            if candidate is entry:
+                last = self._heap.pop()
+                if index < len(self._heap):
+                    self._heap[index] = last
+                    heapq.heapify(self._heap)
+                return
+
+    def worst_key(self) -> Optional[Tuple]:
+        """当前保留的元素中最差的键，收集器未满时返回None"""
+        with self._lock:
+            if self._k is None or len(self._heap) < self._k:
+                return None
+            return self._heap[0][0].key
+
+    def sorted_items(self) -> List[Any]:
+        """按键从小到大返回保留的元素"""
+        with self._lock:
+            entries = sorted(self._heap, key=lambda entry: (entry[0].key, -entry[1]))
+        return [entry[2] for entry in entries]
+
+
+class _Reversed:
+    """反转比较顺序的键包装，用于把heapq当作最大堆使用"""
+
+    __slots__ = ("key",)
+
+    def __init__(self, key):
+        self.key = key
+
+    def __lt__(self, other):
+        return other.key < self.key
+
+    def __eq__(self, other):
+        return self.key == other.key
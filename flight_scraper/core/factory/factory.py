@@ -8,12 +8,16 @@ class ScraperFactory:
     """爬虫工厂类，负责创建不同平台的爬虫实例"""
 
     @staticmethod
-    def create_scraper(platform_name, config=None):
+    def create_scraper(platform_name, config=None, session=None, cache=None, max_offers=None, dedupe=None):
         """创建指定平台的爬虫实例
 
         Args:
             platform_name: 平台名称
             config: 配置数据，None则自动加载
+            session: 本次运行共享的HttpSession，None则使用进程内默认会话
+            cache: 共享的ResponseCache，None则不使用缓存
+            max_offers: 只保留最便宜的几个航班，None则全部保留
+            dedupe: 是否合并行程相同的航班，None则使用配置中的值
 
         Returns:
             FlightScraper: 爬虫实例
@@ -27,7 +31,8 @@ class ScraperFactory:
             from flight_scraper.platforms.booking.scraper import BookingScraper
             from flight_scraper.platforms.booking.config import BookingConfig
             platform_config = BookingConfig(config)
-            return BookingScraper(platform_config)
+            return BookingScraper(platform_config, session=session, cache=cache, max_offers=max_offers,
+                                  dedupe=dedupe)
         """
         Booking多日期搜索。
         """
@@ -36,11 +41,215 @@ class ScraperFactory:
             from flight_scraper.platforms.booking.config import BookingConfig
             platform_config = BookingConfig(config)
             return MultiDateBookingScraper(platform_config)
+        """
+        跨平台元搜索，并发搜索meta_search.platforms中启用的所有平台。
+        """
+        if platform_name.lower() == "meta_search":
+            from flight_scraper.platforms.meta_search.searcher import MetaSearch
+            return MetaSearch(config)
         # 添加其他平台支持...
 
         else:
             raise ValueError(f"不支持的平台: {platform_name}")
 
+    @staticmethod
+    def apply_search_condition(platform_name, config, search_condition):
+        """返回使用指定搜索条件的配置副本，不修改原配置
+
+        Args:
+            platform_name: 平台名称
+            config: 该平台的配置数据
+            search_condition: 搜索条件，覆盖配置中的同名字段
+
+        Returns:
+            dict: 新的配置数据
+        """
+        if platform_name.lower() in ("booking", "booking_multi_date"):
+            config = dict(config)
+            config["booking"] = dict(config["booking"])
+            config["booking"]["booking_search_condition"] = dict(
+                config["booking"].get("booking_search_condition") or {}, **search_condition
+            )
+            return config
+
+        else:
+            raise ValueError(f"不支持的平台: {platform_name}")
+
+    @staticmethod
+    def create_session(platform_name, config=None, max_workers=None, requests_per_second=None):
+        """为一次运行创建共享的HTTP会话，连接池大小与并发数一致
+
+        调用方负责在运行结束后关闭会话
+
+        Args:
+            platform_name: 平台名称
+            config: 配置数据，None则自动加载
+            max_workers: 并发数，None则使用配置中的值
+            requests_per_second: 每个主机每秒允许的请求数，None则使用配置中的值
+
+        Returns:
+            HttpSession: 会话实例
+        """
+        from flight_scraper.core.http.session import create_session
+        from flight_scraper.proxy.pool import ProxyPool
+
+        if config is None:
+            config = ScraperFactory._load_config(platform_name)
+
+        if platform_name.lower() in ("booking", "booking_multi_date"):
+            from flight_scraper.platforms.booking.config import BookingConfig
+            platform_config = BookingConfig(config)
+            concurrency = platform_config.get_concurrency_config()
+            if max_workers is None:
+                max_workers = concurrency["max_workers"]
+            if requests_per_second is None:
+                requests_per_second = concurrency["requests_per_second"]
+            http_config = platform_config.get_http_config()
+            # 健康检查与爬虫请求使用同样的证书校验设置
+            proxy_pool = ProxyPool.from_config(
+                platform_config.get_proxies_config(), platform_config.get_proxy_pool_config(),
+                verify=http_config["verify_ssl"]
+            )
+            if proxy_pool is not None:
+                proxy_pool.health_check()
+            return create_session(
+                http_config, max_workers, requests_per_second,
+                adaptive_config=platform_config.get_adaptive_config(),
+                proxy_pool=proxy_pool,
+                retry_config=platform_config.get_retry_config()
+            )
+
+        else:
+            raise ValueError(f"不支持的平台: {platform_name}")
+
+    @staticmethod
+    def create_cache(platform_name, config=None, refresh=False):
+        """根据配置创建响应缓存
+
+        调用方负责在运行结束后关闭缓存
+
+        Args:
+            platform_name: 平台名称
+            config: 配置数据，None则自动加载
+            refresh: 为True时只写不读
+
+        Returns:
+            ResponseCache: 缓存实例，配置中未启用时返回None
+        """
+        from flight_scraper.core.http.response_cache import ResponseCache
+
+        if config is None:
+            config = ScraperFactory._load_config(platform_name)
+
+        if platform_name.lower() in ("booking", "booking_multi_date"):
+            from flight_scraper.platforms.booking.config import BookingConfig
+            cache_config = BookingConfig(config).get_cache_config()
+        else:
+            raise ValueError(f"不支持的平台: {platform_name}")
+
+        if not cache_config["enable"]:
+            return None
+
+        path = ScraperFactory._resolve_path(cache_config["path"])
+        return ResponseCache(path, cache_config["ttl_seconds"], cache_config["max_entries"], refresh=refresh)
+
+    @staticmethod
+    def create_history_store(platform_name, config=None):
+        """根据配置创建价格历史库
+
+        调用方负责在运行结束后关闭
+
+        Args:
+            platform_name: 平台名称
+            config: 配置数据，None则自动加载
+
+        Returns:
+            PriceHistoryStore: 价格历史库，配置中未启用时返回None
+        """
+        from flight_scraper.core.storage.price_history import PriceHistoryStore
+
+        if config is None:
+            config = ScraperFactory._load_config(platform_name)
+
+        if platform_name.lower() in ("booking", "booking_multi_date"):
+            from flight_scraper.platforms.booking.config import BookingConfig
+            history_config = BookingConfig(config).get_history_config()
+        else:
+            raise ValueError(f"不支持的平台: {platform_name}")
+
+        if not history_config["enable"]:
+            return None
+        return PriceHistoryStore(ScraperFactory._resolve_path(history_config["path"]))
+
+    @staticmethod
+    def create_run_journal(platform_name, config=None):
+        """根据配置创建检查点日志
+
+        调用方负责在运行结束后关闭
+
+        Args:
+            platform_name: 平台名称
+            config: 配置数据，None则自动加载
+
+        Returns:
+            RunJournal: 检查点日志，配置中未启用时返回None
+        """
+        from flight_scraper.core.storage.run_journal import RunJournal
+
+        if config is None:
+            config = ScraperFactory._load_config(platform_name)
+
+        if platform_name.lower() in ("booking", "booking_multi_date"):
+            from flight_scraper.platforms.booking.config import BookingConfig
+            checkpoint_config = BookingConfig(config).get_checkpoint_config()
+        else:
+            raise ValueError(f"不支持的平台: {platform_name}")
+
+        if not checkpoint_config["enable"]:
+            return None
+        return RunJournal(ScraperFactory._resolve_path(checkpoint_config["path"]), checkpoint_config["keep_days"])
+
+    @staticmethod
+    def create_work_queue(platform_name, config=None):
+        """根据配置创建分布式工作队列
+
+        调用方负责在使用结束后关闭
+
+        Args:
+            platform_name: 平台名称
+            config: 配置数据，None则自动加载
+
+        Returns:
+            WorkQueue: 工作队列
+        """
+        if config is None:
+            config = ScraperFactory._load_config(platform_name)
+
+        if platform_name.lower() in ("booking", "booking_multi_date"):
+            from flight_scraper.platforms.booking.config import BookingConfig
+            queue_config = BookingConfig(config).get_queue_config()
+        else:
+            raise ValueError(f"不支持的平台: {platform_name}")
+
+        if queue_config["backend"] != "sqlite":
+            raise ValueError(f"不支持的队列后端: {queue_config['backend']}")
+        from flight_scraper.core.storage.work_queue import SqliteWorkQueue
+        return SqliteWorkQueue(
+            ScraperFactory._resolve_path(queue_config["path"]),
+            lease_seconds=queue_config["lease_seconds"],
+            max_attempts=queue_config["max_attempts"],
+            retry_delay=queue_config["retry_delay"],
+        )
+
+    @staticmethod
+    def _resolve_path(path):
+        """相对路径按项目根目录解析"""
+        if os.path.isabs(path):
+            return path
+        current_dir = os.path.dirname(os.path.abspath(__file__))
+        project_root = os.path.dirname(os.path.dirname(os.path.dirname(current_dir)))
+        return os.path.join(project_root, path)
+
     @staticmethod
     def _load_config(platform_name):
         """加载指定平台的配置
@@ -0,0 +1,218 @@
+# flight_scraper/core/http/adaptive.py
+import logging
+import threading
+import time
+
+# 表示对方在限流或过载的状态码
+THROTTLE_STATUS_CODES = (403, 429)
+
+
+class CircuitOpenError(Exception):
+    """熔断器多次打开后仍未恢复，放弃本次运行剩余的请求"""
+    pass
+
+
+def is_throttle_status(status_code):
+    """判断状态码是否表示被限流或服务端过载"""
+    return status_code in THROTTLE_STATUS_CODES or status_code >= 500
+
+
+class AdaptiveController:
+    """
+    自适应并发控制器
+
+    按AIMD（加性增、乘性减）调整允许同时进行的请求数和请求速率：
+    遇到403/429/5xx、连接错误或延迟明显升高时减半，连续正常时逐步恢复。
+    连续失败达到阈值时打开熔断器暂停所有请求，冷却后只放行一个探测请求，
+    探测成功才恢复，多次熔断仍失败则抛出CircuitOpenError
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, max_concurrency, rate_limiter=None, min_concurrency=1,
+                 failure_threshold=5, cooldown_seconds=30.0, max_cooldown_seconds=300.0,
+                 max_trips=3, latency_factor=3.0, min_rate_factor=0.1):
+        """
+        初始化控制器
+
+        Args:
+            max_concurrency: 最大并发数，也是初始并发数
+            rate_limiter: 需要同步调整速率的RateLimiter，None则只调整并发数
+            min_concurrency: 最小并发数
+            failure_threshold: 连续失败多少次后打开熔断器
+            cooldown_seconds: 熔断器第一次打开的暂停时间（秒），之后每次翻倍
+            max_cooldown_seconds: 最长暂停时间（秒）
+            max_trips: 最多连续暂停几次，之后再次熔断则放弃
+            latency_factor: 平均延迟超过基线的多少倍时视为拥塞
+            min_rate_factor: 请求速率最低降到初始速率的多少倍
+        """
+        self._cond = threading.Condition()
+        self._max_concurrency = max(1, int(max_concurrency))
+        self._min_concurrency = max(1, min(int(min_concurrency), self._max_concurrency))
+        self._limit = float(self._max_concurrency)
+        self._in_flight = 0
+
+        self._rate_limiter = rate_limiter
+        self._base_rate = rate_limiter.requests_per_second if rate_limiter is not None else 0
+        self._min_rate = self._base_rate * min_rate_factor
+
+        self._failure_threshold = failure_threshold
+        self._cooldown = cooldown_seconds
+        self._initial_cooldown = cooldown_seconds
+        self._max_cooldown = max_cooldown_seconds
+        self._max_trips = max_trips
+        self._latency_factor = latency_factor
+
+        self._state = self.CLOSED
+        self._open_until = 0.0
+        self._probe_in_flight = False
+        self._consecutive_failures = 0
+        self._trips = 0
+        self._aborted = False
+
+        self._latency_ewma = None
+        self._latency_baseline = None
+        self._last_decrease = 0.0
+
+    @property
+    def limit(self):
+        """当前允许的并发数"""
+        return int(self._limit)
+
+    @property
+    def state(self):
+        return self._state
+
+    @property
+    def aborted(self):
+        return self._aborted
+
+    def acquire(self):
+        """
+        等待直到允许发出请求
+
+        Returns:
+            bool: 本次请求是否为熔断器半开时的探测请求，需要原样传给release
+
+        Raises:
+            CircuitOpenError: 熔断次数超过上限时抛出
+        """
+        with self._cond:
+            while True:
+                if self._aborted:
+                    raise CircuitOpenError("熔断器多次打开仍未恢复，停止发送请求")
+
+                if self._state == self.OPEN:
+                    remaining = self._open_until - time.monotonic()
+                    if remaining > 0:
+                        self._cond.wait(remaining)
+                        continue
+                    self._state = self.HALF_OPEN
+                    self._probe_in_flight = False
+                    logging.info("熔断器冷却结束，发送探测请求")
+
+                if self._state == self.HALF_OPEN:
+                    if not self._probe_in_flight:
+                        self._probe_in_flight = True
+                        self._in_flight += 1
+                        return True
+                elif self._in_flight < int(self._limit):
+                    self._in_flight += 1
+                    return False
+
+                self._cond.wait()
+
+    def release(self, status_code=None, latency=None, error=False, probe=False):
+        """
+        报告请求结果并释放并发名额
+
+        熔断器打开时仍在进行中的请求结束后只释放名额，不再计入失败次数；
+        半开状态下只有探测请求的结果能关闭或重新打开熔断器
+
+        Args:
+            status_code: 响应状态码，请求异常时为None
+            latency: 请求耗时（秒）
+            error: 请求是否因连接错误、超时等异常失败
+            probe: acquire的返回值，本次请求是否为探测请求
+        """
+        with self._cond:
+            self._in_flight = max(0, self._in_flight - 1)
+
+            throttled = error or (status_code is not None and is_throttle_status(status_code))
+            congested = not throttled and self._observe_latency(latency)
+
+            if probe:
+                self._probe_in_flight = False
+                if throttled:
+                    self._trip()
+                elif status_code is not None:
+                    logging.info("探测请求成功，熔断器关闭")
+                    self._state = self.CLOSED
+                    self._trips = 0
+                    self._cooldown = self._initial_cooldown
+                    self._consecutive_failures = 0
+                # 探测请求被取消时没有结果，保持半开状态，由下一个请求重新探测
+            elif self._state != self.CLOSED:
+                # 熔断器打开前发出的请求，结果不代表对方当前的状态
+                pass
+            elif throttled:
+                self._consecutive_failures += 1
+                self._decrease()
+                if self._consecutive_failures >= self._failure_threshold:
+                    self._trip()
+            else:
+                self._consecutive_failures = 0
+                if congested:
+                    self._decrease()
+                else:
+                    self._increase()
+
+            self._cond.notify_all()
+
+    def _observe_latency(self, latency):
+        """更新平均延迟，返回是否明显高于基线"""
+        if latency is None:
+            return False
+        if self._latency_ewma is None:
+            self._latency_ewma = latency
+        else:
+            self._latency_ewma = 0.8 * self._latency_ewma + 0.2 * latency
+        if self._latency_baseline is None or self._latency_ewma < self._latency_baseline:
+            self._latency_baseline = self._latency_ewma
+        return self._latency_ewma > self._latency_baseline * self._latency_factor
+
+    def _decrease(self):
+        """乘性减：并发数和请求速率减半，同一批并发请求的失败只减一次"""
+        now = time.monotonic()
+        if now - self._last_decrease < (self._latency_ewma or 1.0):
+            return
+        self._last_decrease = now
+        self._limit = max(float(self._min_concurrency), self._limit / 2)
+        if self._rate_limiter is not None and self._base_rate > 0:
+            rate = max(self._min_rate, self._rate_limiter.requests_per_second / 2)
+            self._rate_limiter.set_rate(rate)
+        logging.warning(f"检测到限流或拥塞，并发数降为 {int(self._limit)}")
+
+    def _increase(self):
+        """加性增：每一轮（约limit个成功请求）并发数加1，速率恢复初始值的10%"""
+        if self._limit < self._max_concurrency:
+            self._limit = min(float(self._max_concurrency), self._limit + 1.0 / self._limit)
+        if self._rate_limiter is not None and self._base_rate > 0:
+            rate = self._rate_limiter.requests_per_second
+            if rate < self._base_rate:
+                self._rate_limiter.set_rate(min(self._base_rate, rate + self._base_rate * 0.1 / self._limit))
+
+    def _trip(self):
+        """打开熔断器，暂停时间逐次翻倍"""
+        self._trips += 1
+        self._consecutive_failures = 0
+        if self._trips > self._max_trips:
+            self._aborted = True
+            logging.error(f"熔断器已连续暂停 {self._max_trips} 次仍未恢复，放弃剩余请求")
+            return
+        self._state = self.OPEN
+        self._open_until = time.monotonic() + self._cooldown
+        logging.warning(f"连续请求失败，熔断器打开，暂停 {self._cooldown:.0f} 秒")
+        self._cooldown = min(self._max_cooldown, self._cooldown * 2)
@@ -0,0 +1,56 @@
+# flight_scraper/core/http/rate_limiter.py
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    按主机限制请求频率的令牌桶，多个线程共享同一个实例时也能保证每个主机的请求速率
+    """
+
+    def __init__(self, requests_per_second=1.0, burst=1):
+        """
+        初始化限速器
+
+        Args:
+            requests_per_second: 每个主机每秒允许的请求数，<=0表示不限速
+            burst: 允许的突发请求数，默认为1
+        """
+        self._lock = threading.Lock()
+        self._rate = float(requests_per_second or 0)
+        self._burst = max(1, int(burst))
+        # 每个主机下一个理论请求时间
+        self._next_time = {}
+
+    @property
+    def requests_per_second(self):
+        return self._rate
+
+    def set_rate(self, requests_per_second):
+        """调整每秒请求数，已经排队的请求不受影响"""
+        with self._lock:
+            self._rate = float(requests_per_second or 0)
+
+    def acquire(self, host="default"):
+        """
+        等待直到该主机允许发出下一个请求
+
+        Args:
+            host: 主机名
+
+        Returns:
+            float: 实际等待的秒数
+        """
+        with self._lock:
+            if self._rate <= 0:
+                return 0.0
+            interval = 1.0 / self._rate
+            now = time.monotonic()
+            next_time = max(self._next_time.get(host, now), now)
+            allowed_at = next_time - (self._burst - 1) * interval
+            wait = max(0.0, allowed_at - now)
+            self._next_time[host] = next_time + interval
+
+        if wait > 0:
+            time.sleep(wait)
+        return wait
@@ -0,0 +1,160 @@
+# flight_scraper/core/http/response_cache.py
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+# 参与缓存键计算的搜索参数
+CACHE_KEY_FIELDS = ("from", "to", "depart", "return", "cabinClass", "adults", "children", "sort")
+
+
+def make_cache_key(platform_name, search_params):
+    """
+    根据规范化后的搜索参数生成缓存键
+
+    大小写、空白和children中年龄的顺序不影响缓存键
+
+    Args:
+        platform_name: 平台名称
+        search_params: 搜索参数字典
+
+    Returns:
+        str: 缓存键
+    """
+    normalized = {}
+    for field in CACHE_KEY_FIELDS:
+        value = str(search_params.get(field) or "").strip()
+        if field == "children":
+            value = ",".join(sorted(age.strip() for age in value.split(",") if age.strip()))
+        elif field == "adults":
+            value = value or "1"
+        elif field not in ("depart", "return"):
+            value = value.upper()
+        normalized[field] = value
+
+    raw_key = json.dumps([platform_name.lower(), normalized], sort_keys=True)
+    return hashlib.sha1(raw_key.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    基于SQLite的响应缓存，按过期时间和条目数量淘汰
+
+    响应体压缩后存储，多线程共享同一个实例是安全的
+    """
+
+    def __init__(self, path, ttl_seconds=21600, max_entries=5000, refresh=False):
+        """
+        初始化响应缓存
+
+        Args:
+            path: 缓存数据库文件路径
+            ttl_seconds: 缓存有效期（秒）
+            max_entries: 最多保留的条目数，超过时淘汰最久未使用的条目
+            refresh: 为True时只写不读，强制重新请求并刷新缓存
+        """
+        self._path = path
+        self._ttl = ttl_seconds
+        self._max_entries = max_entries
+        self._refresh = refresh
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, body BLOB NOT NULL, "
+            "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)")
+        self._conn.commit()
+
+    def get(self, key):
+        """
+        读取未过期的缓存
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            bytes: 响应体，未命中或已过期时返回None
+        """
+        if self._refresh:
+            return None
+
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self._ttl:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+
+        try:
+            return zlib.decompress(row[0])
+        except zlib.error as e:
+            logging.warning(f"缓存条目损坏，已忽略: {e}")
+            return None
+
+    def set(self, key, body, compressed=False):
+        """
+        写入缓存并按需淘汰旧条目
+
+        Args:
+            key: 缓存键
+            body: 响应体
+            compressed: body是否已经用zlib压缩过，流式下载时边下载边压缩，不必保留完整响应
+        """
+        if not compressed:
+            body = zlib.compress(body)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, body, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, body, now, now)
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now):
+        """删除过期条目，并把条目数量控制在max_entries以内"""
+        self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self._ttl,))
+        count = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        if count > self._max_entries:
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY accessed_at ASC LIMIT ?)",
+                (count - self._max_entries,)
+            )
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,121 @@
+# flight_scraper/core/http/retry.py
+import collections
+import email.utils
+import random
+import threading
+import time
+from datetime import timezone
+
+import requests
+
+# 可以重试的状态码，403一般是被封IP，重试同一个出口没有意义，默认不重试
+RETRYABLE_STATUS_CODES = (408, 425, 429, 500, 502, 503, 504)
+
+# 幂等的请求方法，只有这些请求会被重试或对冲
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class RetryPolicy:
+    """
+    幂等请求的重试策略
+
+    区分可重试错误（超时、连接错误、429、5xx）和致命错误（其他4xx、无效URL等），
+    重试间隔为带完全抖动的指数退避，响应带Retry-After时以其为准
+    """
+
+    def __init__(self, max_attempts=3, base_delay=1.0, max_delay=30.0,
+                 retry_status_codes=RETRYABLE_STATUS_CODES):
+        """
+        初始化重试策略
+
+        Args:
+            max_attempts: 最多尝试次数（包含第一次）
+            base_delay: 退避基准时间（秒）
+            max_delay: 单次退避的最长时间（秒）
+            retry_status_codes: 需要重试的状态码
+        """
+        self.max_attempts = max(1, int(max_attempts))
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_status_codes = tuple(retry_status_codes)
+
+    def is_retryable_error(self, error):
+        """判断请求异常是否可以重试"""
+        return isinstance(error, (requests.ConnectionError, requests.Timeout,
+                                  requests.exceptions.ChunkedEncodingError))
+
+    def is_retryable_status(self, status_code):
+        """判断状态码是否可以重试"""
+        return status_code in self.retry_status_codes
+
+    def backoff(self, attempt, response=None):
+        """
+        计算第attempt次重试前的等待时间
+
+        Args:
+            attempt: 已经失败的次数，从0开始
+            response: 失败的响应，用于读取Retry-After
+
+        Returns:
+            float: 等待秒数
+        """
+        retry_after = _parse_retry_after(response)
+        if retry_after is not None:
+            return min(self.max_delay, retry_after)
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+
+def _parse_retry_after(response):
+    """解析Retry-After头，支持秒数和HTTP日期两种格式"""
+    if response is None:
+        return None
+    value = response.headers.get("Retry-After") if response.headers else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        # -0000表示UTC，parsedate_to_datetime返回不带时区的时间，不能按本地时间计算
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class LatencyTracker:
+    """记录最近请求的耗时，用于计算对冲请求的触发阈值"""
+
+    def __init__(self, window=200, min_samples=20):
+        """
+        Args:
+            window: 保留最近多少个样本
+            min_samples: 样本数少于该值时不给出分位数
+        """
+        self._lock = threading.Lock()
+        self._samples = collections.deque(maxlen=window)
+        self._min_samples = min_samples
+
+    def record(self, latency):
+        with self._lock:
+            self._samples.append(latency)
+
+    def percentile(self, percent):
+        """
+        计算延迟分位数
+
+        Args:
+            percent: 百分位，例如95
+
+        Returns:
+            float: 延迟（秒），样本不足时返回None
+        """
+        with self._lock:
+            if len(self._samples) < self._min_samples:
+                return None
+            ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(len(ordered) * percent / 100))
+        return ordered[index]
@@ -0,0 +1,316 @@
+# flight_scraper/core/http/session.py
+import logging
+import threading
+import time
+import urllib.parse
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from flight_scraper.core.http.adaptive import AdaptiveController, THROTTLE_STATUS_CODES
+from flight_scraper.core.http.rate_limiter import RateLimiter
+from flight_scraper.core.http.retry import IDEMPOTENT_METHODS, LatencyTracker, RetryPolicy
+
+
+class HttpSession:
+    """
+    爬虫和通知共享的HTTP会话
+
+    复用keep-alive连接池，为每个请求设置连接/读取超时，并按主机限速
+    """
+
+    def __init__(self, pool_size=10, connect_timeout=5.0, read_timeout=30.0,
+                 rate_limiter=None, verify=True, controller=None, proxy_pool=None,
+                 retry_policy=None, hedge_percentile=None):
+        """
+        初始化HTTP会话
+
+        Args:
+            pool_size: 每个主机的连接池大小，一般与并发数一致
+            connect_timeout: 连接超时（秒）
+            read_timeout: 读取超时（秒）
+            rate_limiter: RateLimiter实例，None则不限速
+            verify: 是否校验SSL证书
+            controller: AdaptiveController实例，None则不做自适应并发控制
+            proxy_pool: ProxyPool实例，None则直接连接
+            retry_policy: RetryPolicy实例，None则不重试
+            hedge_percentile: 请求耗时超过该百分位时发送对冲请求，None则不对冲
+        """
+        self._pool_size = max(1, int(pool_size))
+        self._timeout = (connect_timeout, read_timeout)
+        self._rate_limiter = rate_limiter
+        self._controller = controller
+        self._proxy_pool = proxy_pool
+        self._retry_policy = retry_policy
+        self._latency_tracker = LatencyTracker()
+        self._hedge_percentile = hedge_percentile
+        self._hedge_executor = None
+        if hedge_percentile:
+            # 每个调用方最多同时占用主请求和对冲请求两个线程
+            self._hedge_executor = ThreadPoolExecutor(max_workers=self._pool_size * 2 + 2)
+        self._closed = False
+
+        self._session = requests.Session()
+        self._session.verify = verify
+        adapter = HTTPAdapter(pool_connections=self._pool_size, pool_maxsize=self._pool_size)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+    @property
+    def rate_limiter(self):
+        return self._rate_limiter
+
+    @property
+    def controller(self):
+        return self._controller
+
+    @property
+    def proxy_pool(self):
+        return self._proxy_pool
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def request(self, method, url, **kwargs):
+        """
+        发送请求，未指定timeout时使用会话的默认超时
+
+        配置了重试策略时，幂等请求遇到可重试的错误会按退避时间重试；
+        开启对冲时，耗时超过历史p95的请求会通过另一个连接（或代理）再发一次，先返回的结果生效
+
+        Args:
+            method: 请求方法
+            url: 请求地址
+            **kwargs: 传给requests的其他参数
+
+        Returns:
+            requests.Response: 响应对象
+        """
+        if self._closed:
+            raise RuntimeError("HTTP会话已关闭")
+
+        kwargs.setdefault("timeout", self._timeout)
+        if self._retry_policy is None or method.upper() not in IDEMPOTENT_METHODS:
+            return self._request_once(method, url, kwargs)
+
+        attempt = 0
+        while True:
+            try:
+                response = self._request_hedged(method, url, kwargs)
+            except requests.RequestException as e:
+                if not self._retry_policy.is_retryable_error(e) or attempt + 1 >= self._retry_policy.max_attempts:
+                    raise
+                delay = self._retry_policy.backoff(attempt)
+                logging.warning(f"请求失败({e})，{delay:.1f} 秒后进行第 {attempt + 2} 次尝试")
+            else:
+                if (not self._retry_policy.is_retryable_status(response.status_code)
+                        or attempt + 1 >= self._retry_policy.max_attempts):
+                    return response
+                delay = self._retry_policy.backoff(attempt, response)
+                logging.warning(f"请求返回 {response.status_code}，{delay:.1f} 秒后进行第 {attempt + 2} 次尝试")
+                response.close()
+            time.sleep(delay)
+            attempt += 1
+
+    def _request_hedged(self, method, url, kwargs):
+        """发送请求，超过p95延迟仍未返回时发送对冲请求，返回先完成的响应"""
+        threshold = None
+        if self._hedge_executor is not None:
+            threshold = self._latency_tracker.percentile(self._hedge_percentile)
+        if threshold is None:
+            return self._request_once(method, url, kwargs)
+
+        used_proxies = []
+        cancel = threading.Event()
+        primary = self._hedge_executor.submit(self._request_once, method, url, kwargs, used_proxies, cancel)
+        done, _ = wait([primary], timeout=threshold)
+        if done:
+            return primary.result()
+
+        logging.info(f"请求超过p{self._hedge_percentile}延迟({threshold:.2f}秒)，发送对冲请求")
+        hedge = self._hedge_executor.submit(self._request_once, method, url, kwargs, list(used_proxies), cancel)
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    response = future.result()
+                except requests.RequestException as e:
+                    error = e
+                    continue
+                if response is None:
+                    continue
+                # 先返回的结果生效，另一个请求结束后释放连接
+                cancel.set()
+                for other in pending:
+                    other.add_done_callback(_close_future_response)
+                return response
+        raise error
+
+    def _request_once(self, method, url, kwargs, used_proxies=None, cancel=None):
+        """
+        发送一次请求，经过自适应控制、限速和代理池
+
+        Args:
+            used_proxies: 记录本次选用的代理，对冲请求会避开其中的代理
+            cancel: 对冲请求的取消标记，等到发送名额时已被设置则不再发送
+
+        Returns:
+            requests.Response: 响应对象，被取消时返回None
+        """
+        if self._controller is not None:
+            # 自适应控制：先占用并发名额，再根据结果调整并发数和速率
+            probe = self._controller.acquire()
+        start = time.monotonic()
+        try:
+            self._wait_rate_limit(url)
+            if cancel is not None and cancel.is_set():
+                if self._controller is not None:
+                    self._controller.release(probe=probe)
+                return None
+            start = time.monotonic()
+            response = self._send(method, url, used_proxies, **kwargs)
+        except requests.RequestException:
+            if self._controller is not None:
+                self._controller.release(latency=time.monotonic() - start, error=True, probe=probe)
+            raise
+        except BaseException:
+            if self._controller is not None:
+                self._controller.release(probe=probe)
+            raise
+
+        latency = time.monotonic() - start
+        self._latency_tracker.record(latency)
+        if self._controller is not None:
+            self._controller.release(response.status_code, latency, probe=probe)
+        return response
+
+    def _wait_rate_limit(self, url):
+        if self._rate_limiter is not None:
+            self._rate_limiter.acquire(urllib.parse.urlparse(url).netloc)
+
+    def _send(self, method, url, used_proxies=None, **kwargs):
+        """发送请求，调用方没有指定proxies时从代理池中选择代理并报告结果"""
+        if self._proxy_pool is None or "proxies" in kwargs:
+            return self._session.request(method, url, **kwargs)
+
+        proxy = self._proxy_pool.acquire(exclude=used_proxies or ())
+        if proxy is None:
+            return self._session.request(method, url, **kwargs)
+        if used_proxies is not None:
+            used_proxies.append(proxy)
+
+        start = time.monotonic()
+        try:
+            response = self._session.request(method, url, proxies=proxy.requests_proxies, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            self._proxy_pool.report(proxy, False)
+            raise
+        # 403/429通常意味着代理IP被封或被限流
+        self._proxy_pool.report(proxy, response.status_code not in THROTTLE_STATUS_CODES,
+                                time.monotonic() - start)
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def close(self):
+        """关闭会话并释放连接池"""
+        if not self._closed:
+            self._closed = True
+            if self._hedge_executor is not None:
+                self._hedge_executor.shutdown(wait=False)
+            self._session.close()
+            logging.debug("HTTP会话已关闭")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def _close_future_response(future):
+    """对冲请求中落后的响应结束后关闭，释放连接"""
+    if not future.cancelled() and future.exception() is None and future.result() is not None:
+        future.result().close()
+
+
+_default_session = None
+_default_session_lock = threading.Lock()
+
+
+def get_default_session():
+    """
+    获取进程内共享的默认HTTP会话，供没有显式传入会话的爬虫和通知使用
+
+    Returns:
+        HttpSession: 默认会话
+    """
+    global _default_session
+    with _default_session_lock:
+        if _default_session is None or _default_session.closed:
+            _default_session = HttpSession()
+        return _default_session
+
+
+def create_session(http_config=None, pool_size=10, requests_per_second=0, adaptive_config=None,
+                   proxy_pool=None, retry_config=None):
+    """
+    根据配置创建HTTP会话
+
+    Args:
+        http_config: 包含connect_timeout、read_timeout、verify_ssl的字典
+        pool_size: 连接池大小，也是自适应控制的最大并发数
+        requests_per_second: 每个主机每秒允许的请求数，<=0表示不限速
+        adaptive_config: 自适应控制配置，None或enable为False时不启用
+        proxy_pool: 已完成健康检查的ProxyPool，None则直接连接
+        retry_config: 重试和对冲配置，None则不重试
+
+    Returns:
+        HttpSession: 新的会话
+    """
+    http_config = http_config or {}
+    rate_limiter = RateLimiter(requests_per_second)
+
+    controller = None
+    if adaptive_config and adaptive_config.get("enable"):
+        controller = AdaptiveController(
+            pool_size,
+            rate_limiter=rate_limiter,
+            min_concurrency=adaptive_config.get("min_concurrency", 1),
+            failure_threshold=adaptive_config.get("failure_threshold", 5),
+            cooldown_seconds=adaptive_config.get("cooldown_seconds", 30),
+            max_cooldown_seconds=adaptive_config.get("max_cooldown_seconds", 300),
+            max_trips=adaptive_config.get("max_trips", 3),
+            latency_factor=adaptive_config.get("latency_factor", 3.0),
+        )
+
+    retry_policy = None
+    hedge_percentile = None
+    if retry_config:
+        retry_policy = RetryPolicy(
+            max_attempts=retry_config.get("max_attempts", 3),
+            base_delay=retry_config.get("base_delay", 1.0),
+            max_delay=retry_config.get("max_delay", 30.0),
+        )
+        if retry_config.get("hedge"):
+            hedge_percentile = retry_config.get("hedge_percentile", 95)
+
+    return HttpSession(
+        pool_size=pool_size,
+        connect_timeout=http_config.get("connect_timeout", 5.0),
+        read_timeout=http_config.get("read_timeout", 30.0),
+        rate_limiter=rate_limiter,
+        verify=http_config.get("verify_ssl", True),
+        controller=controller,
+        proxy_pool=proxy_pool,
+        retry_policy=retry_policy,
+        hedge_percentile=hedge_percentile,
+    )
@@ -0,0 +1,231 @@
+# flight_scraper/core/scheduler/watch_scheduler.py
+import heapq
+import itertools
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class WatchCell:
+    """
+    监控的一个日期组合
+    """
+    route: str
+    depart_date: str
+    return_date: str
+
+
+@dataclass(frozen=True)
+class WatchItem:
+    """
+    监控列表中的一条航线和日期窗口，对应配置daemon.watchlist中的一项
+
+    origin和destination直接作为搜索条件的from和to，使用与booking_search_condition相同的地点代码
+    （例如 "MAD.AIRPORT"、"SHA.CITY"），价格历史中的航线标识也因此与单次运行一致
+    """
+    origin: str
+    destination: str
+    # 出发日期窗口从今天之后的第几天开始
+    start_in_days: int = 1
+    # 出发日期窗口的天数
+    days_range: int = 30
+    # 最短和最长停留天数
+    min_return_days: int = 30
+    max_return_days: Optional[int] = None
+
+    @classmethod
+    def from_config(cls, config: Dict) -> "WatchItem":
+        """根据watchlist配置项创建，缺少的项使用默认值"""
+        return cls(
+            origin=config["from"],
+            destination=config["to"],
+            start_in_days=config.get("start_in_days", 1),
+            days_range=config.get("days_range", 30),
+            min_return_days=config.get("return_days", 30),
+            max_return_days=config.get("max_return_days"),
+        )
+
+    @property
+    def route(self) -> str:
+        """航线标识，与price_history.route_key一致"""
+        return f"{self.origin.strip().upper()}-{self.destination.strip().upper()}"
+
+    def cells(self, today: date) -> List[WatchCell]:
+        """
+        今天需要监控的所有日期组合，窗口随日期向后滚动
+
+        Args:
+            today: 今天的日期
+
+        Returns:
+            List[WatchCell]: 按出发日期和停留天数排序的日期组合
+        """
+        max_return_days = max(self.min_return_days, self.max_return_days or self.min_return_days)
+        cells = []
+        for offset in range(self.days_range):
+            depart = today + timedelta(days=self.start_in_days + offset)
+            for stay in range(self.min_return_days, max_return_days + 1):
+                cells.append(WatchCell(self.route, depart.strftime("%Y-%m-%d"),
+                                       (depart + timedelta(days=stay)).strftime("%Y-%m-%d")))
+        return cells
+
+
+class RefreshPolicy:
+    """
+    按距离出发的天数决定刷新间隔
+
+    near_days天内出发的日期组合每min_interval秒刷新一次，far_days天以后出发的每max_interval秒刷新一次，
+    中间按天数线性增加
+    """
+
+    def __init__(self, min_interval: float = 1800, max_interval: float = 86400,
+                 near_days: int = 14, far_days: int = 120):
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.near_days = near_days
+        self.far_days = max(near_days + 1, far_days)
+
+    def interval(self, depart_date: str, today: date) -> float:
+        """
+        日期组合的刷新间隔（秒）
+
+        Args:
+            depart_date: 出发日期，格式为 YYYY-MM-DD
+            today: 今天的日期
+        """
+        days = (datetime.strptime(depart_date, "%Y-%m-%d").date() - today).days
+        if days <= self.near_days:
+            return self.min_interval
+        if days >= self.far_days:
+            return self.max_interval
+        ratio = (days - self.near_days) / (self.far_days - self.near_days)
+        return self.min_interval + ratio * (self.max_interval - self.min_interval)
+
+
+class RequestBudget:
+    """
+    全局请求预算，令牌桶：每小时补充requests_per_hour个令牌，最多积累burst个
+    """
+
+    def __init__(self, requests_per_hour: float, burst: int = 10, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            requests_per_hour: 每小时允许的请求数，<=0表示不限
+            burst: 最多积累的令牌数
+            clock: 时钟函数，测试时可以替换
+        """
+        self._rate = max(0.0, float(requests_per_hour or 0)) / 3600.0
+        self._burst = max(1, int(burst))
+        self._clock = clock
+        self._tokens = float(self._burst)
+        self._updated = clock()
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self._burst, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    def available(self) -> Optional[int]:
+        """当前可以使用的令牌数，不限时返回None"""
+        if self._rate <= 0:
+            return None
+        self._refill()
+        return int(self._tokens)
+
+    def take(self, count: int) -> None:
+        """使用count个令牌"""
+        if self._rate <= 0:
+            return
+        self._refill()
+        self._tokens -= count
+
+    def seconds_until(self, count: int = 1) -> float:
+        """再等多少秒才能有count个令牌"""
+        if self._rate <= 0:
+            return 0.0
+        self._refill()
+        return max(0.0, (count - self._tokens) / self._rate)
+
+
+class WatchScheduler:
+    """
+    监控列表的刷新调度器
+
+    每个日期组合按下次刷新时间放入优先队列，每次取出已到期的日期组合（最早到期的优先），
+    数量受全局请求预算限制；刷新后按RefreshPolicy重新排队。监控窗口每天滚动，
+    过期的日期组合被移除，新进入窗口的日期组合立即到期
+    """
+
+    def __init__(self, watchlist: Iterable[WatchItem], policy: RefreshPolicy, budget: RequestBudget):
+        self._watchlist = list(watchlist)
+        self._policy = policy
+        self._budget = budget
+        self._heap: List[Tuple[float, int, WatchCell]] = []
+        # 每个日期组合当前的到期时间，堆中到期时间不一致的条目已失效
+        self._due: Dict[WatchCell, float] = {}
+        self._counter = itertools.count()
+        self._synced_day = None
+        self._window = set()
+
+    def __len__(self):
+        return len(self._due)
+
+    def sync(self, now: float, today: date) -> None:
+        """按今天的日期更新监控的日期组合，新日期组合立即到期"""
+        if self._synced_day == today:
+            return
+        self._synced_day = today
+        self._window = set()
+        for item in self._watchlist:
+            self._window.update(item.cells(today))
+        for cell in list(self._due):
+            if cell not in self._window:
+                del self._due[cell]
+        for cell in sorted(self._window, key=lambda c: (c.depart_date, c.return_date, c.route)):
+            if cell not in self._due:
+                self._schedule(cell, now)
+
+    def _schedule(self, cell: WatchCell, due: float) -> None:
+        self._due[cell] = due
+        heapq.heappush(self._heap, (due, next(self._counter), cell))
+
+    def take_due(self, now: float, limit: Optional[int] = None) -> List[WatchCell]:
+        """
+        取出已到期的日期组合并使用对应的请求预算
+
+        Args:
+            now: 当前时间（Unix时间戳）
+            limit: 最多取出几个，None则只受请求预算限制
+
+        Returns:
+            List[WatchCell]: 按到期时间排序的日期组合
+        """
+        available = self._budget.available()
+        if available is not None:
+            limit = available if limit is None else min(limit, available)
+        cells = []
+        while self._heap and self._heap[0][0] <= now and (limit is None or len(cells) < limit):
+            due, _, cell = heapq.heappop(self._heap)
+            if self._due.get(cell) != due:
+                continue
+            # 刷新完成前不会再次到期
+            del self._due[cell]
+            cells.append(cell)
+        self._budget.take(len(cells))
+        return cells
+
+    def reschedule(self, cells: Iterable[WatchCell], now: float, today: date) -> None:
+        """刷新完成后按出发日期重新排队，已经移出窗口的日期组合不再排队"""
+        for cell in cells:
+            if cell in self._window:
+                self._schedule(cell, now + self._policy.interval(cell.depart_date, today))
+
+    def next_wakeup(self, now: float) -> float:
+        """下一次有日期组合可以刷新的时间，同时考虑到期时间和请求预算"""
+        while self._heap and self._due.get(self._heap[0][2]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        if not self._heap:
+            return now + self._policy.max_interval
+        return max(self._heap[0][0], now + self._budget.seconds_until(1))
@@ -0,0 +1,175 @@
+# flight_scraper/core/storage/price_alerts.py
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from flight_scraper.core.data.data_models import Price
+from flight_scraper.core.storage.price_history import PriceHistoryStore
+
+# 价格变化的类型
+NEW_LOW = "new_low"
+DROP = "drop"
+DISAPPEARED = "disappeared"
+
+
+@dataclass(frozen=True)
+class AlertThresholds:
+    """
+    价格提醒的阈值，对应nofity_config.json中的price_alerts
+    """
+    # 降价至少多少（货币单位）才提醒，0表示不按金额判断
+    min_drop_amount: float = 0
+    # 降价至少百分之多少才提醒，0表示不按比例判断
+    min_drop_percent: float = 0
+    # 是否提醒低于历史最低价的价格
+    new_lows: bool = True
+    # 是否提醒上次有结果、这次请求成功但没有航班的日期组合
+    disappeared: bool = True
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> "AlertThresholds":
+        """根据price_alerts配置创建，缺少的项使用默认值"""
+        config = config or {}
+        return cls(
+            min_drop_amount=config.get("min_drop_amount", 0),
+            min_drop_percent=config.get("min_drop_percent", 0),
+            new_lows=config.get("notify_new_lows", True),
+            disappeared=config.get("notify_disappeared", True),
+        )
+
+    def is_significant(self, previous_minor: int, current_minor: int, currency: str) -> bool:
+        """
+        降价是否达到阈值，金额和比例任一达到即可；两者都为0时任何降价都算
+
+        Args:
+            previous_minor: 上次的价格（货币最小单位）
+            current_minor: 这次的价格（货币最小单位）
+            currency: 货币代码
+        """
+        drop = previous_minor - current_minor
+        if drop <= 0:
+            return False
+        if not self.min_drop_amount and not self.min_drop_percent:
+            return True
+        if self.min_drop_amount and drop >= round(self.min_drop_amount * 10 ** Price(0, currency).exponent):
+            return True
+        return bool(self.min_drop_percent) and previous_minor > 0 and \
+            drop * 100 >= self.min_drop_percent * previous_minor
+
+
+@dataclass(frozen=True)
+class PriceChange:
+    """
+    一个日期组合相对该日期组合上次观察的价格变化
+    """
+    kind: str
+    depart_date: str
+    return_date: str
+    currency: str
+    # 这次的最低价，日期组合消失时为None
+    price_minor: Optional[int]
+    # 该日期组合上次被观察时的最低价
+    previous_minor: Optional[int]
+    # 这次运行之前的历史最低价
+    previous_low_minor: Optional[int] = None
+    airline: str = ""
+    # 航线标识
+    route: str = ""
+
+
+def diff_against_previous(store: PriceHistoryStore, route: str, run_id: int,
+                          thresholds: AlertThresholds) -> Optional[List[PriceChange]]:
+    """
+    比较本次运行每个日期组合与该日期组合此前最近一次观察的最低价
+
+    每个日期组合各自和自己上次被观察时比较，而不是和航线的上一次运行比较，
+    常驻监控每轮只刷新一部分日期组合时降价提醒同样有效。
+    只返回值得提醒的变化：低于历史最低价的新低、降价达到阈值的日期组合，以及上次有结果、
+    这次请求成功但没有航班的日期组合
+
+    Args:
+        store: 价格历史库
+        route: 航线标识
+        run_id: 本次运行的run_id（已写入价格历史库）
+        thresholds: 提醒阈值
+
+    Returns:
+        List[PriceChange]: 按类型和价格排序的变化，该航线没有更早的运行可比较时返回None
+    """
+    current_run = store.get_run(run_id)
+    if current_run is None:
+        return None
+    observed_at = current_run["observed_at"]
+    if store.last_run(route, before=observed_at) is None:
+        return None
+
+    changes = []
+    for cell, now in store.cell_minimums(run_id).items():
+        before = store.last_observation(route, cell[0], cell[1], observed_at)
+        if before is None:
+            # 新出现的日期组合不提醒
+            continue
+        low = store.cheapest_in_window(route, cell[0], cell[1], until=before["observed_at"])
+        low_minor = low["price_minor"] if low is not None else None
+        if thresholds.new_lows and low_minor is not None and now["price_minor"] < low_minor:
+            kind = NEW_LOW
+        elif thresholds.is_significant(before["price_minor"], now["price_minor"], now["currency"]):
+            kind = DROP
+        else:
+            continue
+        changes.append(PriceChange(kind, cell[0], cell[1], now["currency"], now["price_minor"],
+                                   before["price_minor"], low_minor, now["airline"] or "", route))
+
+    if thresholds.disappeared:
+        # 只提醒本次确实搜索过但没有航班的日期组合，请求失败或不在本次日期范围内的不算消失
+        for cell in store.empty_cells(run_id):
+            before = store.last_observation(route, cell[0], cell[1], observed_at)
+            if before is None:
+                continue
+            emptied_at = store.last_empty(route, cell[0], cell[1], observed_at)
+            if emptied_at is not None and emptied_at > before["observed_at"]:
+                # 上次观察之后已经没有航班，已经提醒过
+                continue
+            changes.append(PriceChange(DISAPPEARED, cell[0], cell[1], before["currency"], None,
+                                       before["price_minor"], airline=before["airline"] or "", route=route))
+
+    order = {NEW_LOW: 0, DROP: 1, DISAPPEARED: 2}
+    # 消失的日期组合按上次的价格排序
+    changes.sort(key=lambda change: (
+        order[change.kind],
+        change.price_minor if change.price_minor is not None else change.previous_minor,
+        change.depart_date,
+        change.return_date,
+    ))
+    return changes
+
+
+def format_changes(changes: List[PriceChange]) -> str:
+    """
+    把价格变化格式化为通知文本
+
+    Args:
+        changes: diff_against_previous返回的变化
+
+    Returns:
+        str: 每个变化一行
+    """
+    lines = []
+    for change in changes:
+        cell = f"出发日期: {change.depart_date}, 返程日期: {change.return_date}"
+        if change.route:
+            cell = f"航线: {change.route}, {cell}"
+        if change.kind == DISAPPEARED:
+            previous = Price(change.previous_minor, change.currency).total
+            lines.append(f"[无结果] {cell}, 上次价格: {previous} {change.currency}")
+            continue
+        price = Price(change.price_minor, change.currency).total
+        if change.kind == NEW_LOW:
+            low = Price(change.previous_low_minor, change.currency).total
+            lines.append(f"[历史新低] {cell}, 价格: {price} {change.currency}, "
+                         f"此前最低: {low} {change.currency}, 航空公司: {change.airline}")
+        else:
+            previous = Price(change.previous_minor, change.currency).total
+            percent = (change.previous_minor - change.price_minor) * 100 / change.previous_minor
+            lines.append(f"[降价] {cell}, 价格: {price} {change.currency}, "
+                         f"上次: {previous} {change.currency} (-{percent:.1f}%), 航空公司: {change.airline}")
+    return "\n".join(lines)
@@ -0,0 +1,319 @@
+# flight_scraper/core/storage/price_history.py
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+def route_key(search_params: Dict[str, Any]) -> str:
+    """
+    根据搜索参数生成航线标识，例如 "MAD.AIRPORT-SHA.CITY"
+
+    Args:
+        search_params: 搜索参数字典，包含from和to
+
+    Returns:
+        str: 航线标识
+    """
+    origin = str(search_params.get("from") or "").strip().upper()
+    destination = str(search_params.get("to") or "").strip().upper()
+    return f"{origin}-{destination}"
+
+
+class PriceHistoryStore:
+    """
+    基于SQLite的价格历史库
+
+    每次运行观察到的航班批量追加到observations表，按 (航线, 出发日期, 返程日期, 观察时间) 建立覆盖索引，
+    区间最低价和价格走势只扫描索引；每个日期组合的历史最低价另外保存在cell_lows表中，
+    写入时顺带更新，查询历史最低价不需要扫描观察记录。请求成功但没有航班的日期组合记录在empty_cells表中，
+    用来区分"没有航班"和"没有搜索（请求失败或不在本次的日期范围内）"。多线程共享同一个实例是安全的
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: 数据库文件路径，":memory:" 表示内存数据库
+        """
+        self._path = path
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        # WAL模式下读不阻塞写，追加写入也更快
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            "run_id INTEGER PRIMARY KEY AUTOINCREMENT, route TEXT NOT NULL, "
+            "observed_at REAL NOT NULL, offer_count INTEGER NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS idx_runs_route ON runs (route, observed_at);"
+            "CREATE TABLE IF NOT EXISTS observations ("
+            "run_id INTEGER NOT NULL, route TEXT NOT NULL, "
+            "depart_date TEXT NOT NULL, return_date TEXT NOT NULL, observed_at REAL NOT NULL, "
+            "price_minor INTEGER NOT NULL, currency TEXT NOT NULL, airline TEXT, "
+            "outbound_stops INTEGER, inbound_stops INTEGER, fingerprint TEXT);"
+            "CREATE INDEX IF NOT EXISTS idx_observations_cell ON observations "
+            "(route, depart_date, return_date, observed_at, price_minor);"
+            "CREATE INDEX IF NOT EXISTS idx_observations_run ON observations (run_id);"
+            "CREATE TABLE IF NOT EXISTS cell_lows ("
+            "route TEXT NOT NULL, depart_date TEXT NOT NULL, return_date TEXT NOT NULL, "
+            "price_minor INTEGER NOT NULL, currency TEXT NOT NULL, airline TEXT, observed_at REAL NOT NULL, "
+            "PRIMARY KEY (route, depart_date, return_date));"
+            "CREATE TABLE IF NOT EXISTS empty_cells ("
+            "run_id INTEGER NOT NULL, route TEXT NOT NULL, "
+            "depart_date TEXT NOT NULL, return_date TEXT NOT NULL, observed_at REAL NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS idx_empty_cells_run ON empty_cells (run_id);"
+            "CREATE INDEX IF NOT EXISTS idx_empty_cells_cell ON empty_cells "
+            "(route, depart_date, return_date, observed_at);"
+        )
+        self._conn.commit()
+
+    def record_run(self, route: str, rows: Iterable[Dict[str, Any]], observed_at: Optional[float] = None,
+                   empty_cells: Iterable[Tuple[str, str]] = ()) -> int:
+        """
+        在一个事务中批量写入一次运行观察到的航班
+
+        Args:
+            route: 航线标识，见route_key
+            rows: OfferTable的行（offer_row生成的字典）
+            observed_at: 观察时间（Unix时间戳），None则使用当前时间
+            empty_cells: 本次请求成功但没有航班的 (出发日期, 返程日期)
+
+        Returns:
+            int: 本次运行的run_id
+        """
+        if observed_at is None:
+            observed_at = time.time()
+        values = [
+            (route, row["depart_date"], row["return_date"], observed_at, int(row["price_minor"]),
+             row["currency"], row.get("airline") or "", row.get("outbound_stops"), row.get("inbound_stops"),
+             row.get("fingerprint") or None)
+            for row in rows
+        ]
+        empty_cells = list(empty_cells)
+        with self._lock:
+            with self._conn:
+                cursor = self._conn.execute(
+                    "INSERT INTO runs (route, observed_at, offer_count) VALUES (?, ?, ?)",
+                    (route, observed_at, len(values))
+                )
+                run_id = cursor.lastrowid
+                self._conn.executemany(
+                    "INSERT INTO observations (run_id, route, depart_date, return_date, observed_at, price_minor, "
+                    "currency, airline, outbound_stops, inbound_stops, fingerprint) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(run_id,) + value for value in values]
+                )
+                # 只有更低的价格才会替换已有的历史最低价
+                self._conn.executemany(
+                    "INSERT INTO cell_lows (route, depart_date, return_date, price_minor, currency, airline, "
+                    "observed_at) VALUES (?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (route, depart_date, return_date) DO UPDATE SET "
+                    "price_minor = excluded.price_minor, currency = excluded.currency, "
+                    "airline = excluded.airline, observed_at = excluded.observed_at "
+                    "WHERE excluded.price_minor < cell_lows.price_minor",
+                    [value[:3] + value[4:7] + (value[3],) for value in values]
+                )
+                self._conn.executemany(
+                    "INSERT INTO empty_cells (run_id, route, depart_date, return_date, observed_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    [(run_id, route, depart_date, return_date, observed_at) for depart_date, return_date in empty_cells]
+                )
+        logging.info(f"已记录航线 {route} 的 {len(values)} 条价格观察")
+        return run_id
+
+    def cheapest_ever(self, route: str, depart_date: Optional[str] = None,
+                      return_date: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        每个日期组合的历史最低价
+
+        Args:
+            route: 航线标识
+            depart_date: 只查询该出发日期，None则不限
+            return_date: 只查询该返程日期，None则不限
+
+        Returns:
+            List[Dict[str, Any]]: 每个日期组合一条，包含depart_date、return_date、price_minor、currency、
+                                  airline和observed_at，按价格排序
+        """
+        sql = ("SELECT depart_date, return_date, price_minor, currency, airline, observed_at "
+               "FROM cell_lows WHERE route = ?")
+        params = [route]
+        if depart_date is not None:
+            sql += " AND depart_date = ?"
+            params.append(depart_date)
+        if return_date is not None:
+            sql += " AND return_date = ?"
+            params.append(return_date)
+        return self._query(sql + " ORDER BY price_minor, depart_date, return_date", params)
+
+    def cheapest_in_window(self, route: str, depart_date: str, return_date: str,
+                           since: Optional[float] = None, until: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        一个日期组合在观察时间窗口内的最低价
+
+        Args:
+            route: 航线标识
+            depart_date: 出发日期
+            return_date: 返程日期
+            since: 窗口开始时间（Unix时间戳，包含），None则不限
+            until: 窗口结束时间（Unix时间戳，包含），None则不限
+
+        Returns:
+            Dict[str, Any]: 包含price_minor、currency、airline和observed_at，窗口内没有观察时返回None
+        """
+        sql, params = self._cell_filter(route, depart_date, return_date, since, until)
+        rows = self._query(
+            "SELECT price_minor, currency, airline, observed_at FROM observations " + sql +
+            " ORDER BY price_minor, observed_at LIMIT 1", params
+        )
+        return rows[0] if rows else None
+
+    def trend(self, route: str, depart_date: str, return_date: str,
+              since: Optional[float] = None, until: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        一个日期组合每次观察的最低价，按观察时间排序
+
+        Args:
+            route: 航线标识
+            depart_date: 出发日期
+            return_date: 返程日期
+            since: 窗口开始时间（Unix时间戳，包含），None则不限
+            until: 窗口结束时间（Unix时间戳，包含），None则不限
+
+        Returns:
+            List[Dict[str, Any]]: 每次观察一条，包含observed_at、price_minor和offers（该次观察的航班数）
+        """
+        sql, params = self._cell_filter(route, depart_date, return_date, since, until)
+        return self._query(
+            "SELECT observed_at, MIN(price_minor) AS price_minor, COUNT(*) AS offers FROM observations " + sql +
+            " GROUP BY observed_at ORDER BY observed_at", params
+        )
+
+    def last_observation(self, route: str, depart_date: str, return_date: str,
+                         before: float) -> Optional[Dict[str, Any]]:
+        """
+        一个日期组合在before之前最近一次观察的最低价
+
+        与last_run不同，只看这个日期组合自己的观察，不受其他运行覆盖哪些日期组合的影响
+
+        Args:
+            route: 航线标识
+            depart_date: 出发日期
+            return_date: 返程日期
+            before: 只查找早于该时间（Unix时间戳）的观察
+
+        Returns:
+            Dict[str, Any]: 包含observed_at、price_minor、currency和airline，没有更早的观察时返回None
+        """
+        # SQLite中与MIN一起查询的列取自价格最低的那一行
+        rows = self._query(
+            "SELECT observed_at, MIN(price_minor) AS price_minor, currency, airline FROM observations "
+            "WHERE route = ? AND depart_date = ? AND return_date = ? AND observed_at < ? "
+            "GROUP BY observed_at ORDER BY observed_at DESC LIMIT 1",
+            [route, depart_date, return_date, before]
+        )
+        return rows[0] if rows else None
+
+    def last_empty(self, route: str, depart_date: str, return_date: str, before: float) -> Optional[float]:
+        """一个日期组合在before之前最近一次请求成功但没有航班的时间，没有时返回None"""
+        rows = self._query(
+            "SELECT MAX(observed_at) AS observed_at FROM empty_cells "
+            "WHERE route = ? AND depart_date = ? AND return_date = ? AND observed_at < ?",
+            [route, depart_date, return_date, before]
+        )
+        return rows[0]["observed_at"] if rows else None
+
+    def last_run(self, route: str, before: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        航线最近一次运行的记录
+
+        Args:
+            route: 航线标识
+            before: 只查找早于该时间的运行，None则不限
+
+        Returns:
+            Dict[str, Any]: 包含run_id、observed_at和offer_count，没有运行记录时返回None
+        """
+        sql = "SELECT run_id, observed_at, offer_count FROM runs WHERE route = ?"
+        params = [route]
+        if before is not None:
+            sql += " AND observed_at < ?"
+            params.append(before)
+        rows = self._query(sql + " ORDER BY observed_at DESC, run_id DESC LIMIT 1", params)
+        return rows[0] if rows else None
+
+    def get_run(self, run_id: int) -> Optional[Dict[str, Any]]:
+        """指定运行的记录，包含run_id、route、observed_at和offer_count，不存在时返回None"""
+        rows = self._query("SELECT run_id, route, observed_at, offer_count FROM runs WHERE run_id = ?", [run_id])
+        return rows[0] if rows else None
+
+    def cell_minimums(self, run_id: int) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """
+        一次运行中每个日期组合的最低价
+
+        Args:
+            run_id: 运行的run_id
+
+        Returns:
+            Dict[Tuple[str, str], Dict[str, Any]]: 键为 (出发日期, 返程日期)，值包含price_minor、currency和airline
+        """
+        # SQLite中与MIN一起查询的列取自价格最低的那一行
+        rows = self._query(
+            "SELECT depart_date, return_date, MIN(price_minor) AS price_minor, currency, airline "
+            "FROM observations WHERE run_id = ? GROUP BY depart_date, return_date", [run_id]
+        )
+        return {(row.pop("depart_date"), row.pop("return_date")): row for row in rows}
+
+    def empty_cells(self, run_id: int) -> List[Tuple[str, str]]:
+        """一次运行中请求成功但没有航班的 (出发日期, 返程日期)"""
+        rows = self._query(
+            "SELECT depart_date, return_date FROM empty_cells WHERE run_id = ? ORDER BY depart_date, return_date",
+            [run_id]
+        )
+        return [(row["depart_date"], row["return_date"]) for row in rows]
+
+    def run_offers(self, run_id: int) -> List[Dict[str, Any]]:
+        """一次运行写入的所有观察，按价格排序"""
+        return self._query(
+            "SELECT depart_date, return_date, price_minor, currency, airline, outbound_stops, inbound_stops, "
+            "fingerprint FROM observations WHERE run_id = ? ORDER BY price_minor", [run_id]
+        )
+
+    @staticmethod
+    def _cell_filter(route, depart_date, return_date, since, until):
+        """日期组合和观察时间窗口的WHERE条件，与idx_observations_cell的列顺序一致"""
+        sql = "WHERE route = ? AND depart_date = ? AND return_date = ?"
+        params = [route, depart_date, return_date]
+        if since is not None:
+            sql += " AND observed_at >= ?"
+            params.append(since)
+        if until is not None:
+            sql += " AND observed_at <= ?"
+            params.append(until)
+        return sql, params
+
+    def _query(self, sql, params):
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params).fetchall()]
+
+    def __len__(self):
+        """观察记录总数"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM observations").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
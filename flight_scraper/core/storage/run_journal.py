@@ -0,0 +1,154 @@
+# flight_scraper/core/storage/run_journal.py
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# 日期组合的状态
+CELL_DONE = "done"
+CELL_FAILED = "failed"
+
+
+def new_run_id() -> str:
+    """生成运行ID，例如 "20250701-153012-1a2b3c"，按时间排序且便于在命令行输入"""
+    return f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+
+class RunJournal:
+    """
+    多日期运行的检查点日志
+
+    运行开始时记录所有日期组合和影响结果的设置，每个日期组合完成（或失败）时立即写入该日期保留的航班，
+    进程崩溃或被终止后可以按运行ID继续：已完成的日期组合直接从日志读取，只重新请求缺失和失败的日期组合。
+    每次写入单独提交，WAL模式下进程被终止不会丢失已提交的日期组合
+    """
+
+    def __init__(self, path: str, keep_days: float = 7):
+        """
+        Args:
+            path: 数据库文件路径，":memory:" 表示内存数据库
+            keep_days: 运行记录保留的天数，打开日志时删除更早的运行，<=0表示一直保留
+        """
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            "run_id TEXT PRIMARY KEY, created_at REAL NOT NULL, cells TEXT NOT NULL, settings TEXT NOT NULL, "
+            "completed_at REAL);"
+            "CREATE TABLE IF NOT EXISTS cells ("
+            "run_id TEXT NOT NULL, cell_index INTEGER NOT NULL, state TEXT NOT NULL, rows TEXT, "
+            "updated_at REAL NOT NULL, PRIMARY KEY (run_id, cell_index));"
+        )
+        if keep_days > 0:
+            self.prune(time.time() - keep_days * 86400)
+
+    def start_run(self, run_id: str, cells: Sequence[Tuple[str, str, str]], settings: Dict[str, Any],
+                  created_at: Optional[float] = None) -> None:
+        """
+        记录一次新的运行
+
+        Args:
+            run_id: 运行ID
+            cells: 按序号排列的 (航线, 出发日期, 返程日期)
+            settings: 影响结果的设置，继续运行时使用同样的设置
+            created_at: 运行开始的时间（Unix时间戳），None则使用当前时间
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO runs (run_id, created_at, cells, settings) VALUES (?, ?, ?, ?)",
+                (run_id, created_at if created_at is not None else time.time(),
+                 json.dumps([list(cell) for cell in cells]), json.dumps(settings))
+            )
+
+    def load_run(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """
+        读取一次运行
+
+        Returns:
+            Dict: 包含run_id、created_at、cells、settings和completed_at，不存在时返回None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT created_at, cells, settings, completed_at FROM runs WHERE run_id = ?", (run_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "run_id": run_id,
+            "created_at": row[0],
+            "cells": [tuple(cell) for cell in json.loads(row[1])],
+            "settings": json.loads(row[2]),
+            "completed_at": row[3],
+        }
+
+    def record_cell(self, run_id: str, cell_index: int, rows: Optional[List[Dict[str, Any]]]) -> None:
+        """
+        记录一个日期组合的结果
+
+        Args:
+            run_id: 运行ID
+            cell_index: 日期组合的序号
+            rows: 该日期组合保留的航班，None表示失败，继续运行时会重新请求
+        """
+        state = CELL_FAILED if rows is None else CELL_DONE
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cells (run_id, cell_index, state, rows, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (run_id, cell_index, state, None if rows is None else json.dumps(rows), time.time())
+            )
+
+    def completed_cells(self, run_id: str) -> Dict[int, List[Dict[str, Any]]]:
+        """已完成的日期组合，键为序号，值为该日期组合保留的航班"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT cell_index, rows FROM cells WHERE run_id = ? AND state = ? ORDER BY cell_index",
+                (run_id, CELL_DONE)
+            ).fetchall()
+        return {index: json.loads(cell_rows) for index, cell_rows in rows}
+
+    def failed_cells(self, run_id: str) -> List[int]:
+        """失败的日期组合的序号"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT cell_index FROM cells WHERE run_id = ? AND state = ? ORDER BY cell_index",
+                (run_id, CELL_FAILED)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def finish_run(self, run_id: str) -> None:
+        """标记运行已结束"""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE runs SET completed_at = ? WHERE run_id = ?", (time.time(), run_id))
+
+    def prune(self, before: float) -> int:
+        """
+        删除before之前开始的运行
+
+        Returns:
+            int: 删除的运行数
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM cells WHERE run_id IN (SELECT run_id FROM runs WHERE created_at < ?)", (before,)
+            )
+            return self._conn.execute("DELETE FROM runs WHERE created_at < ?", (before,)).rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,267 @@
+# flight_scraper/core/storage/work_queue.py
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# 任务状态
+QUEUED = "queued"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+
+@dataclass(frozen=True)
+class Job:
+    """
+    从队列中租用的一个任务
+    """
+    job_id: int
+    batch_id: str
+    payload: Dict[str, Any]
+    # 包括本次在内已经尝试的次数
+    attempts: int
+    # 本次租约的标识，租约过期被其他worker取走后旧的标识失效
+    lease_token: str
+
+
+class WorkQueue(ABC):
+    """
+    工作队列的接口
+
+    协调者把一批任务提交到队列，worker租用任务，完成后ack并写回结果，失败时fail；
+    租约过期仍未ack的任务会重新排队，超过最大尝试次数的任务标记为失败。
+    目前只有基于SQLite文件的实现SqliteWorkQueue，适用于同一台机器上的多个worker进程
+    """
+
+    @abstractmethod
+    def submit(self, batch_id: str, payloads: Iterable[Dict[str, Any]]) -> int:
+        """
+        提交一批任务
+
+        Args:
+            batch_id: 批次标识
+            payloads: 每个任务的参数，必须可以序列化为JSON
+
+        Returns:
+            int: 提交的任务数
+        """
+        pass
+
+    @abstractmethod
+    def lease(self, worker_id: str) -> Optional[Job]:
+        """
+        租用一个可以执行的任务
+
+        Args:
+            worker_id: worker标识，只用于记录
+
+        Returns:
+            Job: 租用的任务，没有可以执行的任务时返回None
+        """
+        pass
+
+    @abstractmethod
+    def extend(self, job: Job) -> bool:
+        """延长租约，租约已经失效时返回False"""
+        pass
+
+    @abstractmethod
+    def ack(self, job: Job, result: Any) -> bool:
+        """
+        确认任务完成并写回结果
+
+        Returns:
+            bool: 租约已经失效（任务被其他worker取走）时返回False，结果被丢弃
+        """
+        pass
+
+    @abstractmethod
+    def fail(self, job: Job, error: str) -> None:
+        """任务失败，未超过最大尝试次数时延迟后重新排队"""
+        pass
+
+    @abstractmethod
+    def results(self, batch_id: str) -> List[Tuple[Dict[str, Any], Any]]:
+        """一个批次中已完成任务的 (参数, 结果)，按提交顺序排列"""
+        pass
+
+    @abstractmethod
+    def failures(self, batch_id: str) -> List[Tuple[Dict[str, Any], str]]:
+        """一个批次中最终失败的任务的 (参数, 错误信息)"""
+        pass
+
+    @abstractmethod
+    def counts(self, batch_id: Optional[str] = None) -> Dict[str, int]:
+        """各状态的任务数，batch_id为None时统计所有批次"""
+        pass
+
+    def pending(self, batch_id: Optional[str] = None) -> int:
+        """排队中和执行中的任务数"""
+        counts = self.counts(batch_id)
+        return counts.get(QUEUED, 0) + counts.get(LEASED, 0)
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class SqliteWorkQueue(WorkQueue):
+    """
+    基于SQLite的工作队列
+
+    同一台机器上的多个进程各自打开同一个数据库文件即可共享队列，租用任务在写事务中完成，
+    同一个任务不会同时租给两个worker。失败的任务按指数退避延迟后重新排队
+    """
+
+    def __init__(self, path: str, lease_seconds: float = 300, max_attempts: int = 3, retry_delay: float = 30,
+                 clock: Callable[[], float] = time.time):
+        """
+        Args:
+            path: 数据库文件路径
+            lease_seconds: 租约时长（秒），超过后未ack的任务重新排队
+            max_attempts: 每个任务最多尝试几次
+            retry_delay: 第一次重试前等待的秒数，之后每次加倍
+            clock: 时钟函数，测试时可以替换
+        """
+        self._lease_seconds = lease_seconds
+        self._max_attempts = max(1, max_attempts)
+        self._retry_delay = retry_delay
+        self._clock = clock
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # 自动提交模式，事务由BEGIN IMMEDIATE显式控制，多个进程同时写时等待而不是报错
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "job_id INTEGER PRIMARY KEY AUTOINCREMENT, batch_id TEXT NOT NULL, seq INTEGER NOT NULL, "
+            "payload TEXT NOT NULL, state TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, "
+            "available_at REAL NOT NULL, lease_owner TEXT, lease_token TEXT, lease_expires REAL, "
+            "error TEXT, result TEXT);"
+            "CREATE INDEX IF NOT EXISTS idx_jobs_ready ON jobs (state, available_at);"
+            "CREATE INDEX IF NOT EXISTS idx_jobs_batch ON jobs (batch_id, state);"
+        )
+
+    def _transaction(self, work):
+        """在写事务中执行work(cursor)"""
+        with self._lock:
+            cursor = self._conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                result = work(cursor)
+            except BaseException:
+                cursor.execute("ROLLBACK")
+                raise
+            cursor.execute("COMMIT")
+            return result
+
+    def submit(self, batch_id: str, payloads: Iterable[Dict[str, Any]]) -> int:
+        now = self._clock()
+        rows = [(batch_id, seq, json.dumps(payload), QUEUED, now) for seq, payload in enumerate(payloads)]
+        self._transaction(lambda cursor: cursor.executemany(
+            "INSERT INTO jobs (batch_id, seq, payload, state, available_at) VALUES (?, ?, ?, ?, ?)", rows
+        ))
+        return len(rows)
+
+    def lease(self, worker_id: str) -> Optional[Job]:
+        now = self._clock()
+
+        def work(cursor):
+            # 回收过期的租约
+            cursor.execute(
+                "UPDATE jobs SET state = CASE WHEN attempts >= ? THEN ? ELSE ? END, "
+                "error = '租约过期', lease_token = NULL, available_at = ? "
+                "WHERE state = ? AND lease_expires <= ?",
+                (self._max_attempts, FAILED, QUEUED, now, LEASED, now)
+            )
+            row = cursor.execute(
+                "SELECT job_id, batch_id, payload, attempts FROM jobs "
+                "WHERE state = ? AND available_at <= ? ORDER BY available_at, job_id LIMIT 1",
+                (QUEUED, now)
+            ).fetchone()
+            if row is None:
+                return None
+            token = uuid.uuid4().hex
+            cursor.execute(
+                "UPDATE jobs SET state = ?, attempts = attempts + 1, lease_owner = ?, lease_token = ?, "
+                "lease_expires = ? WHERE job_id = ?",
+                (LEASED, worker_id, token, now + self._lease_seconds, row[0])
+            )
+            return Job(row[0], row[1], json.loads(row[2]), row[3] + 1, token)
+
+        return self._transaction(work)
+
+    def extend(self, job: Job) -> bool:
+        updated = self._transaction(lambda c: c.execute(
+            "UPDATE jobs SET lease_expires = ? WHERE job_id = ? AND state = ? AND lease_token = ?",
+            (self._clock() + self._lease_seconds, job.job_id, LEASED, job.lease_token)
+        ).rowcount)
+        return updated == 1
+
+    def ack(self, job: Job, result: Any) -> bool:
+        updated = self._transaction(lambda c: c.execute(
+            "UPDATE jobs SET state = ?, result = ?, error = NULL, lease_token = NULL "
+            "WHERE job_id = ? AND state = ? AND lease_token = ?",
+            (DONE, json.dumps(result), job.job_id, LEASED, job.lease_token)
+        ).rowcount)
+        return updated == 1
+
+    def fail(self, job: Job, error: str) -> None:
+        now = self._clock()
+        if job.attempts >= self._max_attempts:
+            state, available_at = FAILED, now
+        else:
+            state, available_at = QUEUED, now + self._retry_delay * (2 ** (job.attempts - 1))
+        self._transaction(lambda c: c.execute(
+            "UPDATE jobs SET state = ?, available_at = ?, error = ?, lease_token = NULL "
+            "WHERE job_id = ? AND state = ? AND lease_token = ?",
+            (state, available_at, error, job.job_id, LEASED, job.lease_token)
+        ))
+
+    def results(self, batch_id: str) -> List[Tuple[Dict[str, Any], Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT payload, result FROM jobs WHERE batch_id = ? AND state = ? ORDER BY seq",
+                (batch_id, DONE)
+            ).fetchall()
+        return [(json.loads(payload), json.loads(result)) for payload, result in rows]
+
+    def failures(self, batch_id: str) -> List[Tuple[Dict[str, Any], str]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT payload, error FROM jobs WHERE batch_id = ? AND state = ? ORDER BY seq",
+                (batch_id, FAILED)
+            ).fetchall()
+        return [(json.loads(payload), error or "") for payload, error in rows]
+
+    def counts(self, batch_id: Optional[str] = None) -> Dict[str, int]:
+        now = self._clock()
+        # 已过期的租约在下次lease时才回收，这里按回收后的状态统计
+        state = ("CASE WHEN state = ? AND lease_expires <= ? THEN "
+                 "(CASE WHEN attempts >= ? THEN ? ELSE ? END) ELSE state END")
+        params = [LEASED, now, self._max_attempts, FAILED, QUEUED]
+        sql = f"SELECT {state} AS current, COUNT(*) FROM jobs"
+        if batch_id is not None:
+            sql += " WHERE batch_id = ?"
+            params.append(batch_id)
+        sql += " GROUP BY current"
+        with self._lock:
+            return dict(self._conn.execute(sql, params).fetchall())
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
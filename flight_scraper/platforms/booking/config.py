@@ -24,6 +24,20 @@ class BookingConfig(PlatformConfig):
         self._api_url = booking_config.get("api_url")
         self._search_params = booking_config.get("booking_search_condition")
         self._proxies_config = booking_config.get("proxies")
+        self._concurrency_config = booking_config.get("concurrency", {})
+        self._http_config = booking_config.get("http", {})
+        self._debug_config = booking_config.get("debug", {})
+        self._cache_config = booking_config.get("cache", {})
+        self._adaptive_config = booking_config.get("adaptive", {})
+        self._proxy_pool_config = booking_config.get("proxy_pool", {})
+        self._retry_config = booking_config.get("retry", {})
+        self._processing_config = booking_config.get("processing", {})
+        self._results_config = booking_config.get("results", {})
+        self._history_config = booking_config.get("history", {})
+        self._daemon_config = booking_config.get("daemon", {})
+        self._routes_config = booking_config.get("routes") or []
+        self._queue_config = booking_config.get("queue", {})
+        self._checkpoint_config = booking_config.get("checkpoint", {})
 
     def get_api_url(self):
         """
@@ -49,6 +63,193 @@ class BookingConfig(PlatformConfig):
         """
         return self._proxies_config
 
+    def get_routes(self):
+        """
+        获取要搜索的航线列表
+
+        routes中的每一项（例如 {"from": "MAD.AIRPORT", "to": "PEK.AIRPORT"}）覆盖booking_search_condition中的同名字段，
+        未配置routes时只搜索booking_search_condition本身
+
+        :return: 每条航线完整的搜索条件列表
+        """
+        base = self._search_params or {}
+        if not self._routes_config:
+            return [dict(base)]
+        return [dict(base, **route) for route in self._routes_config]
+
+    def get_concurrency_config(self):
+        """
+        获取并发配置
+
+        :return: 包含max_workers和requests_per_second的字典
+        """
+        return {
+            "max_workers": self._concurrency_config.get("max_workers", 1),
+            "requests_per_second": self._concurrency_config.get("requests_per_second", 0.2),
+        }
+
+    def get_http_config(self):
+        """
+        获取HTTP连接配置
+
+        :return: 包含connect_timeout、read_timeout和verify_ssl的字典
+        """
+        return {
+            "connect_timeout": self._http_config.get("connect_timeout", 5),
+            "read_timeout": self._http_config.get("read_timeout", 30),
+            "verify_ssl": self._http_config.get("verify_ssl", False),
+        }
+
+    def get_debug_config(self):
+        """
+        获取调试配置
+
+        :return: 包含archive_responses和archive_dir的字典
+        """
+        return {
+            "archive_responses": self._debug_config.get("archive_responses", False),
+            "archive_dir": self._debug_config.get("archive_dir", os.path.join("output", "raw_responses")),
+        }
+
+    def get_cache_config(self):
+        """
+        获取响应缓存配置
+
+        :return: 包含enable、path、ttl_seconds和max_entries的字典
+        """
+        return {
+            "enable": self._cache_config.get("enable", False),
+            "path": self._cache_config.get("path", os.path.join("output", "cache", "booking_responses.db")),
+            "ttl_seconds": self._cache_config.get("ttl_seconds", 21600),
+            "max_entries": self._cache_config.get("max_entries", 5000),
+        }
+
+    def get_adaptive_config(self):
+        """
+        获取自适应并发控制和熔断配置
+
+        :return: 自适应控制参数字典
+        """
+        return {
+            "enable": self._adaptive_config.get("enable", False),
+            "min_concurrency": self._adaptive_config.get("min_concurrency", 1),
+            "failure_threshold": self._adaptive_config.get("failure_threshold", 5),
+            "cooldown_seconds": self._adaptive_config.get("cooldown_seconds", 30),
+            "max_cooldown_seconds": self._adaptive_config.get("max_cooldown_seconds", 300),
+            "max_trips": self._adaptive_config.get("max_trips", 3),
+            "latency_factor": self._adaptive_config.get("latency_factor", 3.0),
+        }
+
+    def get_proxy_pool_config(self):
+        """
+        获取代理池配置
+
+        :return: 代理池参数字典
+        """
+        return {
+            "enable": self._proxy_pool_config.get("enable", False),
+            "check_url": self._proxy_pool_config.get("check_url", "https://httpbin.org/ip"),
+            "check_timeout": self._proxy_pool_config.get("check_timeout", 5),
+            "max_failures": self._proxy_pool_config.get("max_failures", 3),
+            "reprobe_seconds": self._proxy_pool_config.get("reprobe_seconds", 120),
+            "allow_direct": self._proxy_pool_config.get("allow_direct", True),
+        }
+
+    def get_retry_config(self):
+        """
+        获取重试和对冲请求配置
+
+        :return: 包含max_attempts、base_delay、max_delay、hedge和hedge_percentile的字典
+        """
+        return {
+            "max_attempts": self._retry_config.get("max_attempts", 3),
+            "base_delay": self._retry_config.get("base_delay", 1.0),
+            "max_delay": self._retry_config.get("max_delay", 30.0),
+            "hedge": self._retry_config.get("hedge", False),
+            "hedge_percentile": self._retry_config.get("hedge_percentile", 95),
+        }
+
+    def get_processing_config(self):
+        """
+        获取响应处理配置
+
+        :return: 包含stream_decode、workers和min_pool_tasks的字典，workers<=0表示在当前进程处理
+        """
+        return {
+            "stream_decode": self._processing_config.get("stream_decode", False),
+            "workers": self._processing_config.get("workers", 0),
+            "min_pool_tasks": self._processing_config.get("min_pool_tasks", 20),
+        }
+
+    def get_results_config(self):
+        """
+        获取结果保留配置
+
+        :return: 包含per_date_depth、top_k和dedupe的字典，top_k<=0表示保留全部，
+                 dedupe为True时行程相同的航班只保留最便宜的一个
+        """
+        return {
+            "per_date_depth": self._results_config.get("per_date_depth", 5),
+            "top_k": self._results_config.get("top_k", 0),
+            "dedupe": self._results_config.get("dedupe", False),
+        }
+
+    def get_history_config(self):
+        """
+        获取价格历史库配置
+
+        :return: 包含enable和path的字典
+        """
+        return {
+            "enable": self._history_config.get("enable", False),
+            "path": self._history_config.get("path", os.path.join("output", "history", "price_history.db")),
+        }
+
+    def get_checkpoint_config(self):
+        """
+        获取检查点日志配置
+
+        :return: 包含enable、path和keep_days的字典
+        """
+        return {
+            "enable": self._checkpoint_config.get("enable", False),
+            "path": self._checkpoint_config.get("path", os.path.join("output", "checkpoints", "run_journal.db")),
+            "keep_days": self._checkpoint_config.get("keep_days", 7),
+        }
+
+    def get_daemon_config(self):
+        """
+        获取监控进程配置
+
+        :return: 包含请求预算、刷新间隔和监控列表的字典
+        """
+        return {
+            "requests_per_hour": self._daemon_config.get("requests_per_hour", 600),
+            "burst": self._daemon_config.get("burst", 20),
+            "min_refresh_minutes": self._daemon_config.get("min_refresh_minutes", 30),
+            "max_refresh_hours": self._daemon_config.get("max_refresh_hours", 24),
+            "near_days": self._daemon_config.get("near_days", 14),
+            "far_days": self._daemon_config.get("far_days", 120),
+            "batch_size": self._daemon_config.get("batch_size", 20),
+            "watchlist": self._daemon_config.get("watchlist", []),
+        }
+
+    def get_queue_config(self):
+        """
+        获取分布式工作队列配置
+
+        :return: 包含backend、path、租约时长、最大尝试次数、重试延迟、轮询间隔和worker空闲等待时间的字典
+        """
+        return {
+            "backend": self._queue_config.get("backend", "sqlite"),
+            "path": self._queue_config.get("path", os.path.join("output", "queue", "work_queue.db")),
+            "lease_seconds": self._queue_config.get("lease_seconds", 300),
+            "max_attempts": self._queue_config.get("max_attempts", 3),
+            "retry_delay": self._queue_config.get("retry_delay", 30),
+            "poll_interval": self._queue_config.get("poll_interval", 5),
+            "worker_idle_seconds": self._queue_config.get("worker_idle_seconds", 60),
+        }
+
 
 if __name__ == "__main__":
     # 从文件加载配置
@@ -3,9 +3,11 @@ import os
 import sys
 import json
 import logging
+import time
+import uuid
 from datetime import datetime, timedelta
-import copy
-from typing import List, Dict, Any, Tuple, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Iterable, Tuple, Optional
 
 from flight_scraper.core.factory.factory import ScraperFactory
 
@@ -17,17 +19,48 @@ sys.path.append(project_root)
 
 from flight_scraper.platforms.booking.scraper import BookingScraper
 from flight_scraper.platforms.booking.config import BookingConfig
+from flight_scraper.core.http.adaptive import CircuitOpenError
+from flight_scraper.core.data.offer_table import OfferTable, offer_rows
+from flight_scraper.core.data.exporters import export_table
+from flight_scraper.core.data.data_models import Price
+from flight_scraper.core.data.fingerprint import FingerprintIndex
+from flight_scraper.core.storage.price_history import route_key
+from flight_scraper.core.storage.price_alerts import AlertThresholds, PriceChange, diff_against_previous
+from flight_scraper.core.storage.work_queue import WorkQueue
+from flight_scraper.core.storage.run_journal import new_run_id
+from flight_scraper.core.data.top_k import TopKCollector
+from flight_scraper.core.data.processor.process_pool import OfferProcessPool
 
 
 class MultiDateBookingScraper:
     """支持多日期爬取的Booking航班爬虫"""
 
-    def __init__(self, platform_config):
+    def __init__(self, platform_config, max_workers: Optional[int] = None,
+                 requests_per_second: Optional[float] = None, session=None,
+                 use_cache: bool = True, refresh_cache: bool = False,
+                 per_date_depth: Optional[int] = None, top_k: Optional[int] = None,
+                 process_workers: Optional[int] = None, dedupe: Optional[bool] = None,
+                 record_history: bool = True, cache=None, routes: Optional[List[Dict[str, Any]]] = None,
+                 checkpoint: bool = True):
         """
         初始化多日期爬虫
 
         Args:
             platform_config: BookingConfig实例或原始配置数据
+            max_workers: 同时进行的最大请求数，None则使用配置中的值
+            requests_per_second: 每个主机每秒允许的请求数，None则使用配置中的值
+            session: 外部管理的HttpSession，None则每次运行创建并关闭自己的会话
+            use_cache: 是否使用响应缓存（还需配置中启用cache）
+            refresh_cache: 为True时忽略已有缓存重新请求，并刷新缓存
+            per_date_depth: 每个日期组合保留最便宜的几个航班，None则使用配置中的值
+            top_k: 整次运行保留最便宜的几个航班，<=0表示全部保留，None则使用配置中的值
+            process_workers: 解码和处理响应的进程数，<=0表示在当前进程处理，None则使用配置中的值
+            dedupe: 是否把行程相同的航班合并为最便宜的一个，None则使用配置中的值
+            record_history: 是否把观察到的航班写入价格历史库（还需配置中启用history）
+            cache: 外部管理的ResponseCache，None则按use_cache每次运行创建并关闭自己的缓存
+            routes: 要搜索的航线，每项覆盖booking_search_condition中的同名字段（例如from和to），
+                None则使用配置中的routes；所有航线的日期组合共用同一个线程池、会话和限速器
+            checkpoint: 是否把每个日期组合的结果写入检查点日志（还需配置中启用checkpoint），见resume
         """
         # 检查传入的是 BookingConfig 实例还是配置字典
         if hasattr(platform_config, 'get_api_url') and callable(platform_config.get_api_url):
@@ -48,8 +81,53 @@ class MultiDateBookingScraper:
                 from flight_scraper.platforms.booking.config import BookingConfig
                 self._original_config = BookingConfig(booking_config)
 
-        self._results = []
+        self._results = OfferTable()
+        self._route_results: Dict[str, OfferTable] = {}
         self._date_configs = []
+        # 每个日期组合所属的航线，与_date_configs一一对应
+        self._date_routes: List[str] = []
+
+        # 航线标识 -> 该航线的搜索条件，重复的航线只保留一个
+        if routes is None:
+            search_conditions = self._original_config.get_routes()
+        else:
+            base = self._original_config.get_search_params() or {}
+            search_conditions = [dict(base, **route) for route in routes]
+        self._routes: Dict[str, Dict[str, Any]] = {}
+        for condition in search_conditions:
+            self._routes.setdefault(route_key(condition), condition)
+        if not self._routes:
+            raise ValueError("航线列表为空")
+        self._route = next(iter(self._routes))
+        self._history_run_ids: Dict[str, int] = {}
+        self._observed_at = None
+        self._checkpoint = checkpoint
+        # 检查点日志中的运行ID，resume设置后scrape_all_dates继续该运行
+        self._run_id = None
+        self._resume_run_id = None
+
+        # 并发设置，命令行参数优先于配置文件
+        concurrency = self._original_config.get_concurrency_config()
+        self._max_workers = max(1, max_workers or concurrency["max_workers"])
+        if requests_per_second is None:
+            requests_per_second = concurrency["requests_per_second"]
+        self._requests_per_second = requests_per_second
+        self._session = session
+        self._use_cache = use_cache
+        self._refresh_cache = refresh_cache
+        self._cache = cache
+        self._record_history = record_history
+
+        # 结果保留设置，参数优先于配置文件
+        results_config = self._original_config.get_results_config()
+        self._per_date_depth = max(1, per_date_depth or results_config["per_date_depth"])
+        self._top_k = results_config["top_k"] if top_k is None else top_k
+        self._dedupe = results_config["dedupe"] if dedupe is None else dedupe
+
+        # 进程池设置，参数优先于配置文件
+        self._processing_config = dict(self._original_config.get_processing_config())
+        if process_workers is not None:
+            self._processing_config["workers"] = process_workers
 
     def generate_date_range(self, start_date_str: str, days_range: int = 1,
                             return_days: int = 36) -> List[Tuple[str, str]]:
@@ -78,111 +156,560 @@ class MultiDateBookingScraper:
 
         return date_pairs
 
+    def generate_date_grid(self, start_date_str: str, days_range: int = 1,
+                           min_return_days: int = 36, max_return_days: Optional[int] = None) -> List[Tuple[str, str]]:
+        """
+        生成出发日期 × 停留天数的二维日期网格
+
+        Args:
+            start_date_str: 开始日期，格式为 YYYY-MM-DD
+            days_range: 出发日期范围天数，默认为1天
+            min_return_days: 最短停留天数，默认为36天
+            max_return_days: 最长停留天数（包含），None则与最短停留天数相同
+
+        Returns:
+            去重后的 (depart_date, return_date) 列表，按出发日期、停留天数排序
+        """
+        if max_return_days is None or max_return_days < min_return_days:
+            max_return_days = min_return_days
+
+        date_pairs = []
+        for return_days in range(min_return_days, max_return_days + 1):
+            date_pairs.extend(self.generate_date_range(start_date_str, days_range, return_days))
+
+        # 去重并保持出发日期优先的顺序
+        return sorted(set(date_pairs))
+
     def prepare_date_configs(self, date_pairs: List[Tuple[str, str]]) -> None:
         """
-        为每个日期对准备配置
+        为每条航线的每个日期对准备配置，重复的日期对只保留一个
+
+        日期组合按出发日期优先排列，各航线的请求在整个运行期间交替进行
 
         Args:
             date_pairs: 出发和返程日期对的列表
         """
+        self.prepare_cells((route, depart_date, return_date)
+                           for depart_date, return_date in date_pairs for route in self._routes)
+
+    def prepare_cells(self, cells: Iterable[Tuple[str, str, str]]) -> None:
+        """
+        为指定的 (航线, 出发日期, 返程日期) 准备配置，重复的只保留一个
+
+        Args:
+            cells: (航线标识, 出发日期, 返程日期) 的可迭代对象，航线标识见route_key
+
+        Raises:
+            ValueError: 航线不在本爬虫的航线列表中
+        """
         self._date_configs = []
+        self._date_routes = []
+
+        # 只复制需要修改的搜索条件，其余配置在各日期之间共享（只读）
+        original_data = self._original_config._config_data
 
-        # 获取原始搜索参数
-        original_params = self._original_config.get_search_params()
+        seen = set()
+        for route, depart_date, return_date in cells:
+            if (route, depart_date, return_date) in seen:
+                continue
+            seen.add((route, depart_date, return_date))
+            if route not in self._routes:
+                raise ValueError(f"未配置的航线: {route}")
 
-        for depart_date, return_date in date_pairs:
             # 创建新的配置副本
-            config_copy = copy.deepcopy(self._original_config._config_data)
+            config_copy = dict(original_data)
+            config_copy["booking"] = dict(original_data["booking"])
 
-            # 更新日期
-            config_copy["booking"]["booking_search_condition"]["depart"] = depart_date
-            config_copy["booking"]["booking_search_condition"]["return"] = return_date
+            # 更新航线和日期
+            search_condition = dict(self._routes[route])
+            search_condition["depart"] = depart_date
+            search_condition["return"] = return_date
+            config_copy["booking"]["booking_search_condition"] = search_condition
 
             # 保存修改后的配置
             self._date_configs.append(config_copy)
+            self._date_routes.append(route)
+
+    def scrape_all_dates(self) -> OfferTable:
+        """
+        爬取所有航线和日期的航班信息
+
+        所有航线的日期组合放进同一个任务列表，max_workers大于1时使用线程池并发请求，
+        请求间隔由共享会话中的同一个RateLimiter控制。
+        每个日期完成时结果立即合并进整次运行和所属航线的TopKCollector，各自只保留最便宜的top_k个航班；
+        价格相同时按日期和航班序号排序，结果与逐个爬取时完全一致。
+        开启去重时，行程相同的航班在收集器中按行程指纹分组，只保留最便宜的一个，
+        所有副本的数量和价格范围记录在FingerprintIndex中
+
+        Returns:
+            OfferTable: 最便宜的航班，按价格排序
+        """
+        collector = TopKCollector(self._top_k)
+        route_collectors = {route: TopKCollector(self._top_k) for route in self._routes}
+        fingerprints = FingerprintIndex() if self._dedupe else None
+        # 每个日期保留的航班和没有航班的日期组合都按航线写入价格历史，不受top_k影响
+        observed = self._new_observed()
+        observed_at = time.time()
+
+        # 已完成的日期组合从检查点日志读取，不再请求
+        journal, completed, observed_at, history_recorded = self._open_journal(observed_at)
+        self._observed_at = observed_at
+        # 已经结束的运行在结束时写入过这些日期组合的价格历史，只合并结果，不再重复写入
+        replayed = self._new_observed() if history_recorded else observed
+        for index, rows in completed.items():
+            self._merge(index, rows, collector, route_collectors, fingerprints, replayed)
+
+        # 本次运行的所有请求共享同一个会话（连接池和限速器）
+        session = self._session
+        if session is None:
+            session = ScraperFactory.create_session(
+                "booking", self._original_config._config_data,
+                max_workers=self._max_workers,
+                requests_per_second=self._requests_per_second
+            )
+        cache = self._cache
+        if cache is None and self._use_cache:
+            cache = ScraperFactory.create_cache(
+                "booking", self._original_config._config_data, refresh=self._refresh_cache
+            )
+        pool = None
+        try:
+            remaining = [i for i in range(len(self._date_configs)) if i not in completed]
+            # 配置了进程池且日期组合足够多时，响应在子进程中解码和处理
+            pool = OfferProcessPool.create(self._processing_config, len(remaining))
+            tasks = [(i, self._date_configs[i], session, cache, pool) for i in remaining]
+
+            def merge(index, rows):
+                if journal is not None:
+                    journal.record_cell(self._run_id, index, rows)
+                self._merge(index, rows, collector, route_collectors, fingerprints, observed)
+
+            if self._max_workers <= 1 or len(tasks) <= 1:
+                for task in tasks:
+                    merge(task[0], self._scrape_single_date(task))
+            else:
+                logging.info(f"使用 {self._max_workers} 个线程并发爬取 {len(tasks)} 个日期组合")
+                with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+                    futures = {executor.submit(self._scrape_single_date, task): task[0] for task in tasks}
+                    # 哪个日期先完成就先合并
+                    for future in as_completed(futures):
+                        merge(futures[future], future.result())
+            if journal is not None:
+                journal.finish_run(self._run_id)
+        finally:
+            if pool is not None:
+                pool.close()
+            if session is not self._session:
+                session.close()
+            if cache is not None and cache is not self._cache:
+                cache.close()
+            if journal is not None:
+                journal.close()
+
+        return self._finish(collector, route_collectors, fingerprints, observed, observed_at)
+
+    def _open_journal(self, observed_at: float):
+        """
+        打开检查点日志并开始新运行，或读取resume指定运行已完成的日期组合
+
+        Returns:
+            Tuple: (RunJournal或None, 已完成的日期组合 {序号: 航班}, 运行的观察时间,
+                    已完成的日期组合是否已经写入价格历史（继续的运行此前已经结束）)
+        """
+        resume_run_id, self._resume_run_id = self._resume_run_id, None
+        if not self._checkpoint:
+            return None, {}, observed_at, False
+        journal = ScraperFactory.create_run_journal("booking", self._original_config._config_data)
+        if journal is None:
+            return None, {}, observed_at, False
+        try:
+            if resume_run_id is not None:
+                run = journal.load_run(resume_run_id)
+                self._run_id = resume_run_id
+                completed = journal.completed_cells(resume_run_id)
+                logging.info(f"继续运行 {resume_run_id}：{len(completed)} 个日期组合已完成，"
+                             f"重新请求 {len(self._date_configs) - len(completed)} 个")
+                return journal, completed, run["created_at"], run["completed_at"] is not None
+            self._run_id = new_run_id()
+            cells = [(route, config["booking"]["booking_search_condition"]["depart"],
+                      config["booking"]["booking_search_condition"]["return"])
+                     for route, config in zip(self._date_routes, self._date_configs)]
+            settings = {
+                "per_date_depth": self._per_date_depth,
+                "top_k": self._top_k,
+                "dedupe": self._dedupe,
+                "routes": self._routes,
+            }
+            journal.start_run(self._run_id, cells, settings, observed_at)
+            logging.info(f"运行ID: {self._run_id}，中断后可以用 --resume {self._run_id} 继续")
+            return journal, {}, observed_at, False
+        except Exception:
+            journal.close()
+            raise
+
+    def resume(self, run_id: str) -> OfferTable:
+        """
+        继续检查点日志中的一次运行
+
+        使用该运行记录的日期组合、航线和结果设置，已完成的日期组合直接从日志读取，只重新请求缺失和失败的，
+        最终结果与运行没有中断时一致。已经结束的运行只能重新请求失败的日期组合，
+        其余日期组合结束时已经写入价格历史，不再重复写入
+
+        Args:
+            run_id: 运行ID
+
+        Returns:
+            OfferTable: 最便宜的航班，按价格排序
+
+        Raises:
+            ValueError: 未启用检查点日志、日志中没有该运行，或该运行已经结束且没有失败的日期组合
+        """
+        journal = ScraperFactory.create_run_journal("booking", self._original_config._config_data)
+        if journal is None:
+            raise ValueError("未启用检查点日志(checkpoint)，无法继续运行")
+        try:
+            run = journal.load_run(run_id)
+            failed = journal.failed_cells(run_id) if run is not None else []
+        finally:
+            journal.close()
+        if run is None:
+            raise ValueError(f"检查点日志中没有运行: {run_id}")
+        if run["completed_at"] is not None and not failed:
+            raise ValueError(f"运行 {run_id} 已经完成，没有失败的日期组合需要重新请求")
+
+        settings = run["settings"]
+        self._per_date_depth = settings["per_date_depth"]
+        self._top_k = settings["top_k"]
+        self._dedupe = settings["dedupe"]
+        self._routes = dict(settings["routes"])
+        self._route = next(iter(self._routes))
+        self.prepare_cells(run["cells"])
+        self._checkpoint = True
+        self._resume_run_id = run_id
+        return self.scrape_all_dates()
+
+    def submit_to_queue(self, queue: WorkQueue) -> str:
+        """
+        把准备好的日期组合作为一批任务提交到工作队列，由QueueWorker执行
+
+        每个任务带有完整的搜索条件、per_date_depth和dedupe，所有worker按协调者的设置处理响应
+
+        Args:
+            queue: 工作队列
+
+        Returns:
+            str: 批次标识，用于collect_from_queue
+        """
+        batch_id = uuid.uuid4().hex
+        self._observed_at = time.time()
+        payloads = [
+            {
+                "index": i,
+                "route": route,
+                "search_condition": config["booking"]["booking_search_condition"],
+                "depth": self._per_date_depth,
+                "dedupe": self._dedupe,
+            }
+            for i, (config, route) in enumerate(zip(self._date_configs, self._date_routes))
+        ]
+        queue.submit(batch_id, payloads)
+        logging.info(f"已提交 {len(payloads)} 个日期组合到工作队列，批次 {batch_id}")
+        return batch_id
+
+    def collect_from_queue(self, queue: WorkQueue, batch_id: str, poll_interval: float = 5,
+                           timeout: Optional[float] = None, sleep=time.sleep) -> OfferTable:
+        """
+        等待一批任务全部完成或失败，然后合并worker写回的结果
+
+        合并方式与scrape_all_dates相同，结果按日期组合的序号合并，与在本地爬取的结果一致
+
+        Args:
+            queue: 工作队列
+            batch_id: submit_to_queue返回的批次标识
+            poll_interval: 检查任务进度的间隔（秒）
+            timeout: 最多等待的秒数，超时后只合并已完成的任务，None表示一直等待
+            sleep: 睡眠函数，测试时可以替换
+
+        Returns:
+            OfferTable: 最便宜的航班，按价格排序
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            pending = queue.pending(batch_id)
+            if not pending:
+                break
+            if deadline is not None and time.monotonic() >= deadline:
+                logging.warning(f"等待工作队列超时，还有 {pending} 个日期组合未完成")
+                break
+            logging.info(f"工作队列中还有 {pending} 个日期组合未完成")
+            sleep(poll_interval)
+
+        for payload, error in queue.failures(batch_id):
+            condition = payload["search_condition"]
+            logging.warning(f"日期 {condition['depart']} - {condition['return']}（{payload['route']}）"
+                            f"多次尝试后仍失败: {error}")
+
+        collector = TopKCollector(self._top_k)
+        route_collectors = {route: TopKCollector(self._top_k) for route in self._routes}
+        fingerprints = FingerprintIndex() if self._dedupe else None
+        observed = self._new_observed()
+        for payload, rows in queue.results(batch_id):
+            self._merge(payload["index"], rows, collector, route_collectors, fingerprints, observed)
+        return self._finish(collector, route_collectors, fingerprints, observed, self._observed_at or time.time())
+
+    def _finish(self, collector: TopKCollector, route_collectors: Dict[str, TopKCollector],
+                fingerprints: Optional[FingerprintIndex], observed: Dict[str, Dict[str, list]],
+                observed_at: float) -> OfferTable:
+        """生成整次运行和各航线的结果表格，并写入价格历史"""
+        if fingerprints is not None:
+            logging.info(f"共收集 {collector.seen} 个航班，合并了 {fingerprints.duplicates} 个重复行程，"
+                         f"保留最便宜的 {len(collector)} 个")
+        else:
+            logging.info(f"共收集 {collector.seen} 个航班，保留最便宜的 {len(collector)} 个")
+        self._results = self._table(collector, fingerprints)
+        if len(self._routes) == 1:
+            self._route_results = {self._route: self._results}
+        else:
+            self._route_results = {route: self._table(route_collector, fingerprints)
+                                   for route, route_collector in route_collectors.items()}
+        self._save_history(observed, observed_at)
+
+        return self._results
+
+    def _new_observed(self) -> Dict[str, Dict[str, list]]:
+        """每条航线本次观察到的航班（rows）和请求成功但没有航班的日期组合（empty_cells）"""
+        return {route: {"rows": [], "empty_cells": []} for route in self._routes}
+
+    def _merge(self, date_index: int, rows: Optional[List[Dict[str, Any]]], collector: TopKCollector,
+               route_collectors: Dict[str, TopKCollector], fingerprints: Optional[FingerprintIndex],
+               observed: Dict[str, Dict[str, list]]) -> None:
+        """
+        把一个日期组合的结果合并进整次运行和所属航线的收集器
+
+        rows为None表示请求失败，不写入价格历史；为空列表表示请求成功但没有航班，记录为没有航班的日期组合
+        """
+        if rows is None:
+            return
+        route = self._date_routes[date_index]
+        if not rows:
+            condition = self._date_configs[date_index]["booking"]["booking_search_condition"]
+            observed[route]["empty_cells"].append((condition["depart"], condition["return"]))
+            return
+        observed[route]["rows"].extend(rows)
+        if fingerprints is not None:
+            for row in rows:
+                fingerprints.add(row["fingerprint"], row["price_minor"], row["copies"], row["max_price_minor"])
+        self._collect(collector, fingerprints, date_index, rows)
+        if len(route_collectors) > 1:
+            self._collect(route_collectors[route], fingerprints, date_index, rows)
+
+    def _table(self, collector: TopKCollector, fingerprints: Optional[FingerprintIndex]) -> OfferTable:
+        """把收集器中的航班转换为表格，去重时附上整次运行的副本统计"""
+        rows = collector.sorted_items()
+        if fingerprints is not None:
+            rows = [self._with_run_stats(row, fingerprints) for row in rows]
+        return OfferTable.from_rows(rows)
+
+    def _save_history(self, observed: Dict[str, Dict[str, list]], observed_at: float) -> None:
+        """
+        把本次运行观察到的航班按航线批量写入价格历史库，每条航线一个run，未启用时跳过
 
-    def scrape_all_dates(self) -> List[Dict[str, Any]]:
+        所有日期组合都没有航班的航线也写入一个没有航班的run，便于提醒航班消失；所有请求都失败的航线不写入
+        """
+        self._history_run_ids = {}
+        observed = {route: cells for route, cells in observed.items() if cells["rows"] or cells["empty_cells"]}
+        if not self._record_history or not observed:
+            return
+        store = ScraperFactory.create_history_store("booking", self._original_config._config_data)
+        if store is None:
+            return
+        try:
+            for route, cells in observed.items():
+                self._history_run_ids[route] = store.record_run(route, cells["rows"], observed_at,
+                                                                cells["empty_cells"])
+        except Exception as e:
+            logging.error(f"写入价格历史失败: {e}")
+        finally:
+            store.close()
+
+    @staticmethod
+    def _collect(collector: TopKCollector, fingerprints: Optional[FingerprintIndex], date_index: int,
+                 rows: List[Dict[str, Any]]) -> None:
+        """
+        把一个日期的结果合并进收集器，键为(价格, 日期序号, 航班序号)
+
+        fingerprints不为None时按行程指纹分组，统计由调用方合并进整次运行的FingerprintIndex
+        """
+        if fingerprints is None:
+            collector.extend(((row["price_minor"], date_index, row["flight_index"]), row) for row in rows)
+            return
+        collector.extend(((row["price_minor"], date_index, row["flight_index"]), row, row["fingerprint"])
+                         for row in rows)
+
+    @staticmethod
+    def _with_run_stats(row: Dict[str, Any], fingerprints: FingerprintIndex) -> Dict[str, Any]:
+        """用整次运行的副本数和价格范围替换单个日期的统计"""
+        stats = fingerprints.get(row["fingerprint"])
+        row = dict(row)
+        row["copies"] = stats.copies
+        row["max_price_minor"] = stats.max_price
+        row["price_spread"] = Price(stats.spread, row["currency"]).total
+        return row
+
+    def _scrape_single_date(self, task: Tuple[int, Dict[str, Any], Any, Any]) -> List[Dict[str, Any]]:
         """
-        爬取所有日期的航班信息
+        爬取单个日期组合的航班信息
+
+        Args:
+            task: (序号, 该日期组合的配置, 共享的HttpSession, 共享的ResponseCache, OfferProcessPool或None)
 
         Returns:
-            所有日期的航班信息列表
-        """
-        self._results = []
-        import time
-        import random
-        for i, config in enumerate(self._date_configs):
-            try:
-                logging.info(f"爬取第 {i + 1}/{len(self._date_configs)} 个日期组合")
-                if i > 0:
-                    delay = random.randint(1, 10)  # 随机延迟1到5秒
-                    logging.info(f"等待 {delay} 秒以避免过于频繁的请求")
-                    time.sleep(delay)
-
-                # 创建爬虫实例
-                scraper = ScraperFactory.create_scraper("booking")
-
-                # 保存配置中的日期信息
-                depart_date = config["booking"]["booking_search_condition"]["depart"]
-                return_date = config["booking"]["booking_search_condition"]["return"]
-
-                # 获取航班信息
-                scraper.requests_flight_info()
-                scraper.parse_flights()
-
-                # 加载数据
-                if scraper.load_data() and scraper._processed_offers:
-                    # 如果有结果，处理前5个最便宜的选项
-                    max_options = min(5, len(scraper._processed_offers))
-
-                    for j in range(max_options):
-                        price_info = scraper.parse_price(j)
-                        time_info = scraper.parse_time(j)
-                        airport_info = scraper.parse_airport(j)
-                        airline_info = scraper.parse_airline(j)
-                        luggage_info = scraper.parse_luggage_allowance(j)
-                        booking_link = scraper.generate_booking_link(j)
-
-                        # 组合结果
-                        result = {
-                            "depart_date": depart_date,
-                            "return_date": return_date,
-                            "price": price_info,
-                            "time": time_info,
-                            "airport": airport_info,
-                            "airline": airline_info,
-                            "luggage": luggage_info,
-                            "booking_link": booking_link,
-                            "flight_index": j
-                        }
-
-                        self._results.append(result)
-                else:
-                    logging.warning(f"日期 {depart_date} - {return_date} 没有找到航班")
-
-            except Exception as e:
-                logging.error(f"爬取日期 {config['booking']['booking_search_condition']['depart']} - "
-                              f"{config['booking']['booking_search_condition']['return']} 时出错: {e}")
-
-        # 按价格排序
-        self._results.sort(key=lambda x: x["price"]["total"] if x["price"] else float('inf'))
+            该日期组合最便宜的per_date_depth个航班，每个航班为OfferTable的一行，没有航班时返回空列表，
+            请求或解析失败时返回None
+        """
+        i, config, session, cache, pool = task
+        depart_date = config["booking"]["booking_search_condition"]["depart"]
+        return_date = config["booking"]["booking_search_condition"]["return"]
+        rows = None
+        try:
+            logging.info(f"爬取第 {i + 1}/{len(self._date_configs)} 个日期组合")
+
+            # 创建爬虫实例，连接池和请求频率由共享会话控制
+            scraper = ScraperFactory.create_scraper("booking", config, session=session, cache=cache,
+                                                    max_offers=self._per_date_depth, dedupe=self._dedupe)
+
+            if pool is not None:
+                return self._scrape_in_pool(scraper, pool, depart_date, return_date)
+
+            # 获取航班信息
+            scraper.requests_flight_info()
+            scraper.parse_flights()
+
+            # 加载数据，没有原始响应说明请求或解码失败
+            if not scraper.load_data():
+                logging.warning(f"日期 {depart_date} - {return_date} 没有获取到航班数据")
+            elif scraper._processed_offers:
+                # 航班已按价格排序，只有最便宜的per_date_depth个会被完整处理
+                rows = offer_rows(depart_date, return_date, scraper._processed_offers, self._per_date_depth)
+            else:
+                logging.warning(f"日期 {depart_date} - {return_date} 没有找到航班")
+                rows = []
+
+        except CircuitOpenError:
+            logging.warning(f"熔断器已放弃，跳过日期 {depart_date} - {return_date}")
+        except Exception as e:
+            logging.error(f"爬取日期 {depart_date} - {return_date} 时出错: {e}")
 
+        return rows
+
+    def _scrape_in_pool(self, scraper, pool: OfferProcessPool, depart_date: str,
+                        return_date: str) -> List[Dict[str, Any]]:
+        """
+        当前线程只负责请求，响应交给进程池解码和处理
+
+        Returns:
+            该日期组合最便宜的per_date_depth个航班，每个航班为OfferTable的一行，请求或解码失败时返回None
+        """
+        body, from_cache = scraper.fetch_response_body()
+        if body is None:
+            logging.warning(f"日期 {depart_date} - {return_date} 没有获取到航班数据")
+            return None
+        try:
+            rows = pool.decode("booking", body, depart_date, return_date, self._per_date_depth, self._dedupe)
+        except ValueError as e:
+            logging.error(f"日期 {depart_date} - {return_date} 的航班信息不是有效的JSON: {e}")
+            return None
+        if not from_cache:
+            scraper.cache_response_body(body)
+        if not rows:
+            logging.warning(f"日期 {depart_date} - {return_date} 没有找到航班")
+        return rows
+
+    @property
+    def results(self) -> OfferTable:
+        """本次运行所有航线合并排序的结果表格"""
         return self._results
 
-    def find_cheapest_flights(self, top_n: int = 5) -> List[Dict[str, Any]]:
+    @property
+    def results_by_route(self) -> Dict[str, OfferTable]:
+        """本次运行每条航线的结果表格，键为航线标识"""
+        return self._route_results
+
+    def price_changes(self, thresholds: AlertThresholds) -> Optional[List[PriceChange]]:
+        """
+        本次运行各航线相对该航线上次运行值得提醒的价格变化，见diff_against_previous
+
+        Args:
+            thresholds: 提醒阈值
+
+        Returns:
+            List[PriceChange]: 按航线顺序排列的价格变化，没有航线写入价格历史或所有航线都没有上次运行可比较时返回None
+        """
+        if not self._history_run_ids:
+            return None
+        store = ScraperFactory.create_history_store("booking", self._original_config._config_data)
+        if store is None:
+            return None
+        try:
+            changes = None
+            for route, run_id in self._history_run_ids.items():
+                route_changes = diff_against_previous(store, route, run_id, thresholds)
+                if route_changes is not None:
+                    changes = (changes or []) + route_changes
+            return changes
+        finally:
+            store.close()
+
+    @property
+    def route(self) -> str:
+        """第一条航线的标识，价格历史按航线保存"""
+        return self._route
+
+    @property
+    def routes(self) -> List[str]:
+        """所有航线的标识"""
+        return list(self._routes)
+
+    @property
+    def history_run_id(self) -> Optional[int]:
+        """第一条航线本次运行在价格历史库中的run_id，未写入时为None"""
+        return self._history_run_ids.get(self._route)
+
+    @property
+    def history_run_ids(self) -> Dict[str, int]:
+        """本次运行每条航线在价格历史库中的run_id"""
+        return dict(self._history_run_ids)
+
+    @property
+    def run_id(self) -> Optional[str]:
+        """本次运行在检查点日志中的运行ID，未启用检查点时为None"""
+        return self._run_id
+
+    def find_cheapest_flights(self, top_n: int = 5, route: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         找出最便宜的几个航班
 
         Args:
             top_n: 返回前几个最便宜的航班，默认为5个
+            route: 只在这条航线中查找，None则在所有航线中查找
 
         Returns:
-            最便宜的几个航班信息
+            最便宜的几个航班，每个航班为一行数据
         """
-        if not self._results:
+        results = self._results if route is None else self._route_results.get(route)
+        if not results:
             return []
 
-        return self._results[:min(top_n, len(self._results))]
+        return results.cheapest(top_n).records()
+
+    @staticmethod
+    def _output_path(filename: str) -> str:
+        """输出文件的完整路径，目录不存在时创建"""
+        current_dir = os.path.dirname(os.path.abspath(__file__))
+        project_root = os.path.dirname(os.path.dirname(os.path.dirname(current_dir)))
+        output_dir = os.path.join(project_root, "output")
+        os.makedirs(output_dir, exist_ok=True)
+        return os.path.join(output_dir, filename)
 
     def save_results_csv(self, filename: str = "multi_date_flights.csv") -> str:
         """
@@ -194,138 +721,7 @@ class MultiDateBookingScraper:
         Returns:
             str: 保存的文件路径
         """
-        if not self._results:
-            logging.warning("No results to save")
-            return ""
-
-        try:
-
-            # Get filename from existing path
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            project_root = os.path.dirname(os.path.dirname(os.path.dirname(current_dir)))
-            output_dir = os.path.join(project_root, "output")
-            os.makedirs(output_dir, exist_ok=True)
-            filepath = os.path.join(output_dir, filename)
-
-            import csv
-
-            # Define CSV fields
-            fieldnames = [
-                "departure_date", "return_date", "price", "currency",
-                "origin", "destination", "outbound_departure_time", "outbound_arrival_time",
-                "outbound_flight_time", "outbound_transit", "airline",
-                "inbound_departure_time", "inbound_arrival_time", "inbound_flight_time",
-                "inbound_transit", "inbound_airline", "personal_item",
-                "cabin_baggage", "checked_baggage", "booking_link"
-            ]
-
-            with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
-                writer = csv.DictWriter(
-                    csvfile,
-                    fieldnames=fieldnames,
-                    quoting=csv.QUOTE_ALL,  # 引用所有字段
-                    quotechar='"',  # 使用双引号作为引用字符
-                    escapechar='\\'  # 使用反斜杠作为转义字符
-                )
-                writer.writeheader()
-
-                for flight in self._results:
-                    # Prepare row data
-                    row = {
-                        "departure_date": flight["depart_date"],
-                        "return_date": flight["return_date"],
-                        "price": flight["price"]["total"] if flight["price"] else "",
-                        "currency": flight["price"]["currency"] if flight["price"] else "",
-                        "origin": flight["airport"]["outbound"]["departure"] if flight["airport"] else "",
-                        "destination": flight["airport"]["outbound"]["arrival"] if flight["airport"] else "",
-                        "airline": flight["airline"]["outbound"]["main_carrier"]["name"] if flight[
-                                                                                                "airline"] and "main_carrier" in
-                                                                                            flight["airline"][
-                                                                                                "outbound"] else "",
-                    }
-
-                    # Process outbound information
-                    if flight["time"] and "outbound" in flight["time"]:
-                        row["outbound_departure_time"] = flight["time"]["outbound"]["departure_time"].replace("T",
-                                                                                                              " ") if "departure_time" in \
-                                                                                                                      flight[
-                                                                                                                          "time"][
-                                                                                                                          "outbound"] else ""
-                        row["outbound_arrival_time"] = flight["time"]["outbound"]["arrival_time"].replace("T",
-                                                                                                          " ") if "arrival_time" in \
-                                                                                                                  flight[
-                                                                                                                      "time"][
-                                                                                                                      "outbound"] else ""
-                        row["outbound_flight_time"] = flight["time"]["outbound"][
-                            "total_time_formatted"] if "total_time_formatted" in flight["time"]["outbound"] else ""
-
-                    # Process outbound transit
-                    if flight["airport"] and "outbound" in flight["airport"] and "transit" in flight["airport"][
-                        "outbound"] and flight["airport"]["outbound"]["transit"]:
-                        transit_airports = []
-                        for airport in flight["airport"]["outbound"]["transit"]:
-                            transit_airports.append(airport)
-                        row["outbound_transit"] = " → ".join(transit_airports)
-                    else:
-                        row["outbound_transit"] = "Direct"
-
-                    # Process inbound information
-                    if flight["time"] and "inbound" in flight["time"]:
-                        row["inbound_departure_time"] = flight["time"]["inbound"]["departure_time"].replace("T",
-                                                                                                            " ") if "departure_time" in \
-                                                                                                                    flight[
-                                                                                                                        "time"][
-                                                                                                                        "inbound"] else ""
-                        row["inbound_arrival_time"] = flight["time"]["inbound"]["arrival_time"].replace("T",
-                                                                                                        " ") if "arrival_time" in \
-                                                                                                                flight[
-                                                                                                                    "time"][
-                                                                                                                    "inbound"] else ""
-                        row["inbound_flight_time"] = flight["time"]["inbound"][
-                            "total_time_formatted"] if "total_time_formatted" in flight["time"]["inbound"] else ""
-
-                    # Process inbound transit
-                    if flight["airport"] and "inbound" in flight["airport"] and "transit" in flight["airport"][
-                        "inbound"] and flight["airport"]["inbound"]["transit"]:
-                        transit_airports = []
-                        for airport in flight["airport"]["inbound"]["transit"]:
-                            transit_airports.append(airport)
-                        row["inbound_transit"] = " → ".join(transit_airports)
-                    else:
-                        row["inbound_transit"] = "Direct"
-
-                    # Process inbound airline
-                    if flight["airline"] and "inbound" in flight["airline"] and "main_carrier" in flight["airline"][
-                        "inbound"]:
-                        row["inbound_airline"] = flight["airline"]["inbound"]["main_carrier"]["name"]
-
-                    # Process baggage information
-                    # 处理行李信息 - 确保正确引用并转义特殊字符
-                    if flight["luggage"]:
-                        # 获取行李信息并处理可能的特殊字符
-                        personal = str(flight["luggage"].get("personal", "")).replace('"', '\\"')
-                        cabin = str(flight["luggage"].get("cabin", "")).replace('"', '\\"')
-                        checked = str(flight["luggage"].get("checked", "")).replace('"', '\\"')
-
-                        row["personal_item"] = personal
-                        row["cabin_baggage"] = cabin
-                        row["checked_baggage"] = checked
-
-                    # 处理预订链接 - 确保链接不包含引号和逗号导致的分列问题
-                    if flight["booking_link"]:
-                        link = flight["booking_link"].replace('"', '\\"')
-                        row["booking_link"] = link
-
-                    # Write row
-                    writer.writerow(row)
-
-            logging.info(f"Results saved to CSV: {filepath}")
-            return filepath
-        except Exception as e:
-            logging.error(f"Error saving CSV: {e}")
-            import traceback
-            logging.error(traceback.format_exc())
-            return ""
+        return self._save_results(filename, "csv")
 
     def save_results_xlsx(self, filename: str = "multi_date_flights.xlsx") -> str:
         """
@@ -337,166 +733,96 @@ class MultiDateBookingScraper:
         Returns:
             str: 保存的文件路径
         """
-        if not self._results:
+        return self._save_results(filename, "xlsx")
+
+    def save_results_parquet(self, dirname: str = "parquet") -> str:
+        """
+        将结果追加到按航线和观察日期分区的Parquet数据集，每条航线写入自己的分区，需要安装pyarrow
+
+        Args:
+            dirname: 数据集目录名，默认为 "parquet"
+
+        Returns:
+            str: 数据集根目录，没有结果或出错时返回空字符串
+        """
+        filepath = ""
+        for route, table in self._route_results.items():
+            filepath = self._save_results(dirname, "parquet", table, route=route,
+                                          observed_at=self._observed_at) or filepath
+        return filepath
+
+    def _save_results(self, filename: str, fmt: str, table: Optional[OfferTable] = None, **options) -> str:
+        """
+        用对应格式的导出器保存结果，见flight_scraper.core.data.exporters
+
+        Args:
+            table: 要保存的表格，None则保存所有航线合并的结果
+
+        Returns:
+            str: 保存的文件路径，没有结果或出错时返回空字符串
+        """
+        if table is None:
+            table = self._results
+        if not table:
             logging.warning("No results to save")
             return ""
 
         try:
-            # 确保pandas库已安装
-            import pandas as pd
-
-            # 获取输出路径
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            project_root = os.path.dirname(os.path.dirname(os.path.dirname(current_dir)))
-            output_dir = os.path.join(project_root, "output")
-            os.makedirs(output_dir, exist_ok=True)
-            filepath = os.path.join(output_dir, filename)
-
-            # 准备数据列表
-            data = []
-            links = []  # 存储链接，稍后添加
-
-            for flight in self._results:
-                # 基本航班信息
-                row_data = {
-                    "departure_date": flight["depart_date"],
-                    "return_date": flight["return_date"],
-                    "price": flight["price"]["total"] if flight["price"] else "",
-                    "currency": flight["price"]["currency"] if flight["price"] else "",
-                    "origin": flight["airport"]["outbound"]["departure"] if flight["airport"] else "",
-                    "destination": flight["airport"]["outbound"]["arrival"] if flight["airport"] else "",
-                    "airline": flight["airline"]["outbound"]["main_carrier"]["name"] if flight[
-                                                                                            "airline"] and "main_carrier" in
-                                                                                        flight["airline"][
-                                                                                            "outbound"] else "",
-                }
-
-                # 处理出发信息
-                if flight["time"] and "outbound" in flight["time"]:
-                    row_data["outbound_departure_time"] = flight["time"]["outbound"]["departure_time"].replace("T",
-                                                                                                               " ") if "departure_time" in \
-                                                                                                                       flight[
-                                                                                                                           "time"][
-                                                                                                                           "outbound"] else ""
-                    row_data["outbound_arrival_time"] = flight["time"]["outbound"]["arrival_time"].replace("T",
-                                                                                                           " ") if "arrival_time" in \
-                                                                                                                   flight[
-                                                                                                                       "time"][
-                                                                                                                       "outbound"] else ""
-                    row_data["outbound_flight_time"] = flight["time"]["outbound"][
-                        "total_time_formatted"] if "total_time_formatted" in flight["time"]["outbound"] else ""
-
-                # 处理出发中转机场
-                if flight["airport"] and "outbound" in flight["airport"] and "transit" in flight["airport"][
-                    "outbound"] and flight["airport"]["outbound"]["transit"]:
-                    transit_airports = []
-                    for airport in flight["airport"]["outbound"]["transit"]:
-                        transit_airports.append(airport)
-                    row_data["outbound_transit"] = " → ".join(transit_airports)
-                else:
-                    row_data["outbound_transit"] = "Direct"
-
-                # 处理返程信息
-                if flight["time"] and "inbound" in flight["time"]:
-                    row_data["inbound_departure_time"] = flight["time"]["inbound"]["departure_time"].replace("T",
-                                                                                                             " ") if "departure_time" in \
-                                                                                                                     flight[
-                                                                                                                         "time"][
-                                                                                                                         "inbound"] else ""
-                    row_data["inbound_arrival_time"] = flight["time"]["inbound"]["arrival_time"].replace("T",
-                                                                                                         " ") if "arrival_time" in \
-                                                                                                                 flight[
-                                                                                                                     "time"][
-                                                                                                                     "inbound"] else ""
-                    row_data["inbound_flight_time"] = flight["time"]["inbound"][
-                        "total_time_formatted"] if "total_time_formatted" in flight["time"]["inbound"] else ""
-
-                # 处理返程中转机场
-                if flight["airport"] and "inbound" in flight["airport"] and "transit" in flight["airport"][
-                    "inbound"] and flight["airport"]["inbound"]["transit"]:
-                    transit_airports = []
-                    for airport in flight["airport"]["inbound"]["transit"]:
-                        transit_airports.append(airport)
-                    row_data["inbound_transit"] = " → ".join(transit_airports)
-                else:
-                    row_data["inbound_transit"] = "Direct"
-
-                # 处理返程航空公司
-                if flight["airline"] and "inbound" in flight["airline"] and "main_carrier" in flight["airline"][
-                    "inbound"]:
-                    row_data["inbound_airline"] = flight["airline"]["inbound"]["main_carrier"]["name"]
-                else:
-                    row_data["inbound_airline"] = ""
-
-                # 处理行李信息
-                if flight["luggage"]:
-                    row_data["personal_item"] = str(flight["luggage"].get("personal", ""))
-                    row_data["cabin_baggage"] = str(flight["luggage"].get("cabin", ""))
-                    row_data["checked_baggage"] = str(flight["luggage"].get("checked", ""))
-                else:
-                    row_data["personal_item"] = ""
-                    row_data["cabin_baggage"] = ""
-                    row_data["checked_baggage"] = ""
-
-                # 处理预订链接 - 存储为"预订链接"文本，并保存实际链接
-                row_data["booking_link"] = "预订链接" if flight["booking_link"] else ""
-                links.append(flight["booking_link"] if flight["booking_link"] else "")
-
-                data.append(row_data)
-
-            # 创建DataFrame并保存为Excel
-            df = pd.DataFrame(data)
-
-            # 使用pandas保存为Excel
-            with pd.ExcelWriter(filepath, engine='openpyxl') as writer:
-                df.to_excel(writer, index=False, sheet_name='Flights')
-
-                # 获取工作表和表格用于添加超链接
-                workbook = writer.book
-                worksheet = writer.sheets['Flights']
-
-                # 查找booking_link列的索引
-                link_col = df.columns.get_loc("booking_link") + 1  # +1因为Excel列从1开始
-
-                # 添加超链接
-                for i, link in enumerate(links, start=2):  # 从第2行开始(跳过表头)
-                    if link:
-                        cell = worksheet.cell(row=i, column=link_col)
-                        cell.hyperlink = link
-                        # 设置超链接样式
-                        from openpyxl.styles import Font
-                        cell.font = Font(color="0563C1", underline="single")
-
-            logging.info(f"Results saved to Excel: {filepath}")
+            filepath = export_table(table, self._output_path(filename), fmt, **options)
+            logging.info(f"Results saved to {fmt.upper()}: {filepath}")
             return filepath
+        except ImportError as e:
+            logging.error(str(e))
+            return ""
         except Exception as e:
-            logging.error(f"Error saving Excel: {e}")
+            logging.error(f"Error saving {fmt.upper()}: {e}")
             import traceback
             logging.error(traceback.format_exc())
             return ""
 
-    def run(self, start_date: str, days_range: int = 10, return_days: int = 36, top_n: int = 5) -> str:
+    def run(self, start_date: str, days_range: int = 10, return_days: int = 36, top_n: int = 5,
+            max_return_days: Optional[int] = None, queue: Optional[WorkQueue] = None,
+            poll_interval: float = 5, resume_run_id: Optional[str] = None) -> str:
         """
         运行多日期爬虫
 
         Args:
             start_date: 开始日期，格式为 YYYY-MM-DD
             days_range: 出发日期范围天数，默认为10天
-            return_days: 返程天数，默认为36天
+            return_days: 返程天数，默认为36天；指定max_return_days时为最短停留天数
             top_n: 显示前几个最便宜的航班，默认为5个
+            max_return_days: 最长停留天数，指定后搜索出发日期 × 停留天数的网格
+            queue: 工作队列，指定后日期组合交给QueueWorker执行，本进程只负责提交和合并结果
+            poll_interval: 使用工作队列时检查进度的间隔（秒）
+            resume_run_id: 继续检查点日志中的这次运行，日期参数被忽略，见resume
 
         Returns:
             格式化后的结果文本
         """
-        # 生成日期范围
-        date_pairs = self.generate_date_range(start_date, days_range, return_days)
-        logging.info(f"生成了 {len(date_pairs)} 个日期组合, 分别为: {date_pairs}")
+        if resume_run_id is not None:
+            self.resume(resume_run_id)
+        else:
+            # 生成日期范围
+            if max_return_days is not None and max_return_days > return_days:
+                date_pairs = self.generate_date_grid(start_date, days_range, return_days, max_return_days)
+            else:
+                date_pairs = self.generate_date_range(start_date, days_range, return_days)
+            if len(self._routes) > 1:
+                logging.info(f"搜索 {len(self._routes)} 条航线: {', '.join(self._routes)}")
+            if len(date_pairs) > 10:
+                logging.info(f"生成了 {len(date_pairs)} 个日期组合, "
+                             f"从 {date_pairs[0]} 到 {date_pairs[-1]}")
+            else:
+                logging.info(f"生成了 {len(date_pairs)} 个日期组合, 分别为: {date_pairs}")
 
-        # 准备配置
-        self.prepare_date_configs(date_pairs)
+            # 准备配置
+            self.prepare_date_configs(date_pairs)
 
-        # 爬取所有日期
-        self.scrape_all_dates()
+            # 爬取所有日期
+            if queue is not None:
+                self.collect_from_queue(queue, self.submit_to_queue(queue), poll_interval)
+            else:
+                self.scrape_all_dates()
 
         # 保存结果
         # self.save_results_csv()
@@ -511,14 +837,14 @@ class MultiDateBookingScraper:
             return "没有找到航班信息"
 
         formatted_results = []
-        for result in self._results:
+        for result in self._results.frame.itertuples(index=False):
             formatted_results.append(
-                f"出发日期: {result['depart_date']}, 返程日期: {result['return_date']}, "
-                f"价格: {result['price']['total']} {result['price']['currency']}, "
-                f"起点: {result['airport']['outbound']['departure']}, "
-                f"终点: {result['airport']['outbound']['arrival']}, "
-                f"航空公司: {result['airline']['outbound']['main_carrier']['name']}"
-                f", 航班链接: {result['booking_link']}"
+                f"出发日期: {result.depart_date}, 返程日期: {result.return_date}, "
+                f"价格: {result.price} {result.currency}, "
+                f"起点: {result.origin}, "
+                f"终点: {result.destination}, "
+                f"航空公司: {result.airline}"
+                f", 航班链接: {result.booking_link}"
             )
 
         return "\n".join(formatted_results)
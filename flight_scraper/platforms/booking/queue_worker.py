@@ -0,0 +1,141 @@
+# flight_scraper/platforms/booking/queue_worker.py
+import logging
+import os
+import socket
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from flight_scraper.core.data.processor.process_pool import decode_offer_rows
+from flight_scraper.core.factory.factory import ScraperFactory
+from flight_scraper.core.storage.work_queue import Job, WorkQueue
+from flight_scraper.platforms.booking.config import BookingConfig
+
+
+class QueueWorker:
+    """
+    从工作队列租用日期组合并执行搜索的worker
+
+    每个任务的参数由MultiDateBookingScraper.submit_to_queue生成，包含完整的搜索条件、每个日期保留的航班数和
+    是否去重，worker只用本地配置中的API地址、HTTP、代理和缓存设置。请求失败或响应无法解码时调用fail，
+    由队列决定延迟重试还是标记为失败
+    """
+
+    def __init__(self, config_data: Dict[str, Any], queue: WorkQueue, worker_id: Optional[str] = None,
+                 poll_interval: Optional[float] = None, sleep: Callable[[float], None] = time.sleep):
+        """
+        Args:
+            config_data: Booking配置数据
+            queue: 工作队列
+            worker_id: worker标识，None则使用 主机名:进程号
+            poll_interval: 没有可执行的任务时等待的秒数，None则使用配置中的值
+            sleep: 睡眠函数，测试时可以替换
+        """
+        self._config_data = config_data
+        self._queue = queue
+        self._worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        if poll_interval is None:
+            poll_interval = BookingConfig(config_data).get_queue_config()["poll_interval"]
+        self._poll_interval = poll_interval
+        self._sleep = sleep
+        # worker的所有请求共享同一个会话和缓存
+        self._session = ScraperFactory.create_session("booking", config_data, max_workers=1)
+        self._cache = ScraperFactory.create_cache("booking", config_data)
+
+    @property
+    def worker_id(self) -> str:
+        return self._worker_id
+
+    def process(self, job: Job) -> List[Dict[str, Any]]:
+        """
+        执行一个任务
+
+        Args:
+            job: 租用的任务
+
+        Returns:
+            List[Dict[str, Any]]: 该日期组合最便宜的航班，每个航班为OfferTable的一行
+
+        Raises:
+            RuntimeError: 请求失败
+            ValueError: 响应不是有效的JSON
+        """
+        payload = job.payload
+        search_condition = payload["search_condition"]
+        config = dict(self._config_data)
+        config["booking"] = dict(self._config_data["booking"])
+        config["booking"]["booking_search_condition"] = search_condition
+
+        scraper = ScraperFactory.create_scraper("booking", config, session=self._session, cache=self._cache,
+                                                max_offers=payload["depth"], dedupe=payload["dedupe"])
+        body, from_cache = scraper.fetch_response_body()
+        if body is None:
+            raise RuntimeError("请求航班信息失败")
+        rows = decode_offer_rows("booking", body, search_condition["depart"], search_condition["return"],
+                                 payload["depth"], payload["dedupe"])
+        if not from_cache:
+            scraper.cache_response_body(body)
+        return rows
+
+    def run_once(self) -> bool:
+        """
+        租用并执行一个任务
+
+        Returns:
+            bool: 是否租到了任务
+        """
+        job = self._queue.lease(self._worker_id)
+        if job is None:
+            return False
+        condition = job.payload["search_condition"]
+        cell = f"{job.payload['route']} {condition['depart']} - {condition['return']}"
+        try:
+            rows = self.process(job)
+        except Exception as e:
+            logging.error(f"任务 {job.job_id}（{cell}）第 {job.attempts} 次执行失败: {e}")
+            self._queue.fail(job, str(e))
+            return True
+        if not self._queue.ack(job, rows):
+            logging.warning(f"任务 {job.job_id}（{cell}）的租约已失效，结果被丢弃")
+        return True
+
+    def run(self, max_jobs: Optional[int] = None, idle_timeout: float = 0) -> int:
+        """
+        持续执行任务，直到队列中没有排队中或执行中的任务
+
+        其他worker执行中的任务可能失败后重新排队，所以只要还有执行中的任务就继续等待；
+        队列空了之后再等待idle_timeout秒，便于worker先于协调者启动
+
+        Args:
+            max_jobs: 最多执行几个任务，None表示不限
+            idle_timeout: 队列为空时最多等待的秒数
+
+        Returns:
+            int: 执行的任务数
+        """
+        done = 0
+        idle = 0.0
+        logging.info(f"worker {self._worker_id} 启动")
+        while max_jobs is None or done < max_jobs:
+            if self.run_once():
+                done += 1
+                idle = 0.0
+                continue
+            if not self._queue.pending():
+                if idle >= idle_timeout:
+                    break
+                idle += self._poll_interval
+            self._sleep(self._poll_interval)
+        logging.info(f"worker {self._worker_id} 退出，共执行 {done} 个任务")
+        return done
+
+    def close(self) -> None:
+        """关闭会话和缓存"""
+        self._session.close()
+        if self._cache is not None:
+            self._cache.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
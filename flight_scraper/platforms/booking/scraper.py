@@ -4,6 +4,8 @@ import os
 import sys
 import requests
 import json
+import uuid
+import zlib
 import urllib3
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -15,15 +17,18 @@ project_root = os.path.dirname(
 )
 sys.path.append(project_root)
 
+# 仓库根目录，归档等相对路径以此为基准
+repo_root = os.path.dirname(project_root)
+
 from flight_scraper.core.data.processor.processor_factory import DataProcessorFactory
+from flight_scraper.core.data.stream_decoder import iter_json_array
 from flight_scraper.core.factory.factory import ScraperFactory
+from flight_scraper.core.http.response_cache import make_cache_key
 from flight_scraper.core.abstract.abstract_methods import FlightScraper
 
 
-def rm_flights_json():
-    """删除flights.json文件"""
-    if os.path.exists(r"flights.json"):
-        os.remove(r"flights.json")
+# 流式下载时每次读取的字节数
+STREAM_CHUNK_SIZE = 64 * 1024
 
 
 def _url_encode(text):
@@ -33,19 +38,35 @@ def _url_encode(text):
     return urllib.parse.quote(text)
 
 
+def _carrier_dict(carrier):
+    """把Carrier转换为旧版的承运商字典，没有承运商时返回空字典"""
+    return carrier.to_dict() if carrier is not None else {}
+
+
 class BookingScraper(FlightScraper):
 
-    def __init__(self, platform_config):
+    def __init__(self, platform_config, session=None, cache=None, max_offers=None, dedupe=None):
+        """
+        Args:
+            platform_config: BookingConfig实例
+            session: 共享的HttpSession，None则使用进程内默认会话
+            cache: 共享的ResponseCache，None则不使用缓存
+            max_offers: 只保留最便宜的几个航班，None则全部保留
+            dedupe: 是否合并行程相同的航班，None则使用配置中results.dedupe的值
+        """
 
         self._platform_config = platform_config
-        super().__init__(platform_config)
+        self._cache = cache
+        self._max_offers = max_offers
+        if dedupe is None:
+            dedupe = platform_config.get_results_config()["dedupe"]
+        self._dedupe = dedupe
+        super().__init__(platform_config, session)
 
         self._data_loaded = False
         self._raw_data = None
+        self._requested = False
         self._processed_offers = []
-
-        import uuid
-        self._save_file_path = f"flights_{uuid.uuid4().hex}.json" # 修复多日期搜索时文件名冲突的问题
         self._platform_type = "booking"
 
     def load_data(self) -> bool:
@@ -54,12 +75,18 @@ class BookingScraper(FlightScraper):
             return True
 
         self.parse_flights()
+        if self._data_loaded:
+            # 流式解码在请求时已经处理完所有航班
+            return True
         if not self._raw_data:
             return False
 
+        # 先按价格排序，航段等完整信息在parse_*或导出访问时才提取
         processor = DataProcessorFactory.create_processor(self._platform_type, self._raw_data)
-        self._processed_offers = processor.process()
+        self._processed_offers = processor.process(keep=self._max_offers, dedupe=self._dedupe)
         self._data_loaded = True
+        # 处理完成后释放原始响应，只保留处理后的航班
+        self._raw_data = None
         return True
 
     def _initialize_headers(self):
@@ -70,48 +97,222 @@ class BookingScraper(FlightScraper):
         return headers
 
     def _initialize_proxies(self):
-        """初始化proxies需要的信息. 暂时搁置. 有一个self._proxies属性，里面有x个代理信息。 用来防止IP被ban"""
-        return self._platform_config.get_proxies_config()
+        """
+        初始化proxies需要的信息，用来防止IP被ban
+
+        配置中的代理由共享会话的代理池(flight_scraper.proxy.pool.ProxyPool)统一做健康检查和轮换，
+        这里不再给单个请求指定代理
+        """
+        return None
 
     def requests_flight_info(self) -> None:
         """
-        获取航班信息，通过requests获取到json信息，写入flights.json文件
+        获取航班信息，响应直接解码到self._raw_data，不再经过临时文件
+
+        开启processing.stream_decode时改为边下载边读取价格，排序后的航班直接进入self._processed_offers；
+        开启debug.archive_responses时，额外把原始响应保存到归档目录；
+        命中响应缓存时直接使用缓存，不发请求也不等待限速
         """
-        url = self._platform_config.get_api_url()
-        params = self._platform_config.get_search_params()
+        if self._platform_config.get_processing_config()["stream_decode"]:
+            processor = DataProcessorFactory.create_processor(self._platform_type)
+            self._processed_offers = processor.rank(self._iter_raw_offers(), keep=self._max_offers,
+                                                     dedupe=self._dedupe)
+            return None
+
+        body, from_cache = self.fetch_response_body()
+        if body is None:
+            return None
+
         try:
+            # 直接从响应字节解码，避免先转成文本再解析
+            self._raw_data = json.loads(body)
+        except ValueError as e:
+            logging.error(f"航班信息不是有效的JSON: {e}")
+            return None
 
-            response = requests.get(
-                url,
+        if not from_cache:
+            self.cache_response_body(body)
+
+    def fetch_response_body(self):
+        """
+        请求航班信息，返回未解码的响应字节
+
+        命中响应缓存时直接返回缓存内容；开启debug.archive_responses时保存原始响应。
+        响应不会写入缓存，调用方确认可以解码后再调用cache_response_body
+
+        Returns:
+            Tuple[bytes, bool]: (响应体, 是否来自缓存)，请求失败时响应体为None
+        """
+        params = self._platform_config.get_search_params()
+        self._requested = True
+
+        if self._cache is not None:
+            body = self._cache.get(make_cache_key(self._platform_type, params))
+            if body is not None:
+                logging.info(f"命中缓存: {params.get('depart')} - {params.get('return')}")
+                return body, True
+
+        try:
+            # 连接复用、超时和限速由共享会话负责
+            response = self._session.get(
+                self._platform_config.get_api_url(),
                 params=params,
                 headers=self._headers,
-                proxies=self._proxies,
-                verify=False,
+                verify=self._platform_config.get_http_config()["verify_ssl"],
             )
 
             response.raise_for_status()  # 检查请求是否成功
+        except requests.RequestException as e:
+            logging.error(f"请求航班信息失败: {e}")
+            return None, False
+
+        if self._platform_config.get_debug_config()["archive_responses"]:
+            self._archive_response(response.content)
+        return response.content, False
+
+    def cache_response_body(self, body: bytes) -> None:
+        """把已确认有效的响应写入响应缓存，没有缓存时什么也不做"""
+        if self._cache is not None:
+            self._cache.set(make_cache_key(self._platform_type, self._platform_config.get_search_params()), body)
+
+    def stream_flight_offers(self):
+        """
+        边下载边解码flightOffers，每读完一个航班就处理并产出
+
+        内存占用只与单个航班有关，按价格排序的响应可以更早拿到最便宜的航班。
+        完整读完响应后标记数据已加载，归档和缓存与非流式模式一致
+
+        Yields:
+            FlightOffer: 处理后的航班
+        """
+        processor = DataProcessorFactory.create_processor(self._platform_type)
+        for flight_offer in processor.iter_offers(self._iter_raw_offers()):
+            yield flight_offer
 
-            with open(self._save_file_path, "w", encoding="utf-8") as f:
-                f.write(response.text)
-                current_dir = os.path.dirname(os.path.abspath(__file__))
+    def _iter_raw_offers(self):
+        """逐个产出响应（或缓存）中的原始航班，读完后设置self._data_loaded"""
+        url = self._platform_config.get_api_url()
+        params = self._platform_config.get_search_params()
+        self._requested = True
+
+        cache_key = None
+        if self._cache is not None:
+            cache_key = make_cache_key(self._platform_type, params)
+            body = self._cache.get(cache_key)
+            if body is not None:
+                logging.info(f"命中缓存: {params.get('depart')} - {params.get('return')}")
+                try:
+                    for offer in iter_json_array([body], "flightOffers"):
+                        yield offer
+                except ValueError as e:
+                    logging.error(f"缓存的航班信息不是有效的JSON: {e}")
+                    return
+                self._data_loaded = True
+                return
+
+        try:
+            response = self._session.get(
+                url,
+                params=params,
+                headers=self._headers,
+                verify=self._platform_config.get_http_config()["verify_ssl"],
+                stream=True,
+            )
+        except requests.RequestException as e:
+            logging.error(f"请求航班信息失败: {e}")
+            return
 
-                logging.info(f"航班信息已保存到 {self._save_file_path}")
+        archive_file = None
+        # 缓存开启时边下载边压缩，只保留压缩后的数据
+        compressed = [] if cache_key is not None else None
+        try:
+            response.raise_for_status()
+            if self._platform_config.get_debug_config()["archive_responses"]:
+                archive_file = self._open_archive_file()
+
+            chunks = self._tee_chunks(response.iter_content(chunk_size=STREAM_CHUNK_SIZE),
+                                      archive_file, compressed)
+            for offer in iter_json_array(chunks, "flightOffers"):
+                yield offer
+            # 读完数组之后的剩余部分，保证归档和缓存的是完整响应
+            for _ in chunks:
+                pass
         except requests.RequestException as e:
             logging.error(f"请求航班信息失败: {e}")
+            return
+        except ValueError as e:
+            logging.error(f"航班信息不是有效的JSON: {e}")
+            return
+        finally:
+            response.close()
+            if archive_file is not None:
+                archive_file.close()
+
+        self._data_loaded = True
+        if compressed is not None:
+            self._cache.set(cache_key, b"".join(compressed), compressed=True)
+
+    @staticmethod
+    def _tee_chunks(chunks, archive_file, compressed):
+        """
+        产出响应块，同时写入归档文件并压缩到compressed列表
+
+        Args:
+            chunks: 响应块
+            archive_file: 归档文件，None则不归档
+            compressed: 收集zlib压缩结果的列表，None则不压缩
+        """
+        compressor = zlib.compressobj() if compressed is not None else None
+        for chunk in chunks:
+            if archive_file is not None:
+                archive_file.write(chunk)
+            if compressor is not None:
+                compressed.append(compressor.compress(chunk))
+            yield chunk
+        if compressor is not None:
+            compressed.append(compressor.flush())
+
+    def _archive_response(self, body: bytes) -> None:
+        """把原始响应保存到归档目录，用于调试，文件不会被自动删除"""
+        archive_file = self._open_archive_file()
+        if archive_file is None:
+            return
+        with archive_file:
+            try:
+                archive_file.write(body)
+            except OSError as e:
+                logging.warning(f"归档原始响应失败: {e}")
+
+    def _open_archive_file(self):
+        """在归档目录中创建本次响应的归档文件，失败时返回None"""
+        try:
+            archive_dir = self._platform_config.get_debug_config()["archive_dir"]
+            if not os.path.isabs(archive_dir):
+                archive_dir = os.path.join(repo_root, archive_dir)
+            os.makedirs(archive_dir, exist_ok=True)
+
+            params = self._platform_config.get_search_params() or {}
+            filename = (f"flights_{params.get('from', '')}_{params.get('to', '')}_"
+                        f"{params.get('depart', '')}_{params.get('return', '')}_{uuid.uuid4().hex[:8]}.json")
+            filepath = os.path.join(archive_dir, filename)
+            archive_file = open(filepath, "wb")
+            logging.info(f"原始响应将归档到 {filepath}")
+            return archive_file
+        except OSError as e:
+            logging.warning(f"归档原始响应失败: {e}")
             return None
 
     def parse_flights(self) -> None:
-        """解析flights.json文件"""
-        if not os.path.exists(self._save_file_path):
-            logging.error(f"{self._save_file_path}文件不存在")
-            logging.info("重新请求航班信息")
+        """解析航班数据，还没有请求过时先请求（失败重试由会话的重试策略负责）"""
+        if self._data_loaded:
+            return
+
+        if self._raw_data is None and not self._requested:
+            logging.info("内存中没有航班数据，请求航班信息")
             self.requests_flight_info()
 
-        if os.path.exists(self._save_file_path):
-            with open(self._save_file_path, "r", encoding="utf-8") as f:
-                self._raw_data = json.load(f)
-        else:
-            logging.error(f"无法加载航班数据文件")
+        if self._raw_data is None and not self._data_loaded:
+            logging.error(f"无法加载航班数据")
 
 
 
@@ -131,7 +332,7 @@ class BookingScraper(FlightScraper):
         if not self.load_data() or index >= len(self._processed_offers):
             logging.error("数据未加载或索引超出范围")
             return None
-        return self._processed_offers[index].price
+        return self._processed_offers[index].price.to_dict()
 
     def parse_time(self, index=0):
         """
@@ -159,8 +360,8 @@ class BookingScraper(FlightScraper):
             logging.error("数据未加载或索引超出范围")
             return None
         return {
-            "outbound": self._processed_offers[index].outbound.time_info,
-            "inbound": self._processed_offers[index].inbound.time_info
+            "outbound": self._processed_offers[index].outbound.time_info.to_dict(),
+            "inbound": self._processed_offers[index].inbound.time_info.to_dict()
         }
 
     def parse_airport(self, index=0):
@@ -171,14 +372,14 @@ class BookingScraper(FlightScraper):
         flight = self._processed_offers[index]
         return {
             "outbound": {
-                "departure": flight.outbound.departure,
-                "arrival": flight.outbound.arrival,
-                "transit": flight.outbound.transit
+                "departure": flight.outbound.departure.name,
+                "arrival": flight.outbound.arrival.name,
+                "transit": [airport.name for airport in flight.outbound.transit]
             },
             "inbound": {
-                "departure": flight.inbound.departure,
-                "arrival": flight.inbound.arrival,
-                "transit": flight.inbound.transit
+                "departure": flight.inbound.departure.name,
+                "arrival": flight.inbound.arrival.name,
+                "transit": [airport.name for airport in flight.inbound.transit]
             }
         }
 
@@ -190,12 +391,12 @@ class BookingScraper(FlightScraper):
         flight = self._processed_offers[index]
         return {
             "outbound": {
-                "main_carrier": flight.outbound.main_carrier,
-                "leg_carriers": flight.outbound.leg_carriers
+                "main_carrier": _carrier_dict(flight.outbound.main_carrier),
+                "leg_carriers": [carrier.to_dict() for carrier in flight.outbound.leg_carriers]
             },
             "inbound": {
-                "main_carrier": flight.inbound.main_carrier,
-                "leg_carriers": flight.inbound.leg_carriers
+                "main_carrier": _carrier_dict(flight.inbound.main_carrier),
+                "leg_carriers": [carrier.to_dict() for carrier in flight.inbound.leg_carriers]
             }
         }
 
@@ -203,7 +404,7 @@ class BookingScraper(FlightScraper):
         """兼容抽象类的接口，实际调用已处理的数据"""
         if not self.load_data() or index >= len(self._processed_offers):
             return None
-        return self._processed_offers[index].luggage
+        return self._processed_offers[index].luggage.to_dict()
 
     def parse_link(self, index=0):
         """
@@ -216,7 +417,7 @@ class BookingScraper(FlightScraper):
         }
         """
         if not self.load_data() or not self._processed_offers:
-            logging.error("数据未加载, 可能是因为没有获取到flight.json文件")
+            logging.error("数据未加载, 可能是因为没有获取到航班信息")
             return None
         try:
             # 获取指定页码的航班信息
@@ -226,9 +427,8 @@ class BookingScraper(FlightScraper):
             link_info = {}
 
             # 检查token是否存在
-            if "token" in flight_offer:
-                token = flight_offer["token"]
-                link_info["token"] = token
+            if flight_offer.token:
+                link_info["token"] = flight_offer.token
             else:
                 logging.warning(f"在航班 {index} 中未找到token信息")
 
@@ -274,11 +474,11 @@ class BookingScraper(FlightScraper):
                 # 获取价格信息
                 price_info = flight.price
                 if price_info:
-                    all_info.append(f"价格: {price_info['total']} {price_info['currency']}")
+                    all_info.append(f"价格: {price_info.total} {price_info.currency}")
 
                 # 获取航空公司信息
-                outbound_carrier = flight.outbound.main_carrier
-                inbound_carrier = flight.inbound.main_carrier
+                outbound_carrier = _carrier_dict(flight.outbound.main_carrier)
+                inbound_carrier = _carrier_dict(flight.inbound.main_carrier)
                 all_info.append(
                     f"主要承运商: {outbound_carrier.get('name', '')} ({outbound_carrier.get('code', '')})")
 
@@ -288,42 +488,42 @@ class BookingScraper(FlightScraper):
                         f"返程承运商: {inbound_carrier.get('name', '')} ({inbound_carrier.get('code', '')})")
 
                 # 去程信息
-                out_dep_time = flight.outbound.time_info["departure_time"].replace('T', ' ')
-                out_arr_time = flight.outbound.time_info["arrival_time"].replace('T', ' ')
+                out_dep_time = flight.outbound.time_info.departure_time.replace('T', ' ')
+                out_arr_time = flight.outbound.time_info.arrival_time.replace('T', ' ')
 
                 all_info.append("\n-- 去程 --")
                 all_info.append(
-                    f"{out_dep_time} {flight.outbound.departure} → {out_arr_time} {flight.outbound.arrival}")
-                all_info.append(f"飞行时间: {flight.outbound.time_info['total_time_formatted']}")
+                    f"{out_dep_time} {flight.outbound.departure.name} → {out_arr_time} {flight.outbound.arrival.name}")
+                all_info.append(f"飞行时间: {flight.outbound.time_info.total_time_formatted}")
 
                 # 去程中转信息
                 if flight.outbound.transit:
                     transit_info = []
                     for i, airport in enumerate(flight.outbound.transit):
-                        layover_time = flight.outbound.time_info['layovers'][i].layover_time_formatted
-                        transit_info.append(f"{airport} (停留 {layover_time})")
+                        layover_time = flight.outbound.time_info.layovers[i].layover_time_formatted
+                        transit_info.append(f"{airport.name} (停留 {layover_time})")
                     all_info.append(f"中转: {' → '.join(transit_info)}")
 
                 # 返程信息
-                in_dep_time = flight.inbound.time_info["departure_time"].replace('T', ' ')
-                in_arr_time = flight.inbound.time_info["arrival_time"].replace('T', ' ')
+                in_dep_time = flight.inbound.time_info.departure_time.replace('T', ' ')
+                in_arr_time = flight.inbound.time_info.arrival_time.replace('T', ' ')
 
                 all_info.append("\n-- 返程 --")
                 all_info.append(
-                    f"{in_dep_time} {flight.inbound.departure} → {in_arr_time} {flight.inbound.arrival}")
-                all_info.append(f"飞行时间: {flight.inbound.time_info['total_time_formatted']}")
+                    f"{in_dep_time} {flight.inbound.departure.name} → {in_arr_time} {flight.inbound.arrival.name}")
+                all_info.append(f"飞行时间: {flight.inbound.time_info.total_time_formatted}")
 
                 # 返程中转信息
                 if flight.inbound.transit:
                     transit_info = []
                     for i, airport in enumerate(flight.inbound.transit):
-                        layover_time = flight.inbound.time_info['layovers'][i].layover_time_formatted
-                        transit_info.append(f"{airport} (停留 {layover_time})")
+                        layover_time = flight.inbound.time_info.layovers[i].layover_time_formatted
+                        transit_info.append(f"{airport.name} (停留 {layover_time})")
                     all_info.append(f"中转: {' → '.join(transit_info)}")
 
                 # 获取行李额信息
-                luggage_info = flight.luggage
-                if luggage_info:
+                luggage_info = flight.luggage.to_dict()
+                if any(luggage_info.values()):
                     all_info.append("\n-- 行李额 --")
                     luggage_details = []
                     if luggage_info.get('personal'):
@@ -347,14 +547,6 @@ class BookingScraper(FlightScraper):
         except Exception as e:
             return f"获取航班信息时出错: {e}"
 
-    def __del__(self):
-        """析构函数，删除临时文件"""
-        try:
-            if hasattr(self, '_save_file_path') and os.path.exists(self._save_file_path):
-                os.remove(self._save_file_path)
-                logging.debug(f"临时文件已删除: {self._save_file_path}")
-        except Exception as e:
-            logging.warning(f"删除临时文件时出错: {e}")
 if __name__ == "__main__":
     logging.basicConfig(
         level=logging.DEBUG,
@@ -0,0 +1,134 @@
+# flight_scraper/platforms/booking/watch_daemon.py
+import logging
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional
+
+from flight_scraper.core.factory.factory import ScraperFactory
+from flight_scraper.core.scheduler.watch_scheduler import (RefreshPolicy, RequestBudget, WatchCell, WatchItem,
+                                                           WatchScheduler)
+from flight_scraper.platforms.booking.config import BookingConfig
+from flight_scraper.platforms.booking.multi_date_scraper import MultiDateBookingScraper
+
+# 没有到期的日期组合时最长睡眠时间，便于及时响应中断
+MAX_SLEEP_SECONDS = 60
+
+
+class WatchDaemon:
+    """
+    常驻的监控进程
+
+    持有监控列表中所有航线的日期组合，按距离出发的天数安排刷新频率，近期出发的刷新得更勤；
+    每次刷新的日期组合数量受全局请求预算限制。HTTP会话（连接池、限速器、代理池）和响应缓存
+    在整个进程生命周期内复用；所有航线共用一个MultiDateBookingScraper，同一轮到期的各航线日期组合
+    在同一个线程池中并发刷新
+    """
+
+    def __init__(self, config_data: Dict[str, Any],
+                 on_refresh: Optional[Callable[[MultiDateBookingScraper, List[WatchCell]], None]] = None,
+                 clock: Callable[[], float] = time.time, sleep: Callable[[float], None] = time.sleep):
+        """
+        Args:
+            config_data: Booking配置数据，监控列表和调度参数在booking.daemon中
+            on_refresh: 每轮刷新完成后调用，参数为爬虫和本次刷新的日期组合
+            clock: 时钟函数，测试时可以替换
+            sleep: 睡眠函数，测试时可以替换
+        """
+        self._config_data = config_data
+        self._on_refresh = on_refresh
+        self._clock = clock
+        self._sleep = sleep
+
+        daemon_config = BookingConfig(config_data).get_daemon_config()
+        self._items = OrderedDict()
+        for entry in daemon_config["watchlist"]:
+            item = WatchItem.from_config(entry)
+            self._items.setdefault(item.route, item)
+        if not self._items:
+            raise ValueError("监控列表为空，请在booking.daemon.watchlist中添加航线")
+
+        policy = RefreshPolicy(
+            min_interval=daemon_config["min_refresh_minutes"] * 60,
+            max_interval=daemon_config["max_refresh_hours"] * 3600,
+            near_days=daemon_config["near_days"],
+            far_days=daemon_config["far_days"],
+        )
+        budget = RequestBudget(daemon_config["requests_per_hour"], daemon_config["burst"])
+        self._scheduler = WatchScheduler(self._items.values(), policy, budget)
+        self._batch_size = daemon_config["batch_size"]
+
+        # 整个进程共享的会话和缓存
+        self._session = ScraperFactory.create_session("booking", config_data)
+        self._cache = ScraperFactory.create_cache("booking", config_data)
+        self._scraper = MultiDateBookingScraper(
+            config_data, session=self._session, cache=self._cache,
+            routes=[{"from": item.origin, "to": item.destination} for item in self._items.values()],
+            # 每轮只刷新少量日期组合，失败的日期组合会重新排队，不需要检查点
+            checkpoint=False
+        )
+
+    @property
+    def scheduler(self) -> WatchScheduler:
+        return self._scheduler
+
+    @property
+    def session(self):
+        """整个进程共享的HttpSession，通知也通过它发送"""
+        return self._session
+
+    def run_once(self) -> int:
+        """
+        刷新所有已到期的日期组合（受请求预算和batch_size限制）
+
+        Returns:
+            int: 本次刷新的日期组合数量
+        """
+        now = self._clock()
+        today = date.fromtimestamp(now)
+        self._scheduler.sync(now, today)
+        cells = self._scheduler.take_due(now, self._batch_size)
+        if not cells:
+            return 0
+
+        logging.info(f"刷新 {len({cell.route for cell in cells})} 条航线的 {len(cells)} 个日期组合")
+        try:
+            self._scraper.prepare_cells((cell.route, cell.depart_date, cell.return_date) for cell in cells)
+            self._scraper.scrape_all_dates()
+            if self._on_refresh is not None:
+                self._on_refresh(self._scraper, cells)
+        except Exception as e:
+            logging.error(f"刷新监控列表时出错: {e}")
+
+        # 无论成功与否都按刷新完成的时间重新排队，失败的日期组合不会占满请求预算
+        self._scheduler.reschedule(cells, self._clock(), today)
+        return len(cells)
+
+    def run(self, max_iterations: Optional[int] = None) -> None:
+        """
+        持续运行，直到被中断或达到max_iterations次刷新
+
+        Args:
+            max_iterations: 最多刷新几次，None表示一直运行
+        """
+        iterations = 0
+        logging.info(f"监控进程启动，共 {len(self._items)} 条航线")
+        while max_iterations is None or iterations < max_iterations:
+            if self.run_once():
+                iterations += 1
+                continue
+            now = self._clock()
+            wait = min(MAX_SLEEP_SECONDS, max(0.0, self._scheduler.next_wakeup(now) - now))
+            self._sleep(wait)
+
+    def close(self) -> None:
+        """关闭共享的会话和缓存"""
+        self._session.close()
+        if self._cache is not None:
+            self._cache.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1 @@
+# 跨平台元搜索：同一搜索条件并发请求所有启用的平台，合并为一个按价格排序的结果
@@ -0,0 +1,68 @@
+import os
+import sys
+
+project_root = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+)
+sys.path.append(project_root)
+
+from flight_scraper.core.platform_config import PlatformConfig
+
+
+class MetaSearchConfig(PlatformConfig):
+    """
+    跨平台元搜索配置类，继承自PlatformConfig
+    """
+    def _load_config(self):
+        """
+        加载配置文件
+
+        """
+        meta_config = self._config_data.get("meta_search", {})
+        self._search_condition = meta_config.get("search_condition") or {}
+        self._results_config = meta_config.get("results", {})
+        self._default_deadline = meta_config.get("deadline_seconds", 30)
+        self._platforms_config = meta_config.get("platforms") or []
+
+    def get_search_condition(self):
+        """
+        获取搜索条件
+
+        只需要填写各平台共用的字段（例如from、to、depart、return），覆盖各平台配置中的同名字段
+
+        :return: 搜索条件字典
+        """
+        return dict(self._search_condition)
+
+    def get_results_config(self):
+        """
+        获取合并结果的配置
+
+        :return: 包含top_k和dedupe的字典
+        """
+        return {
+            "top_k": self._results_config.get("top_k", 10),
+            "dedupe": self._results_config.get("dedupe", True),
+        }
+
+    def get_platforms(self):
+        """
+        获取参与搜索的平台列表
+
+        每一项的name是结果中显示的名称，platform是ScraperFactory中的平台名称，未填写时与name相同；
+        同一个平台可以用不同的name配置多次（例如同一接口的不同站点）
+
+        :return: 启用的平台列表，每项包含name、platform、deadline_seconds和requests_per_second
+        """
+        platforms = []
+        for entry in self._platforms_config:
+            if not entry.get("enable", True):
+                continue
+            platforms.append({
+                "name": entry["name"],
+                "platform": entry.get("platform", entry["name"]),
+                "deadline_seconds": entry.get("deadline_seconds", self._default_deadline),
+                # None表示使用该平台配置中的限速
+                "requests_per_second": entry.get("requests_per_second"),
+            })
+        return platforms
@@ -0,0 +1,236 @@
+# flight_scraper/platforms/meta_search/searcher.py
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from flight_scraper.core.data.data_models import FlightOffer
+from flight_scraper.core.data.offer_table import offer_row
+from flight_scraper.core.data.top_k import TopKCollector
+from flight_scraper.core.factory.factory import ScraperFactory
+from flight_scraper.platforms.meta_search.config import MetaSearchConfig
+
+
+@dataclass
+class PlatformResult:
+    """
+    一个平台本次搜索的结果
+    """
+    name: str
+    # 该平台最便宜的航班，按价格排序
+    offers: List[FlightOffer] = field(default_factory=list)
+    # 从开始搜索到该平台返回（或超时）的秒数
+    elapsed: float = 0.0
+    # 失败原因，成功时为空字符串
+    error: str = ""
+    # 超过截止时间，结果没有参与合并
+    timed_out: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return not self.error and not self.timed_out
+
+
+@dataclass
+class MetaSearchResult:
+    """
+    合并后的元搜索结果
+    """
+    search_condition: Dict[str, Any]
+    # 按价格排序的 (平台名称, 航班)
+    offers: List[Tuple[str, FlightOffer]]
+    # 按配置顺序排列的各平台结果
+    platforms: List[PlatformResult]
+
+    def rows(self) -> List[Dict[str, Any]]:
+        """展开为OfferTable的行，额外带有platform列"""
+        depart_date = self.search_condition.get("depart", "")
+        return_date = self.search_condition.get("return", "")
+        rows = []
+        for name, offer in self.offers:
+            row = offer_row(depart_date, return_date, offer.id, offer)
+            row["platform"] = name
+            rows.append(row)
+        return rows
+
+    def format_result(self) -> str:
+        """格式化为通知文本，每个航班一行，最后附上各平台的状态"""
+        lines = []
+        for row in self.rows():
+            lines.append(
+                f"平台: {row['platform']}, "
+                f"出发日期: {row['depart_date']}, 返程日期: {row['return_date']}, "
+                f"价格: {row['price']} {row['currency']}, "
+                f"起点: {row['origin']}, "
+                f"终点: {row['destination']}, "
+                f"航空公司: {row['airline']}"
+                f", 航班链接: {row['booking_link']}"
+            )
+        if not lines:
+            lines.append("没有找到航班")
+        for result in self.platforms:
+            if result.timed_out:
+                status = f"超时（{result.elapsed:.1f}秒）"
+            elif result.error:
+                status = f"失败: {result.error}"
+            else:
+                status = f"{len(result.offers)} 个航班（{result.elapsed:.1f}秒）"
+            lines.append(f"[{result.name}] {status}")
+        return "\n".join(lines)
+
+
+class MetaSearch:
+    """
+    跨平台元搜索
+
+    同一个搜索条件并发请求所有启用的平台，每个平台使用自己的HTTP会话，限速器、连接池和代理池互不影响。
+    各平台的航班统一为FlightOffer，按价格合并为一个Top-K结果；开启去重时不同平台上行程指纹相同的航班
+    只保留最便宜的一个。每个平台有自己的截止时间，先返回的平台立即合并，超过截止时间的平台不再等待，
+    其结果被丢弃。价格按各平台返回的金额直接比较，所有平台需要使用同一种货币搜索
+    """
+
+    def __init__(self, config_data: Dict[str, Any], platform_configs: Optional[Dict[str, Dict[str, Any]]] = None):
+        """
+        Args:
+            config_data: 元搜索配置数据，平台列表和合并参数在meta_search中
+            platform_configs: 平台名称（配置中的name）到该平台配置数据的映射，未提供的平台从配置文件加载
+
+        Raises:
+            ValueError: 没有启用的平台
+            Exception: 加载平台配置或创建会话失败时原样抛出，已经创建的会话会被关闭
+        """
+        self._config = MetaSearchConfig(config_data)
+        self._platforms = self._config.get_platforms()
+        if not self._platforms:
+            raise ValueError("元搜索没有启用的平台")
+        results_config = self._config.get_results_config()
+        self._top_k = results_config["top_k"] if results_config["top_k"] and results_config["top_k"] > 0 else None
+        self._dedupe = results_config["dedupe"]
+
+        platform_configs = platform_configs or {}
+        self._platform_configs = {}
+        self._sessions = {}
+        # 超过截止时间但仍在请求中的搜索，关闭会话前需要等待它们结束
+        self._outstanding = set()
+        try:
+            for entry in self._platforms:
+                name, platform = entry["name"], entry["platform"]
+                config = platform_configs.get(name)
+                if config is None:
+                    config = ScraperFactory._load_config(platform)
+                self._platform_configs[name] = config
+                # 每个平台一个会话，慢平台的限速和熔断不会拖慢其他平台
+                self._sessions[name] = ScraperFactory.create_session(
+                    platform, config, max_workers=1, requests_per_second=entry["requests_per_second"]
+                )
+        except Exception:
+            # 调用方拿不到实例，无法调用close，已经创建的会话在这里关闭
+            for session in self._sessions.values():
+                session.close()
+            raise
+
+    @property
+    def platforms(self) -> List[str]:
+        """启用的平台名称，按配置顺序排列"""
+        return [entry["name"] for entry in self._platforms]
+
+    def session(self, name: str):
+        """指定平台使用的HttpSession"""
+        return self._sessions[name]
+
+    def _search_platform(self, entry: Dict[str, Any], search_condition: Dict[str, Any]) -> List[FlightOffer]:
+        """
+        在一个平台上搜索
+
+        Returns:
+            List[FlightOffer]: 该平台最便宜的top_k个航班
+
+        Raises:
+            RuntimeError: 没有获取到航班数据
+        """
+        name, platform = entry["name"], entry["platform"]
+        config = ScraperFactory.apply_search_condition(platform, self._platform_configs[name], search_condition)
+        scraper = ScraperFactory.create_scraper(platform, config, session=self._sessions[name],
+                                                max_offers=self._top_k, dedupe=self._dedupe)
+        scraper.requests_flight_info()
+        if not scraper.load_data():
+            raise RuntimeError("没有获取到航班数据")
+        offers = scraper._processed_offers
+        return list(offers if self._top_k is None else offers[:self._top_k])
+
+    def search(self, search_condition: Optional[Dict[str, Any]] = None) -> MetaSearchResult:
+        """
+        并发搜索所有启用的平台并合并结果
+
+        Args:
+            search_condition: 搜索条件，覆盖配置中meta_search.search_condition的同名字段
+
+        Returns:
+            MetaSearchResult: 合并后的结果
+        """
+        condition = dict(self._config.get_search_condition(), **(search_condition or {}))
+        start = time.monotonic()
+        # 每次搜索使用新的线程池，上次超时的平台仍占用的线程不会让这次的搜索排队
+        executor = ThreadPoolExecutor(max_workers=len(self._platforms), thread_name_prefix="meta-search")
+        deadlines = {}
+        futures = {}
+        for order, entry in enumerate(self._platforms):
+            future = executor.submit(self._search_platform, entry, condition)
+            futures[future] = order
+            deadlines[future] = start + entry["deadline_seconds"]
+
+        results = [PlatformResult(entry["name"]) for entry in self._platforms]
+        collector = TopKCollector(self._top_k)
+        pending = set(futures)
+        while pending:
+            timeout = max(0.0, min(deadlines[future] for future in pending) - time.monotonic())
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            now = time.monotonic()
+            for future in done:
+                order = futures[future]
+                result = results[order]
+                result.elapsed = now - start
+                try:
+                    result.offers = future.result()
+                except Exception as e:
+                    result.error = str(e) or type(e).__name__
+                    logging.error(f"平台 {result.name} 搜索失败: {result.error}")
+                    continue
+                logging.info(f"平台 {result.name} 返回 {len(result.offers)} 个航班，用时 {result.elapsed:.1f} 秒")
+                # 价格相同时按平台的配置顺序和平台内的排名排列，合并结果与各平台返回的先后无关
+                collector.extend(
+                    ((offer.price.minor_units, order, rank), (result.name, offer),
+                     offer.fingerprint if self._dedupe and offer.fingerprint else None)
+                    for rank, offer in enumerate(result.offers)
+                )
+            for future in [future for future in pending if deadlines[future] <= now]:
+                pending.discard(future)
+                # 还没开始的搜索直接取消，已经在请求中的线程结束后结果被忽略
+                if not future.cancel():
+                    self._outstanding.add(future)
+                result = results[futures[future]]
+                result.timed_out = True
+                result.elapsed = now - start
+                logging.warning(f"平台 {result.name} 超过截止时间 {deadlines[future] - start:.1f} 秒，结果被丢弃")
+        executor.shutdown(wait=False)
+
+        currencies = {offer.price.currency for _, offer in collector.sorted_items()}
+        if len(currencies) > 1:
+            logging.warning(f"各平台返回的货币不一致: {', '.join(sorted(currencies))}，价格排序可能不准确")
+        return MetaSearchResult(condition, collector.sorted_items(), results)
+
+    def close(self) -> None:
+        """等待超时后仍在请求中的搜索结束，然后关闭所有平台的会话"""
+        if self._outstanding:
+            logging.info(f"等待 {len(self._outstanding)} 个超时的平台搜索结束")
+            wait(self._outstanding)
+            self._outstanding.clear()
+        for session in self._sessions.values():
+            session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,139 @@
+import unittest
+import json
+import os
+import sys
+import tempfile
+from unittest import mock
+
+project_root = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+sys.path.append(project_root)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from flight_scraper.core.factory.factory import ScraperFactory
+from flight_scraper.core.http.response_cache import ResponseCache
+from sample_data import make_response
+
+
+class FakeResponse:
+    """模拟requests.Response"""
+
+    def __init__(self, body, status_code=200):
+        self.content = json.dumps(body).encode("utf-8")
+        self.status_code = status_code
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size=1):
+        for i in range(0, len(self.content), chunk_size):
+            yield self.content[i:i + chunk_size]
+
+    def close(self):
+        pass
+
+
+class TestBookingScraper(unittest.TestCase):
+    """测试BookingScraper的请求和解析流程"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.test_config = {
+            "booking": {
+                "api_url": "https://test-api.example.com",
+                "booking_search_condition": {
+                    "from": "MAD.AIRPORT",
+                    "to": "SHA.CITY",
+                    "depart": "2025-07-14",
+                    "return": "2025-08-19",
+                },
+                "debug": {"archive_responses": False, "archive_dir": self.tmp_dir.name},
+            }
+        }
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _scraper(self, body):
+        scraper = ScraperFactory.create_scraper("booking", self.test_config)
+        scraper._session = mock.Mock()
+        scraper._session.get.return_value = FakeResponse(body)
+        return scraper
+
+    def test_parse_in_memory(self):
+        """响应直接解码到内存，不写临时文件"""
+        cwd_files = set(os.listdir("."))
+        scraper = self._scraper(make_response([620, 480]))
+        scraper.requests_flight_info()
+        self.assertTrue(scraper.load_data())
+        self.assertEqual(len(scraper._processed_offers), 2)
+        # 航班按价格排序
+        self.assertEqual([scraper.parse_price(i)["total"] for i in range(2)], [480, 620])
+        self.assertEqual(set(os.listdir(".")), cwd_files)
+        self.assertEqual(os.listdir(self.tmp_dir.name), [])
+        scraper._session.get.assert_called_once()
+        # 处理完成后不再保留原始响应
+        self.assertIsNone(scraper._raw_data)
+
+    def test_stream_decode(self):
+        """流式解码的结果与一次性解码一致，并且写入的缓存可以被非流式模式读取"""
+        self.test_config["booking"]["processing"] = {"stream_decode": True}
+        with ResponseCache(os.path.join(self.tmp_dir.name, "cache.db")) as cache:
+            scraper = ScraperFactory.create_scraper("booking", self.test_config, cache=cache)
+            scraper._session = mock.Mock()
+            scraper._session.get.return_value = FakeResponse(make_response([620, 480]))
+            scraper.requests_flight_info()
+            self.assertTrue(scraper.load_data())
+            self.assertEqual([scraper.parse_price(i)["total"] for i in range(2)], [480, 620])
+            self.assertIsNone(scraper._raw_data)
+            self.assertTrue(scraper._session.get.call_args.kwargs["stream"])
+
+            del self.test_config["booking"]["processing"]
+            cached = ScraperFactory.create_scraper("booking", self.test_config, cache=cache)
+            cached._session = mock.Mock()
+            cached.requests_flight_info()
+            cached._session.get.assert_not_called()
+            self.assertEqual(cached._raw_data, make_response([620, 480]))
+
+    def test_stream_decode_invalid_json(self):
+        """流式模式下响应不是JSON时不加载数据"""
+        self.test_config["booking"]["processing"] = {"stream_decode": True}
+        scraper = self._scraper({})
+        scraper._session.get.return_value.content = b"<html>blocked</html>"
+        scraper.requests_flight_info()
+        self.assertFalse(scraper.load_data())
+
+    def test_archive_responses(self):
+        """开启归档时保存原始响应"""
+        self.test_config["booking"]["debug"]["archive_responses"] = True
+        scraper = self._scraper(make_response([620]))
+        scraper.requests_flight_info()
+        archived = os.listdir(self.tmp_dir.name)
+        self.assertEqual(len(archived), 1)
+        with open(os.path.join(self.tmp_dir.name, archived[0]), "r", encoding="utf-8") as f:
+            self.assertEqual(json.load(f), make_response([620]))
+
+    def test_cache_hit_skips_network(self):
+        """命中缓存时不发请求"""
+        with ResponseCache(os.path.join(self.tmp_dir.name, "cache.db")) as cache:
+            first = ScraperFactory.create_scraper("booking", self.test_config, cache=cache)
+            first._session = mock.Mock()
+            first._session.get.return_value = FakeResponse(make_response([620]))
+            first.requests_flight_info()
+
+            second = ScraperFactory.create_scraper("booking", self.test_config, cache=cache)
+            second._session = mock.Mock()
+            second.requests_flight_info()
+            second._session.get.assert_not_called()
+            self.assertEqual(second._raw_data, make_response([620]))
+
+    def test_invalid_json(self):
+        """响应不是JSON时不抛出异常"""
+        scraper = self._scraper({})
+        scraper._session.get.return_value.content = b"<html>blocked</html>"
+        scraper.requests_flight_info()
+        self.assertIsNone(scraper._raw_data)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+import unittest
+import os
+import pickle
+import sys
+
+project_root = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+sys.path.append(project_root)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from flight_scraper.core.data.data_models import Price, TimeInfo, intern_airport, intern_carrier
+from flight_scraper.core.data.data_formatter import parse_iso_times
+from flight_scraper.core.data.processor.processor_factory import DataProcessorFactory
+from sample_data import MAD, PEK, PVG, make_leg, make_response, make_segment
+
+
+class TestDataModels(unittest.TestCase):
+    """测试紧凑的航班数据模型"""
+
+    def test_price_minor_units(self):
+        price = Price.from_units_nanos(620, 990000000, "EUR")
+        self.assertEqual(price.minor_units, 62099)
+        self.assertEqual(price.to_dict(), {"total": 620.99, "currency": "EUR", "units": 620, "nanos": 990000000})
+        self.assertEqual(Price.from_units_nanos(15000, 0, "JPY").minor_units, 15000)
+
+    def test_slots_and_pickle(self):
+        """实例没有__dict__，可以被pickle"""
+        airport = intern_airport("Madrid", code="MAD")
+        time_info = TimeInfo("2025-07-14T10:15:00", "2025-07-14T23:55:00", 49200)
+        for value in (airport, time_info, Price(100)):
+            self.assertFalse(hasattr(value, "__dict__"))
+            self.assertEqual(pickle.loads(pickle.dumps(value)), value)
+        self.assertEqual(time_info.total_time_formatted, "13h 40m")
+
+    def test_offers_share_airports_and_carriers(self):
+        """不同航班引用同一个机场和航空公司实例"""
+        processor = DataProcessorFactory.create_processor("booking", make_response([620, 480, 530]))
+        offers = processor.process()
+        self.assertEqual(len(offers), 3)
+        self.assertIs(offers[0].outbound.departure, offers[1].outbound.departure)
+        self.assertIs(offers[0].outbound.main_carrier, offers[2].outbound.main_carrier)
+        self.assertIs(offers[0].outbound.main_carrier, intern_carrier(
+            offers[0].outbound.main_carrier.name, offers[0].outbound.main_carrier.code,
+            offers[0].outbound.main_carrier.logo))
+        self.assertIs(offers[0].luggage, offers[1].luggage)
+        self.assertEqual(offers[0].price.total, 480)
+
+
+
+class TestTimeDecoding(unittest.TestCase):
+    """测试批量时间解码"""
+
+    def test_parse_iso_times(self):
+        local, utc = parse_iso_times([
+            "2025-07-14T10:15:00", "2025-07-14T10:15:00.000Z",
+            "2025-07-14T10:15:00+02:00", "2025-07-14T10:15:00-0330",
+        ])
+        self.assertTrue((local == local[0]).all())
+        self.assertEqual([str(value) for value in utc], [
+            "2025-07-14T10:15:00", "2025-07-14T10:15:00",
+            "2025-07-14T08:15:00", "2025-07-14T13:45:00",
+        ])
+        with self.assertRaises(ValueError):
+            parse_iso_times(["2025-07-14T10:15:00 UTC+8"])
+
+    def test_layovers_with_timezone_offsets(self):
+        """带时区的时间按UTC计算停留时间"""
+        raw_data = make_response([620])
+        legs = [
+            make_leg(MAD, PEK, "2025-07-14T08:00:00+02:00", "2025-07-15T01:30:00+08:00"),
+            make_leg(PEK, PVG, "2025-07-14T21:00:00+02:00", "2025-07-15T06:00:00+08:00"),
+        ]
+        raw_data["flightOffers"][0]["segments"][0] = make_segment(legs, 16 * 3600)
+        offer = DataProcessorFactory.create_processor("booking", raw_data).process()[0]
+        layover = offer.outbound.time_info.layovers[0]
+        self.assertEqual(layover.layover_time_seconds, 5400)
+        self.assertEqual(layover.layover_time_formatted, "1h 30m")
+
+    def test_invalid_time_skips_only_that_offer(self):
+        raw_data = make_response([620, 480, 530])
+        raw_data["flightOffers"][1]["segments"][0]["legs"][0]["arrivalTime"] = "not a time"
+        with self.assertLogs(level="ERROR"):
+            offers = list(DataProcessorFactory.create_processor("booking", raw_data).process())
+        self.assertEqual([offer.price.total for offer in offers], [530, 620])
+
+    def test_stream_batches_match_full_batch(self):
+        raw_data = make_response(list(range(100, 170)))
+        full = DataProcessorFactory.create_processor("booking", raw_data).process()
+        streamed = list(DataProcessorFactory.create_processor("booking").iter_offers(
+            iter(raw_data["flightOffers"]), batch_size=8))
+        self.assertEqual(list(full), streamed)
+
+
+
+class TestLazyProcessing(unittest.TestCase):
+    """测试两阶段按需处理"""
+
+    def test_only_accessed_offers_are_materialized(self):
+        raw_data = make_response([300, 100, 200, 400, 150])
+        offers = DataProcessorFactory.create_processor("booking", raw_data).process()
+        self.assertEqual([offers.price(i).total for i in range(len(offers))], [100, 150, 200, 300, 400])
+        self.assertEqual(offers.materialized_count, 0)
+
+        cheapest = offers[:2]
+        self.assertEqual([offer.price.total for offer in cheapest], [100, 150])
+        # 原始序号保留在FlightOffer.id中
+        self.assertEqual([offer.id for offer in cheapest], [1, 4])
+        self.assertEqual(offers.materialized_count, 2)
+
+    def test_keep_limits_raw_data(self):
+        raw_data = make_response([300, 100, 200, 400, 150])
+        offers = DataProcessorFactory.create_processor("booking", raw_data).process(keep=3)
+        self.assertEqual(len(offers), 3)
+        self.assertEqual([offer.price.total for offer in offers], [100, 150, 200])
+
+    def test_failed_offer_is_removed_on_access(self):
+        raw_data = make_response([100, 200, 300])
+        del raw_data["flightOffers"][0]["segments"][0]["legs"][0]["arrivalAirport"]
+        offers = DataProcessorFactory.create_processor("booking", raw_data).process()
+        self.assertEqual(len(offers), 3)
+        with self.assertLogs(level="ERROR"):
+            self.assertEqual(offers[0].price.total, 200)
+        self.assertEqual(len(offers), 2)
+
+    def test_failed_offer_is_replaced_within_keep(self):
+        raw_data = make_response([300, 100, 200, 400, 150])
+        del raw_data["flightOffers"][4]["segments"][0]["legs"][0]["arrivalAirport"]
+        offers = DataProcessorFactory.create_processor("booking", raw_data).process(keep=3)
+        self.assertEqual(len(offers), 3)
+        with self.assertLogs(level="ERROR"):
+            self.assertEqual([offer.price.total for offer in offers[:3]], [100, 200, 300])
+        self.assertEqual(len(offers), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import unittest
+import importlib.util
+import os
+import sys
+import tempfile
+from datetime import date
+from unittest import mock
+
+import pandas as pd
+from openpyxl import load_workbook
+
+project_root = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+sys.path.append(project_root)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from flight_scraper.core.data.exporters import LINK_TEXT, ParquetWriter, export_table, get_writer, parquet_frame
+from flight_scraper.core.data.offer_table import EXPORT_COLUMNS, OfferTable
+from flight_scraper.core.data.processor.processor_factory import DataProcessorFactory
+from sample_data import make_response
+
+
+class TestExporters(unittest.TestCase):
+    """测试CSV和Excel导出"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        offers = DataProcessorFactory.create_processor("booking", make_response(range(400, 430))).process()
+        self.table = OfferTable.from_offers(("2025-07-14", "2025-08-19", offer.id, offer) for offer in offers)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_export_chunks(self):
+        chunks = list(self.table.export_chunks(chunk_size=7))
+        self.assertEqual([len(chunk) for chunk in chunks], [7, 7, 7, 7, 2])
+        pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), self.table.to_export_frame())
+        self.assertEqual(list(OfferTable().export_chunks()), [])
+
+    def test_csv(self):
+        path = export_table(self.table, os.path.join(self.tmp_dir.name, "flights.csv"), "csv")
+        with open(path, encoding="utf-8") as f:
+            first_line = f.readline()
+        self.assertTrue(first_line.startswith('"departure_date","return_date"'))
+        exported = pd.read_csv(path, dtype=str, keep_default_na=False)
+        expected = self.table.to_export_frame().astype(str)
+        pd.testing.assert_frame_equal(exported, expected)
+
+    def test_csv_escaping(self):
+        # 标准CSV：双引号加倍，反斜杠原样写入
+        self.table.frame.loc[0, "booking_link"] = 'https://example.com/?q="a,b"\\c'
+        path = export_table(self.table, os.path.join(self.tmp_dir.name, "flights.csv"), "csv")
+        with open(path, encoding="utf-8") as f:
+            f.readline()
+            first_row = f.readline()
+        self.assertTrue(first_row.rstrip("\r\n").endswith('"https://example.com/?q=""a,b""\\c"'))
+        exported = pd.read_csv(path, dtype=str, keep_default_na=False)
+        self.assertEqual(exported["booking_link"][0], 'https://example.com/?q="a,b"\\c')
+
+    def test_xlsx_links(self):
+        path = export_table(self.table, os.path.join(self.tmp_dir.name, "flights.xlsx"), "XLSX")
+        worksheet = load_workbook(path)["Flights"]
+        rows = list(worksheet.iter_rows(values_only=True))
+        self.assertEqual(list(rows[0]), EXPORT_COLUMNS)
+        self.assertEqual(len(rows), len(self.table) + 1)
+        self.assertEqual(rows[1][2], 400)
+
+        link_cell = worksheet.cell(row=2, column=EXPORT_COLUMNS.index("booking_link") + 1)
+        self.assertEqual(link_cell.value, LINK_TEXT)
+        self.assertEqual(link_cell.hyperlink.target, self.table.frame["booking_link"][0])
+        self.assertTrue(link_cell.font.underline)
+
+    def test_parquet_frame_types(self):
+        frame = parquet_frame(self.table, observed_at=1752480000)
+        self.assertEqual(frame["depart_date"][0], date(2025, 7, 14))
+        self.assertEqual(str(frame["price_minor"].dtype), "int64")
+        self.assertEqual(str(frame["outbound_departure_time"].dtype), "datetime64[ns]")
+        self.assertEqual(str(frame["observed_at"][0]), "2025-07-14 08:00:00+00:00")
+        self.assertTrue(frame["price_minor"].is_monotonic_increasing)
+        self.assertEqual(frame["airline"][0], "Air China")
+
+    def test_parquet_partition(self):
+        writer = ParquetWriter(route="MAD.AIRPORT-SHA.CITY", observed_at=1752480000)
+        self.assertEqual(writer.partition_dir("root"),
+                         os.path.join("root", "route=MAD.AIRPORT-SHA.CITY", "observed_date=2025-07-14"))
+
+    def test_parquet_requires_pyarrow(self):
+        with mock.patch.dict(sys.modules, {"pyarrow": None, "pyarrow.parquet": None}):
+            with self.assertRaises(ImportError):
+                export_table(self.table, self.tmp_dir.name, "parquet")
+
+    @unittest.skipUnless(importlib.util.find_spec("pyarrow"), "需要pyarrow")
+    def test_parquet_append_and_filter(self):
+        import pyarrow.dataset as ds
+
+        root = os.path.join(self.tmp_dir.name, "parquet")
+        export_table(self.table, root, "parquet", route="MAD.AIRPORT-SHA.CITY", observed_at=1752480000)
+        export_table(self.table, root, "parquet", route="MAD.AIRPORT-SHA.CITY", observed_at=1752566400)
+        dataset = ds.dataset(root, format="parquet", partitioning="hive")
+        self.assertEqual(dataset.count_rows(), 2 * len(self.table))
+        cheap = dataset.to_table(filter=(ds.field("depart_date") == date(2025, 7, 14)) & (ds.field("price") < 405))
+        self.assertEqual(cheap.num_rows, 10)
+        self.assertEqual(str(cheap.schema.field("depart_date").type), "date32[day]")
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            get_writer("pdf")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+import os
+import random
+import sys
+
+project_root = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+sys.path.append(project_root)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from flight_scraper.core.data.fingerprint import FingerprintIndex, fingerprint_legs
+from flight_scraper.core.data.processor.booking_processor import BookingDataProcessor
+from flight_scraper.core.data.top_k import TopKCollector
+from sample_data import make_offer
+
+
+class TestFingerprint(unittest.TestCase):
+    """测试行程指纹和去重"""
+
+    def test_fare_brands_share_fingerprint(self):
+        """价格、token和行李额不同的同一行程指纹相同"""
+        basic = make_offer(480, token="basic", cabin_label="1 cabin bag")
+        flex = make_offer(620, token="flex", cabin_label="2 cabin bags")
+        self.assertEqual(BookingDataProcessor.fingerprint(basic), BookingDataProcessor.fingerprint(flex))
+        self.assertNotEqual(BookingDataProcessor.fingerprint(basic),
+                            BookingDataProcessor.fingerprint(make_offer(480, carrier="MU")))
+        self.assertNotEqual(BookingDataProcessor.fingerprint(basic),
+                            BookingDataProcessor.fingerprint(make_offer(480, depart="2025-07-15")))
+
+    def test_segment_boundary(self):
+        legs = [("MAD", "PEK"), None, ("PEK", "MAD")]
+        self.assertNotEqual(fingerprint_legs(legs), fingerprint_legs([("MAD", "PEK"), ("PEK", "MAD"), None]))
+        self.assertEqual(len(fingerprint_legs(legs)), 16)
+
+    def test_rank_keeps_cheapest_copy(self):
+        offers = [
+            make_offer(620, token="flex"),
+            make_offer(700, token="mu", carrier="MU"),
+            make_offer(480, token="basic"),
+            make_offer(550, token="standard"),
+        ]
+        ranked = BookingDataProcessor().rank(offers, dedupe=True)
+        self.assertEqual([ranked.token(i) for i in range(len(ranked))], ["basic", "mu"])
+        stats = ranked.fingerprints.get(ranked[0].fingerprint)
+        self.assertEqual((stats.copies, stats.min_price, stats.max_price), (3, 48000, 62000))
+        self.assertEqual(stats.spread, 14000)
+        self.assertEqual(ranked.fingerprints.duplicates, 2)
+
+    def test_without_dedupe_keeps_all(self):
+        offers = [make_offer(620, token="flex"), make_offer(480, token="basic")]
+        ranked = BookingDataProcessor().rank(offers)
+        self.assertEqual(len(ranked), 2)
+        self.assertIsNone(ranked.fingerprints)
+
+    def test_index_merges_stats(self):
+        index = FingerprintIndex()
+        index.add("a", 500, copies=3, max_price=900)
+        index.add("a", 400)
+        index.add("b", 700)
+        stats = index.get("a")
+        self.assertEqual((stats.copies, stats.min_price, stats.max_price), (4, 400, 900))
+        self.assertEqual(len(index), 2)
+        self.assertEqual(index.duplicates, 3)
+
+
+class TestGroupedTopK(unittest.TestCase):
+    """测试TopKCollector按分组去重"""
+
+    def test_order_independent(self):
+        """任意收集顺序下，结果都等于每组最小值中最小的K个"""
+        entries = [((random.randint(0, 200), i), i, random.randint(0, 30)) for i in range(300)]
+        best = {}
+        for key, item, group in entries:
+            if group not in best or key < best[group][0]:
+                best[group] = (key, item)
+        expected = [item for _, item in sorted(best.values())][:8]
+        for _ in range(20):
+            random.shuffle(entries)
+            collector = TopKCollector(8)
+            collector.extend(entries)
+            self.assertEqual(collector.sorted_items(), expected)
+
+    def test_replaces_worse_copy(self):
+        collector = TopKCollector(2)
+        collector.push((5,), "a-expensive", "a")
+        collector.push((6,), "b", "b")
+        self.assertTrue(collector.push((1,), "a-cheap", "a"))
+        self.assertFalse(collector.push((3,), "a-middle", "a"))
+        self.assertEqual(collector.sorted_items(), ["a-cheap", "b"])
+
+
+if __name__ == "__main__":
+    unittest.main()
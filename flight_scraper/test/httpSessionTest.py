@@ -0,0 +1,260 @@
+import unittest
+import email.utils
+import os
+import sys
+import threading
+import time
+from unittest import mock
+
+import requests
+
+project_root = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+sys.path.append(project_root)
+from flight_scraper.core.http.session import HttpSession, get_default_session
+from flight_scraper.core.factory.factory import ScraperFactory
+from flight_scraper.core.http.adaptive import AdaptiveController, CircuitOpenError
+from flight_scraper.core.http.rate_limiter import RateLimiter
+from flight_scraper.core.http.retry import RetryPolicy, LatencyTracker
+
+
+class TestHttpSession(unittest.TestCase):
+    """测试共享的HTTP会话"""
+
+    def setUp(self):
+        self.test_config = {
+            "booking": {
+                "api_url": "https://test-api.example.com",
+                "booking_search_condition": {"from": "NYC", "to": "LON"},
+                "concurrency": {"max_workers": 3, "requests_per_second": 0},
+                "http": {"connect_timeout": 2, "read_timeout": 7},
+            }
+        }
+
+    def test_default_timeout(self):
+        """未指定timeout时使用会话的连接/读取超时"""
+        session = HttpSession(connect_timeout=2, read_timeout=7)
+        with mock.patch.object(session._session, "request") as request:
+            session.get("https://test-api.example.com/a")
+            session.get("https://test-api.example.com/b", timeout=1)
+        self.assertEqual(request.call_args_list[0].kwargs["timeout"], (2, 7))
+        self.assertEqual(request.call_args_list[1].kwargs["timeout"], 1)
+
+    def test_pool_sized_to_concurrency(self):
+        """工厂按并发数设置连接池大小"""
+        with ScraperFactory.create_session("booking", self.test_config) as session:
+            adapter = session._session.get_adapter("https://test-api.example.com")
+            self.assertEqual(adapter._pool_maxsize, 3)
+            self.assertEqual(session._timeout, (2, 7))
+
+    def test_scrapers_share_session(self):
+        """同一次运行的爬虫共享会话"""
+        with ScraperFactory.create_session("booking", self.test_config) as session:
+            first = ScraperFactory.create_scraper("booking", self.test_config, session=session)
+            second = ScraperFactory.create_scraper("booking", self.test_config, session=session)
+            self.assertIs(first._session, second._session)
+
+    def test_closed_session_rejects_requests(self):
+        session = HttpSession()
+        session.close()
+        with self.assertRaises(RuntimeError):
+            session.get("https://test-api.example.com")
+
+    def test_default_session_is_shared(self):
+        self.assertIs(get_default_session(), get_default_session())
+
+
+class TestAdaptiveController(unittest.TestCase):
+    """测试自适应并发控制和熔断"""
+
+    def _request(self, controller, status_code, latency=0.1):
+        probe = controller.acquire()
+        controller.release(status_code, latency, probe=probe)
+
+    def test_decrease_and_recover(self):
+        """限流时并发数和速率减半，正常后逐步恢复"""
+        limiter = RateLimiter(requests_per_second=10)
+        controller = AdaptiveController(8, rate_limiter=limiter, failure_threshold=100)
+        self._request(controller, 429)
+        self.assertEqual(controller.limit, 4)
+        self.assertEqual(limiter.requests_per_second, 5)
+
+        for _ in range(200):
+            self._request(controller, 200)
+        self.assertEqual(controller.limit, 8)
+        self.assertEqual(limiter.requests_per_second, 10)
+
+    def test_concurrency_limit(self):
+        """占满并发名额后acquire阻塞"""
+        controller = AdaptiveController(2)
+        controller.acquire()
+        controller.acquire()
+        acquired = threading.Event()
+
+        def worker():
+            controller.acquire()
+            acquired.set()
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        self.assertFalse(acquired.wait(0.1))
+        controller.release(200, 0.1)
+        self.assertTrue(acquired.wait(1))
+        thread.join()
+
+    def test_circuit_breaker(self):
+        """连续失败时熔断，探测成功后恢复"""
+        controller = AdaptiveController(4, failure_threshold=3, cooldown_seconds=0.05)
+        for _ in range(3):
+            self._request(controller, 503)
+        self.assertEqual(controller.state, AdaptiveController.OPEN)
+
+        self._request(controller, 200)
+        self.assertEqual(controller.state, AdaptiveController.CLOSED)
+
+    def test_in_flight_burst_trips_once(self):
+        """熔断前已经发出的一批请求在熔断后失败，只熔断一次；半开时只有探测请求能关闭熔断器"""
+        controller = AdaptiveController(20, failure_threshold=5, cooldown_seconds=0.05, max_trips=3)
+        for _ in range(20):
+            self.assertFalse(controller.acquire())
+        for _ in range(19):
+            controller.release(429, 0.1)
+        self.assertEqual(controller.state, AdaptiveController.OPEN)
+        self.assertFalse(controller.aborted)
+
+        time.sleep(0.06)
+        self.assertTrue(controller.acquire())
+        # 熔断前发出的最后一个请求成功，不代替探测请求关闭熔断器
+        controller.release(200, 0.1)
+        self.assertEqual(controller.state, AdaptiveController.HALF_OPEN)
+        controller.release(200, 0.1, probe=True)
+        self.assertEqual(controller.state, AdaptiveController.CLOSED)
+
+    def test_cancelled_probe(self):
+        """探测请求没有结果时保持半开，下一个请求重新探测"""
+        controller = AdaptiveController(4, failure_threshold=1, cooldown_seconds=0.01)
+        self._request(controller, 429)
+        time.sleep(0.02)
+        controller.release(probe=controller.acquire())
+        self.assertEqual(controller.state, AdaptiveController.HALF_OPEN)
+        self.assertTrue(controller.acquire())
+
+    def test_circuit_gives_up(self):
+        """多次熔断仍失败时放弃"""
+        controller = AdaptiveController(4, failure_threshold=1, cooldown_seconds=0.01, max_trips=2)
+        self._request(controller, 429)
+        self._request(controller, 429)
+        self._request(controller, 429)
+        self.assertTrue(controller.aborted)
+        with self.assertRaises(CircuitOpenError):
+            controller.acquire()
+
+    def test_session_reports_results(self):
+        """会话把响应状态报告给控制器"""
+        controller = AdaptiveController(4, failure_threshold=1, cooldown_seconds=60)
+        session = HttpSession(controller=controller)
+        with mock.patch.object(session._session, "request", return_value=mock.Mock(status_code=429)):
+            session.get("https://test-api.example.com")
+        self.assertEqual(controller.state, AdaptiveController.OPEN)
+
+
+class TestRetryAndHedge(unittest.TestCase):
+    """测试重试和对冲请求"""
+
+    def _response(self, status_code, headers=None):
+        return mock.Mock(status_code=status_code, headers=headers or {})
+
+    def test_classification(self):
+        policy = RetryPolicy()
+        self.assertTrue(policy.is_retryable_error(requests.Timeout()))
+        self.assertTrue(policy.is_retryable_error(requests.ConnectionError()))
+        self.assertFalse(policy.is_retryable_error(requests.exceptions.InvalidURL()))
+        self.assertTrue(policy.is_retryable_status(503))
+        self.assertTrue(policy.is_retryable_status(429))
+        self.assertFalse(policy.is_retryable_status(404))
+
+    def test_backoff(self):
+        policy = RetryPolicy(base_delay=1, max_delay=5)
+        for attempt in range(6):
+            self.assertLessEqual(policy.backoff(attempt), min(5, 2 ** attempt))
+        self.assertEqual(policy.backoff(0, self._response(429, {"Retry-After": "3"})), 3)
+
+    @unittest.skipUnless(hasattr(time, "tzset"), "需要time.tzset切换本地时区")
+    def test_retry_after_date_without_zone(self):
+        """-0000的HTTP日期按UTC计算，与本地时区无关"""
+        policy = RetryPolicy(max_delay=600)
+        header = email.utils.formatdate(time.time() + 120)
+        self.assertTrue(header.endswith("-0000"))
+        original_tz = os.environ.get("TZ")
+        os.environ["TZ"] = "Asia/Shanghai"
+        time.tzset()
+        try:
+            delay = policy.backoff(0, self._response(429, {"Retry-After": header}))
+        finally:
+            if original_tz is None:
+                del os.environ["TZ"]
+            else:
+                os.environ["TZ"] = original_tz
+            time.tzset()
+        self.assertAlmostEqual(delay, 120, delta=2)
+
+    def test_retry_until_success(self):
+        session = HttpSession(retry_policy=RetryPolicy(max_attempts=3, base_delay=0.001))
+        responses = [requests.Timeout(), self._response(503), self._response(200)]
+        with mock.patch.object(session._session, "request", side_effect=responses) as request:
+            response = session.get("https://test-api.example.com")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(request.call_count, 3)
+
+    def test_fatal_not_retried(self):
+        session = HttpSession(retry_policy=RetryPolicy(max_attempts=3, base_delay=0.001))
+        with mock.patch.object(session._session, "request", return_value=self._response(404)) as request:
+            self.assertEqual(session.get("https://test-api.example.com").status_code, 404)
+        self.assertEqual(request.call_count, 1)
+
+        with mock.patch.object(session._session, "request", side_effect=requests.Timeout()) as request:
+            with self.assertRaises(requests.Timeout):
+                session.get("https://test-api.example.com")
+        self.assertEqual(request.call_count, 3)
+
+    def test_post_not_retried(self):
+        session = HttpSession(retry_policy=RetryPolicy(max_attempts=3, base_delay=0.001))
+        with mock.patch.object(session._session, "request", side_effect=requests.Timeout()) as request:
+            with self.assertRaises(requests.Timeout):
+                session.post("https://test-api.example.com")
+        self.assertEqual(request.call_count, 1)
+
+    def test_latency_percentile(self):
+        tracker = LatencyTracker(min_samples=10)
+        self.assertIsNone(tracker.percentile(95))
+        for i in range(100):
+            tracker.record(i / 100)
+        self.assertAlmostEqual(tracker.percentile(95), 0.95)
+
+    def test_hedged_request(self):
+        """超过p95的请求发送对冲请求，先返回的结果生效"""
+        session = HttpSession(retry_policy=RetryPolicy(), hedge_percentile=95)
+        for _ in range(50):
+            session._latency_tracker.record(0.01)
+
+        calls = []
+        slow = self._response(200)
+        fast = self._response(200)
+
+        def fake_request(method, url, **kwargs):
+            calls.append(time.monotonic())
+            if len(calls) == 1:
+                time.sleep(0.3)
+                return slow
+            return fast
+
+        with mock.patch.object(session._session, "request", side_effect=fake_request):
+            response = session.get("https://test-api.example.com")
+        self.assertIs(response, fast)
+        self.assertEqual(len(calls), 2)
+        session.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,176 @@
+import unittest
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+project_root = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+sys.path.append(project_root)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from flight_scraper.core.factory.factory import ScraperFactory
+from flight_scraper.platforms.meta_search.searcher import MetaSearch
+from sample_data import make_offer
+
+
+class StandInPlatform:
+    """在本地端口上模拟一个平台的航班接口，可以设置响应延迟和状态码"""
+
+    def __init__(self, offers, delay=0.0, status=200):
+        self.requests = []
+        # 已经返回响应的请求数
+        self.finished = 0
+        platform = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                platform.requests.append(self.path)
+                time.sleep(delay)
+                body = json.dumps({"flightOffers": offers}).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                platform.finished += 1
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+        self.thread.start()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}/api/flights/"
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class TestMetaSearch(unittest.TestCase):
+    """测试跨平台并发搜索、合并排序和每个平台的截止时间"""
+
+    def setUp(self):
+        self.servers = {
+            "fast": StandInPlatform([make_offer(500, carrier="CA", token="fast-ca"),
+                                     make_offer(450, carrier="MU", token="fast-mu"),
+                                     make_offer(700, depart="2025-07-15", token="fast-late")]),
+            # 与fast的CA航班行程相同但更便宜
+            "mirror": StandInPlatform([make_offer(480, carrier="CA", token="mirror-ca"),
+                                       make_offer(600, carrier="MU", depart="2025-07-15",
+                                                  token="mirror-late")]),
+            "slow": StandInPlatform([make_offer(100, carrier="CA", token="slow-ca")], delay=1.5),
+            "broken": StandInPlatform([], status=500),
+        }
+        self.meta_config = {
+            "meta_search": {
+                "search_condition": {"depart": "2025-07-14", "return": "2025-08-19"},
+                "results": {"top_k": 3, "dedupe": True},
+                "deadline_seconds": 5,
+                "platforms": [
+                    {"name": "fast", "platform": "booking"},
+                    {"name": "mirror", "platform": "booking"},
+                    {"name": "slow", "platform": "booking", "deadline_seconds": 0.3},
+                    {"name": "broken", "platform": "booking"},
+                    {"name": "trip", "enable": False},
+                ],
+            }
+        }
+
+    def tearDown(self):
+        for server in self.servers.values():
+            server.close()
+
+    def _platform_configs(self):
+        return {
+            name: {
+                "booking": {
+                    "api_url": server.url,
+                    "booking_search_condition": {"from": "MAD.AIRPORT", "to": "SHA.CITY",
+                                                 "depart": "2025-01-01", "return": "2025-01-31"},
+                    "concurrency": {"requests_per_second": 0},
+                    "cache": {"enable": False},
+                    "retry": {"max_attempts": 1},
+                }
+            }
+            for name, server in self.servers.items()
+        }
+
+    def test_merged_top_k(self):
+        with MetaSearch(self.meta_config, self._platform_configs()) as search:
+            self.assertEqual(search.platforms, ["fast", "mirror", "slow", "broken"])
+            # 每个平台有自己的会话和限速器
+            sessions = [search.session(name) for name in search.platforms]
+            self.assertEqual(len({id(session.rate_limiter) for session in sessions}), 4)
+
+            start = time.monotonic()
+            result = search.search()
+            elapsed = time.monotonic() - start
+
+            # 关闭会话时超时的请求已经结束
+            slow_session = search.session("slow")
+            close = slow_session.close
+            finished_at_close = []
+            slow_session.close = lambda: (finished_at_close.append(self.servers["slow"].finished), close())
+
+        # 慢平台超时后不再等待
+        self.assertLess(elapsed, 1.2)
+        self.assertEqual(finished_at_close, [1])
+        self.assertEqual([(name, offer.token) for name, offer in result.offers],
+                         [("fast", "fast-mu"), ("mirror", "mirror-ca"), ("mirror", "mirror-late")])
+        statuses = {platform.name: platform for platform in result.platforms}
+        self.assertTrue(statuses["fast"].ok)
+        self.assertTrue(statuses["slow"].timed_out)
+        self.assertEqual(statuses["slow"].offers, [])
+        self.assertTrue(statuses["broken"].error)
+
+        # 搜索条件覆盖各平台配置中的日期
+        self.assertIn("depart=2025-07-14", self.servers["fast"].requests[0])
+        rows = result.rows()
+        self.assertEqual([row["platform"] for row in rows], ["fast", "mirror", "mirror"])
+        self.assertEqual(rows[0]["depart_date"], "2025-07-14")
+        self.assertIn("[slow] 超时", result.format_result())
+
+    def test_without_dedupe(self):
+        self.meta_config["meta_search"]["results"]["dedupe"] = False
+        with MetaSearch(self.meta_config, self._platform_configs()) as search:
+            result = search.search({"return": "2025-08-20"})
+        self.assertEqual([offer.token for _, offer in result.offers], ["fast-mu", "mirror-ca", "fast-ca"])
+        self.assertIn("return=2025-08-20", self.servers["mirror"].requests[0])
+
+    def test_sessions_closed_when_init_fails(self):
+        """后面的平台创建会话失败时，已经创建的会话被关闭"""
+        created = []
+        create_session = ScraperFactory.create_session
+
+        def failing_create_session(platform, config, **kwargs):
+            if len(created) == 2:
+                raise ValueError("代理配置无效")
+            session = create_session(platform, config, **kwargs)
+            created.append(session)
+            return session
+
+        with mock.patch.object(ScraperFactory, "create_session", side_effect=failing_create_session):
+            with self.assertRaises(ValueError):
+                MetaSearch(self.meta_config, self._platform_configs())
+        self.assertEqual(len(created), 2)
+        self.assertTrue(all(session.closed for session in created))
+
+    def test_unsupported_platform(self):
+        self.meta_config["meta_search"]["platforms"] = [{"name": "trip"}]
+        with self.assertRaises(ValueError):
+            MetaSearch(self.meta_config, {"trip": {}})
+        self.meta_config["meta_search"]["platforms"] = []
+        with self.assertRaises(ValueError):
+            ScraperFactory.create_scraper("meta_search", self.meta_config)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,288 @@
+import unittest
+import json
+import os
+import sys
+import time
+import random
+from unittest import mock
+
+import pandas as pd
+
+project_root = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+sys.path.append(project_root)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from flight_scraper.platforms.booking.multi_date_scraper import MultiDateBookingScraper
+from flight_scraper.core.data.processor.processor_factory import DataProcessorFactory
+from flight_scraper.core.http.rate_limiter import RateLimiter
+from sample_data import make_response
+
+
+class FakeScraper:
+    """模拟BookingScraper，价格由出发日期决定，请求耗时随机"""
+
+    def __init__(self, config, dedupe=False):
+        condition = config["booking"]["booking_search_condition"]
+        day = int(condition["depart"][-2:])
+        prices = [100 + (day * 7 + k * 13) % 50 for k in range(3)]
+        raw_data = make_response(prices, condition["depart"], condition["return"])
+        self._body = json.dumps(raw_data).encode("utf-8")
+        self._processed_offers = DataProcessorFactory.create_processor("booking", raw_data).process(dedupe=dedupe)
+
+    def requests_flight_info(self):
+        time.sleep(random.uniform(0, 0.02))
+
+    def parse_flights(self):
+        pass
+
+    def load_data(self):
+        return True
+
+    def fetch_response_body(self):
+        time.sleep(random.uniform(0, 0.02))
+        return self._body, False
+
+    def cache_response_body(self, body):
+        pass
+
+
+def fake_create_scraper(platform_name, config=None, dedupe=False, **kwargs):
+    return FakeScraper(config, dedupe)
+
+
+class TestMultiDateBookingScraper(unittest.TestCase):
+    """测试MultiDateBookingScraper的并发爬取"""
+
+    def setUp(self):
+        self.test_config = {
+            "booking": {
+                "api_url": "https://test-api.example.com",
+                "booking_search_condition": {
+                    "from": "MAD.AIRPORT",
+                    "to": "SHA.CITY",
+                    "depart": "2025-07-01",
+                    "return": "2025-08-01",
+                },
+            }
+        }
+
+    def _scraper(self, max_workers, **kwargs):
+        scraper = MultiDateBookingScraper(self.test_config, max_workers=max_workers, requests_per_second=0, **kwargs)
+        scraper.prepare_date_configs(scraper.generate_date_range("2025-07-01", 12, 30))
+        with mock.patch("flight_scraper.platforms.booking.multi_date_scraper.ScraperFactory.create_scraper",
+                        side_effect=fake_create_scraper):
+            scraper.scrape_all_dates()
+        return scraper
+
+    def _run(self, max_workers, **kwargs):
+        return self._scraper(max_workers, **kwargs).results
+
+    def test_concurrent_matches_sequential(self):
+        """并发爬取的结果与逐个爬取完全一致"""
+        sequential = self._run(max_workers=1)
+        concurrent = self._run(max_workers=6)
+        self.assertEqual(len(sequential), 36)
+        pd.testing.assert_frame_equal(sequential.frame, concurrent.frame)
+
+    def test_top_k(self):
+        """只保留全局最便宜的K个航班，结果与全部保留后截取前K个一致"""
+        full = self._run(max_workers=1, top_k=0)
+        for workers in (1, 6):
+            top = self._run(max_workers=workers, top_k=7)
+            self.assertEqual(len(top), 7)
+            self.assertEqual(top.records(), full.cheapest(7).records())
+
+    def test_process_pool_matches_in_process(self):
+        """在进程池中处理响应的结果与在当前进程处理一致"""
+        in_process = self._run(max_workers=4, process_workers=0)
+        self.test_config["booking"]["processing"] = {"min_pool_tasks": 0}
+        pooled = self._run(max_workers=4, process_workers=2)
+        self.assertEqual(pooled.records(), in_process.records())
+
+    def test_small_run_skips_process_pool(self):
+        self.test_config["booking"]["processing"] = {"workers": 2, "min_pool_tasks": 100}
+        with mock.patch("flight_scraper.platforms.booking.multi_date_scraper.OfferProcessPool.__init__") as init:
+            self._run(max_workers=1)
+        init.assert_not_called()
+
+    def test_per_date_depth(self):
+        """每个日期只保留最便宜的per_date_depth个航班"""
+        table = self._run(max_workers=4, per_date_depth=2, top_k=0)
+        self.assertEqual(len(table), 24)
+        counts = table.frame.groupby("depart_date", observed=True).size()
+        self.assertTrue((counts == 2).all())
+
+    def test_dedupe(self):
+        """同一天的三个报价是同一行程，去重后每个日期只保留最便宜的一个，并记录价格差"""
+        full = self._run(max_workers=1, top_k=0, dedupe=False)
+        for workers in (1, 6):
+            table = self._run(max_workers=workers, top_k=0, dedupe=True, process_workers=0)
+            self.assertEqual(len(table), 12)
+            self.assertTrue((table.frame["copies"] == 3).all())
+            grouped = full.frame.groupby("depart_date", observed=True)["price"]
+            expected = (grouped.max() - grouped.min()).sort_index()
+            spread = table.frame.set_index("depart_date")["price_spread"].sort_index()
+            self.assertEqual(spread.tolist(), expected.tolist())
+            self.assertEqual(table.frame["price"].tolist(), full.frame.groupby("depart_date", observed=True)["price"]
+                             .min().sort_values(kind="mergesort").tolist())
+        self.test_config["booking"]["processing"] = {"min_pool_tasks": 0}
+        pooled = self._run(max_workers=4, top_k=0, dedupe=True, process_workers=2)
+        self.assertEqual(pooled.records(), table.records())
+
+    def test_records_history(self):
+        """每个日期保留的航班都写入价格历史库，不受top_k影响"""
+        import tempfile
+        from flight_scraper.core.storage.price_history import PriceHistoryStore
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "history.db")
+            self.test_config["booking"]["history"] = {"enable": True, "path": path}
+            scraper = self._scraper(max_workers=4, top_k=5)
+            self.assertEqual(len(scraper.results), 5)
+            with PriceHistoryStore(path) as store:
+                self.assertEqual(len(store), 36)
+                self.assertEqual(store.last_run(scraper.route)["run_id"], scraper.history_run_id)
+                self.assertEqual(len(store.cheapest_ever("MAD.AIRPORT-SHA.CITY")), 12)
+            self._scraper(max_workers=1, record_history=False)
+            with PriceHistoryStore(path) as store:
+                self.assertEqual(len(store), 36)
+
+    def test_multi_route(self):
+        """多条航线共用一个会话，按航线的结果与单独搜索每条航线一致，合并结果为所有航线中最便宜的top_k个"""
+        import tempfile
+        from flight_scraper.core.factory.factory import ScraperFactory
+        from flight_scraper.core.storage.price_history import PriceHistoryStore
+        routes = [{"to": "SHA.CITY"}, {"to": "PEK.AIRPORT"}, {"from": "BCN.AIRPORT"}]
+        keys = ["MAD.AIRPORT-SHA.CITY", "MAD.AIRPORT-PEK.AIRPORT", "BCN.AIRPORT-SHA.CITY"]
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "history.db")
+            self.test_config["booking"]["history"] = {"enable": True, "path": path}
+            self.test_config["booking"]["routes"] = routes
+            with mock.patch("flight_scraper.platforms.booking.multi_date_scraper.ScraperFactory.create_session",
+                            wraps=ScraperFactory.create_session) as create_session:
+                scraper = self._scraper(max_workers=6, top_k=10)
+            create_session.assert_called_once()
+            self.assertEqual(scraper.routes, keys)
+            self.assertEqual(len(scraper._date_configs), 36)
+
+            by_route = scraper.results_by_route
+            self.assertEqual(list(by_route), keys)
+            for route, key in zip(routes, keys):
+                single = self._scraper(max_workers=1, top_k=10, routes=[route], record_history=False)
+                self.assertEqual(by_route[key].records(), single.results.records())
+
+            prices = sorted(price for table in by_route.values() for price in table.frame["price"])
+            self.assertEqual(scraper.results.frame["price"].tolist(), prices[:10])
+            self.assertEqual(scraper.find_cheapest_flights(3, route=keys[1]), by_route[keys[1]].cheapest(3).records())
+
+            with PriceHistoryStore(path) as store:
+                self.assertEqual(len(store), 108)
+                for key in keys:
+                    self.assertEqual(store.last_run(key)["run_id"], scraper.history_run_ids[key])
+
+    def test_history_distinguishes_empty_and_failed_cells(self):
+        """请求成功但没有航班的日期组合才提醒消失，请求失败的不算；所有航班都消失的航线也写入价格历史"""
+        import tempfile
+        from flight_scraper.core.storage.price_alerts import AlertThresholds, DISAPPEARED
+        from flight_scraper.core.storage.price_history import PriceHistoryStore
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "history.db")
+            self.test_config["booking"]["history"] = {"enable": True, "path": path}
+            self.test_config["booking"]["routes"] = [{"to": "SHA.CITY"}, {"to": "PEK.AIRPORT"}]
+            self._scraper(max_workers=1)
+
+            def create_scraper(platform_name, config=None, dedupe=False, **kwargs):
+                condition = config["booking"]["booking_search_condition"]
+                scraper = FakeScraper(config, dedupe)
+                if condition["to"] == "PEK.AIRPORT":
+                    scraper._processed_offers = []
+                elif condition["depart"] == "2025-07-03":
+                    scraper.load_data = lambda: False
+                return scraper
+
+            scraper = MultiDateBookingScraper(self.test_config, max_workers=1, requests_per_second=0)
+            scraper.prepare_date_configs(scraper.generate_date_range("2025-07-01", 12, 30))
+            with mock.patch("flight_scraper.platforms.booking.multi_date_scraper.ScraperFactory.create_scraper",
+                            side_effect=create_scraper):
+                scraper.scrape_all_dates()
+
+            run_ids = scraper.history_run_ids
+            with PriceHistoryStore(path) as store:
+                self.assertEqual(store.get_run(run_ids["MAD.AIRPORT-PEK.AIRPORT"])["offer_count"], 0)
+                self.assertEqual(len(store.empty_cells(run_ids["MAD.AIRPORT-PEK.AIRPORT"])), 12)
+                self.assertEqual(store.empty_cells(run_ids["MAD.AIRPORT-SHA.CITY"]), [])
+            changes = scraper.price_changes(AlertThresholds())
+            disappeared = [(change.route, change.depart_date) for change in changes if change.kind == DISAPPEARED]
+            self.assertEqual(len(disappeared), 12)
+            self.assertTrue(all(route == "MAD.AIRPORT-PEK.AIRPORT" for route, _ in disappeared))
+
+    def test_table_columns(self):
+        """结果按价格排序，数值列和分类列类型正确"""
+        frame = self._run(max_workers=1).frame
+        self.assertTrue(frame["price"].is_monotonic_increasing)
+        self.assertEqual(str(frame["airline"].dtype), "category")
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(frame["outbound_departure_time"]))
+        self.assertEqual(frame["outbound_stops"].max(), 1)
+
+    def test_filter_and_aggregate(self):
+        table = self._run(max_workers=1)
+        cheap = table.filter(max_price=120)
+        self.assertTrue((cheap.frame["price"] <= 120).all())
+        self.assertEqual(len(table.filter(max_stops=0)), 0)
+        self.assertEqual(len(table.cheapest_by_date()), 12)
+        self.assertEqual(table.cheapest(3).frame["price"].tolist(), table.frame["price"].head(3).tolist())
+
+    def test_exports_read_from_table(self):
+        """CSV导出的格式与原来一致"""
+        scraper = self._scraper(max_workers=1)
+        export = scraper.results.to_export_frame()
+        first = export.iloc[0]
+        self.assertEqual(first["outbound_flight_time"], "13h 40m")
+        self.assertEqual(first["inbound_transit"], "Direct")
+        self.assertRegex(first["outbound_departure_time"], r"^2025-07-\d\d 10:15:00$")
+        self.assertIn("航空公司: Air China", scraper.format_result())
+
+    def test_date_grid(self):
+        """出发日期 × 停留天数网格去重"""
+        scraper = MultiDateBookingScraper(self.test_config, requests_per_second=0)
+        pairs = scraper.generate_date_grid("2025-07-01", 30, 7, 40)
+        self.assertEqual(len(pairs), 30 * 34)
+        self.assertEqual(len(pairs), len(set(pairs)))
+        self.assertEqual(pairs[0], ("2025-07-01", "2025-07-08"))
+        self.assertEqual(pairs[-1], ("2025-07-30", "2025-09-08"))
+
+        scraper.prepare_date_configs(pairs + pairs[:10])
+        self.assertEqual(len(scraper._date_configs), len(pairs))
+        # 原始配置不被修改
+        self.assertEqual(self.test_config["booking"]["booking_search_condition"]["depart"], "2025-07-01")
+
+    def test_each_date_uses_own_config(self):
+        """每个日期组合使用各自的搜索日期"""
+        results = self._run(max_workers=4)
+        self.assertEqual(results.frame["depart_date"].nunique(), 12)
+
+
+class TestRateLimiter(unittest.TestCase):
+    """测试RateLimiter"""
+
+    def test_spacing_per_host(self):
+        limiter = RateLimiter(requests_per_second=20)
+        start = time.monotonic()
+        for _ in range(5):
+            limiter.acquire("a.example.com")
+        # 第一个请求不等待，之后每个间隔0.05秒
+        self.assertGreaterEqual(time.monotonic() - start, 0.19)
+
+    def test_hosts_are_independent(self):
+        limiter = RateLimiter(requests_per_second=1)
+        limiter.acquire("a.example.com")
+        self.assertEqual(limiter.acquire("b.example.com"), 0.0)
+
+    def test_unlimited(self):
+        limiter = RateLimiter(requests_per_second=0)
+        for _ in range(100):
+            self.assertEqual(limiter.acquire("a.example.com"), 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
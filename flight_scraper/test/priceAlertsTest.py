@@ -0,0 +1,84 @@
+import unittest
+import os
+import sys
+import tempfile
+
+project_root = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+sys.path.append(project_root)
+from flight_scraper.core.storage.price_history import PriceHistoryStore
+from flight_scraper.core.storage.price_alerts import (AlertThresholds, DISAPPEARED, DROP, NEW_LOW,
+                                                      diff_against_previous, format_changes)
+
+ROUTE = "MAD.AIRPORT-SHA.CITY"
+
+
+def row(depart, price_minor, airline="Air China"):
+    return {"depart_date": depart, "return_date": "2025-08-30", "price_minor": price_minor,
+            "currency": "EUR", "airline": airline}
+
+
+class TestPriceAlerts(unittest.TestCase):
+    """测试与上次运行比较的价格提醒"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store = PriceHistoryStore(os.path.join(self.tmp_dir.name, "prices.db"))
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp_dir.cleanup()
+
+    def test_first_run_has_no_baseline(self):
+        run_id = self.store.record_run(ROUTE, [row("2025-07-14", 60000)], observed_at=100)
+        self.assertIsNone(diff_against_previous(self.store, ROUTE, run_id, AlertThresholds()))
+
+    def test_changes(self):
+        self.store.record_run(ROUTE, [row("2025-07-14", 50000), row("2025-07-15", 70000),
+                                      row("2025-07-16", 75000)], observed_at=50)
+        self.store.record_run(ROUTE, [row("2025-07-14", 60000), row("2025-07-15", 70000),
+                                      row("2025-07-16", 80000), row("2025-07-17", 90000),
+                                      row("2025-07-18", 40000)], observed_at=100)
+        run_id = self.store.record_run(ROUTE, [
+            row("2025-07-14", 49000, "China Eastern"),  # 低于历史最低价50000
+            row("2025-07-15", 60000),                   # 降价100欧元，但历史最低就是70000
+            row("2025-07-15", 65000),
+            row("2025-07-16", 79500),                   # 降价5欧元，未达到阈值，也不是新低
+            row("2025-07-19", 30000),                   # 新出现的日期组合不提醒
+        ], observed_at=200, empty_cells=[("2025-07-17", "2025-08-30")])  # 2025-07-18请求失败，不算消失
+        thresholds = AlertThresholds(min_drop_amount=20, min_drop_percent=5)
+        changes = diff_against_previous(self.store, ROUTE, run_id, thresholds)
+        self.assertEqual([(change.kind, change.depart_date) for change in changes], [
+            (NEW_LOW, "2025-07-14"), (NEW_LOW, "2025-07-15"),
+            (DISAPPEARED, "2025-07-17"),
+        ])
+        self.assertEqual((changes[0].previous_low_minor, changes[0].airline), (50000, "China Eastern"))
+
+        # 不提醒新低时，低于上次价格的仍按降价阈值判断
+        changes = diff_against_previous(self.store, ROUTE, run_id,
+                                        AlertThresholds(min_drop_amount=20, new_lows=False, disappeared=False))
+        self.assertEqual([(change.kind, change.depart_date) for change in changes],
+                         [(DROP, "2025-07-14"), (DROP, "2025-07-15")])
+        text = format_changes(changes[1:])
+        self.assertIn("[降价]", text)
+        self.assertIn("600.0 EUR", text)
+        self.assertIn("-14.3%", text)
+
+    def test_thresholds(self):
+        thresholds = AlertThresholds(min_drop_amount=20, min_drop_percent=5)
+        self.assertTrue(thresholds.is_significant(100000, 98000, "EUR"))    # 20欧元
+        self.assertTrue(thresholds.is_significant(10000, 9500, "EUR"))      # 5%
+        self.assertFalse(thresholds.is_significant(100000, 99000, "EUR"))
+        self.assertFalse(thresholds.is_significant(100000, 100000, "EUR"))
+        self.assertTrue(AlertThresholds().is_significant(100, 99, "EUR"))
+        self.assertTrue(AlertThresholds(min_drop_amount=20).is_significant(5000, 3000, "JPY"))
+        self.assertFalse(AlertThresholds(min_drop_amount=20).is_significant(5000, 4990, "JPY"))
+
+    def test_from_config(self):
+        thresholds = AlertThresholds.from_config({"min_drop_percent": 3, "notify_disappeared": False})
+        self.assertEqual(thresholds, AlertThresholds(min_drop_percent=3, disappeared=False))
+
+
+if __name__ == "__main__":
+    unittest.main()
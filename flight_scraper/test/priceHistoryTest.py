@@ -0,0 +1,87 @@
+import unittest
+import os
+import sys
+import tempfile
+import time
+
+project_root = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+sys.path.append(project_root)
+from flight_scraper.core.storage.price_history import PriceHistoryStore, route_key
+
+ROUTE = "MAD.AIRPORT-SHA.CITY"
+
+
+def row(depart, ret, price_minor, airline="Air China"):
+    return {"depart_date": depart, "return_date": ret, "price_minor": price_minor, "currency": "EUR",
+            "airline": airline, "outbound_stops": 1, "inbound_stops": 0, "fingerprint": "abc"}
+
+
+class TestPriceHistoryStore(unittest.TestCase):
+    """测试价格历史库"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store = PriceHistoryStore(os.path.join(self.tmp_dir.name, "history", "prices.db"))
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp_dir.cleanup()
+
+    def test_route_key(self):
+        self.assertEqual(route_key({"from": "mad.airport ", "to": "SHA.CITY"}), ROUTE)
+
+    def test_record_and_query(self):
+        self.store.record_run(ROUTE, [row("2025-07-14", "2025-08-19", 60000),
+                                      row("2025-07-14", "2025-08-19", 65000),
+                                      row("2025-07-15", "2025-08-20", 70000)], observed_at=100)
+        self.store.record_run(ROUTE, [row("2025-07-14", "2025-08-19", 55000, "China Eastern"),
+                                      row("2025-07-15", "2025-08-20", 72000)], observed_at=200)
+        self.store.record_run("BCN.AIRPORT-SHA.CITY", [row("2025-07-14", "2025-08-19", 10000)], observed_at=300)
+        self.assertEqual(len(self.store), 6)
+
+        lows = self.store.cheapest_ever(ROUTE)
+        self.assertEqual([(low["depart_date"], low["price_minor"], low["airline"], low["observed_at"])
+                          for low in lows],
+                         [("2025-07-14", 55000, "China Eastern", 200), ("2025-07-15", 70000, "Air China", 100)])
+        self.assertEqual(len(self.store.cheapest_ever(ROUTE, depart_date="2025-07-15")), 1)
+
+        window = self.store.cheapest_in_window(ROUTE, "2025-07-14", "2025-08-19", since=50, until=150)
+        self.assertEqual(window["price_minor"], 60000)
+        self.assertIsNone(self.store.cheapest_in_window(ROUTE, "2025-07-14", "2025-08-19", since=1000))
+
+        trend = self.store.trend(ROUTE, "2025-07-14", "2025-08-19")
+        self.assertEqual([(point["observed_at"], point["price_minor"], point["offers"]) for point in trend],
+                         [(100, 60000, 2), (200, 55000, 1)])
+
+        last = self.store.last_run(ROUTE)
+        self.assertEqual((last["observed_at"], last["offer_count"]), (200, 2))
+        self.assertEqual(self.store.last_run(ROUTE, before=200)["observed_at"], 100)
+        self.assertEqual([offer["price_minor"] for offer in self.store.run_offers(last["run_id"])], [55000, 72000])
+
+    def test_queries_use_cell_index(self):
+        """区间最低价和走势只扫描日期组合的覆盖索引"""
+        query = ("SELECT observed_at, MIN(price_minor) FROM observations WHERE route = ? AND depart_date = ? "
+                 "AND return_date = ? AND observed_at >= ? GROUP BY observed_at")
+        plan = " ".join(str(tuple(step)) for step in self.store._conn.execute(
+            "EXPLAIN QUERY PLAN " + query, (ROUTE, "2025-07-14", "2025-08-19", 0)))
+        self.assertIn("COVERING INDEX idx_observations_cell", plan)
+
+    def test_large_history(self):
+        """大量观察时查询仍然很快"""
+        rows = [row(f"2025-07-{day:02d}", f"2025-08-{day:02d}", 50000 + (day * 37 + run) % 997)
+                for day in range(1, 29) for run in range(50)]
+        for run in range(40):
+            self.store.record_run(ROUTE, rows, observed_at=run)
+        self.assertEqual(len(self.store), 40 * len(rows))
+        start = time.perf_counter()
+        for _ in range(20):
+            self.store.cheapest_ever(ROUTE, depart_date="2025-07-10")
+            self.store.cheapest_in_window(ROUTE, "2025-07-10", "2025-08-10", since=10, until=20)
+            self.store.trend(ROUTE, "2025-07-10", "2025-08-10")
+        self.assertLess((time.perf_counter() - start) / 20, 0.05)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+import os
+import sys
+import tempfile
+import time
+from unittest import mock
+
+project_root = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+sys.path.append(project_root)
+from flight_scraper.core.http.response_cache import ResponseCache, make_cache_key
+
+
+class TestResponseCache(unittest.TestCase):
+    """测试响应缓存"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "cache.db")
+        self.params = {
+            "type": "ROUNDTRIP", "adults": "1", "cabinClass": "ECONOMY", "children": "",
+            "from": "MAD.AIRPORT", "to": "SHA.CITY", "depart": "2025-07-14",
+            "return": "2025-08-19", "sort": "CHEAPEST",
+        }
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_key_normalization(self):
+        """大小写、空白和儿童年龄顺序不影响缓存键"""
+        other = dict(self.params, cabinClass="economy ", sort="cheapest", children="")
+        self.assertEqual(make_cache_key("booking", self.params), make_cache_key("booking", other))
+        self.assertEqual(
+            make_cache_key("booking", dict(self.params, children="5,3")),
+            make_cache_key("booking", dict(self.params, children="3, 5")),
+        )
+        self.assertNotEqual(
+            make_cache_key("booking", self.params),
+            make_cache_key("booking", dict(self.params, depart="2025-07-15")),
+        )
+
+    def test_ttl(self):
+        with ResponseCache(self.path, ttl_seconds=60) as cache:
+            cache.set("a", b"body")
+            self.assertEqual(cache.get("a"), b"body")
+            with mock.patch("flight_scraper.core.http.response_cache.time.time",
+                            return_value=time.time() + 61):
+                self.assertIsNone(cache.get("a"))
+
+    def test_persistent(self):
+        with ResponseCache(self.path) as cache:
+            cache.set("a", b"body")
+        with ResponseCache(self.path) as cache:
+            self.assertEqual(cache.get("a"), b"body")
+
+    def test_eviction(self):
+        """超过条目上限时淘汰最久未使用的条目"""
+        with ResponseCache(self.path, max_entries=2) as cache:
+            cache.set("a", b"1")
+            cache.set("b", b"2")
+            cache.get("a")
+            cache.set("c", b"3")
+            self.assertEqual(len(cache), 2)
+            self.assertIsNone(cache.get("b"))
+            self.assertEqual(cache.get("a"), b"1")
+
+    def test_refresh(self):
+        """refresh模式只写不读"""
+        with ResponseCache(self.path) as cache:
+            cache.set("a", b"old")
+        with ResponseCache(self.path, refresh=True) as cache:
+            self.assertIsNone(cache.get("a"))
+            cache.set("a", b"new")
+        with ResponseCache(self.path) as cache:
+            self.assertEqual(cache.get("a"), b"new")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,167 @@
+import unittest
+import os
+import sys
+import tempfile
+import threading
+from unittest import mock
+
+project_root = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+sys.path.append(project_root)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from flight_scraper.core.storage.run_journal import RunJournal
+from flight_scraper.platforms.booking.multi_date_scraper import MultiDateBookingScraper
+from multiDateScraperTest import FakeScraper
+
+CREATE_SCRAPER = "flight_scraper.platforms.booking.multi_date_scraper.ScraperFactory.create_scraper"
+
+
+class Crash(BaseException):
+    """模拟进程被终止，不会被爬虫的异常处理捕获"""
+
+
+class ScraperFactoryStub:
+    """记录请求过的出发日期，可以在第crash_after个请求时崩溃，或让指定日期的请求失败"""
+
+    def __init__(self, crash_after=None, failing=()):
+        self.crash_after = crash_after
+        self.failing = set(failing)
+        self.requested = []
+        self._lock = threading.Lock()
+
+    def __call__(self, platform_name, config=None, dedupe=False, **kwargs):
+        depart = config["booking"]["booking_search_condition"]["depart"]
+        with self._lock:
+            if self.crash_after is not None and len(self.requested) >= self.crash_after:
+                raise Crash()
+            self.requested.append(depart)
+        scraper = FakeScraper(config, dedupe)
+        if depart in self.failing:
+            scraper.load_data = lambda: False
+        return scraper
+
+
+class TestRunJournal(unittest.TestCase):
+    """测试检查点日志和中断后继续运行"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "journal.db")
+        self.config = {
+            "booking": {
+                "api_url": "https://test-api.example.com",
+                "booking_search_condition": {
+                    "from": "MAD.AIRPORT",
+                    "to": "SHA.CITY",
+                    "depart": "2025-07-01",
+                    "return": "2025-08-01",
+                },
+                "routes": [{"to": "SHA.CITY"}, {"to": "PEK.AIRPORT"}],
+                "checkpoint": {"enable": True, "path": self.path},
+            }
+        }
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _scraper(self, **kwargs):
+        return MultiDateBookingScraper(self.config, max_workers=1, requests_per_second=0, use_cache=False,
+                                       top_k=10, dedupe=True, **kwargs)
+
+    def _start(self, stub):
+        scraper = self._scraper()
+        scraper.prepare_date_configs(scraper.generate_date_range("2025-07-01", 6, 30))
+        with mock.patch(CREATE_SCRAPER, side_effect=stub):
+            scraper.scrape_all_dates()
+        return scraper
+
+    def test_journal(self):
+        with RunJournal(self.path) as journal:
+            journal.start_run("r1", [("A-B", "2025-07-01", "2025-07-31"), ("A-B", "2025-07-02", "2025-08-01")],
+                              {"top_k": 5}, created_at=1e12)
+            journal.record_cell("r1", 1, [{"price": 1}])
+            journal.record_cell("r1", 0, None)
+            run = journal.load_run("r1")
+            self.assertEqual(run["cells"][1], ("A-B", "2025-07-02", "2025-08-01"))
+            self.assertEqual(run["settings"], {"top_k": 5})
+            self.assertIsNone(run["completed_at"])
+            self.assertEqual(journal.completed_cells("r1"), {1: [{"price": 1}]})
+            self.assertEqual(journal.failed_cells("r1"), [0])
+            self.assertIsNone(journal.load_run("missing"))
+            self.assertEqual(journal.prune(2e12), 1)
+            self.assertIsNone(journal.load_run("r1"))
+
+    def test_resume_after_crash(self):
+        """崩溃后继续运行只请求剩余的日期组合，结果与没有中断的运行一致"""
+        expected = self._start(ScraperFactoryStub()).results
+
+        scraper = self._scraper()
+        scraper.prepare_date_configs(scraper.generate_date_range("2025-07-01", 6, 30))
+        with mock.patch(CREATE_SCRAPER, side_effect=ScraperFactoryStub(crash_after=5)):
+            with self.assertRaises(Crash):
+                scraper.scrape_all_dates()
+        run_id = scraper.run_id
+
+        # 新进程使用不同的命令行参数，继续运行时仍使用日志中的设置
+        resumed = MultiDateBookingScraper(self.config, max_workers=3, requests_per_second=0, use_cache=False)
+        stub = ScraperFactoryStub()
+        with mock.patch(CREATE_SCRAPER, side_effect=stub):
+            resumed.resume(run_id)
+        self.assertEqual(len(stub.requested), 7)
+        self.assertEqual(resumed.run_id, run_id)
+        self.assertEqual(resumed.results.records(), expected.records())
+        self.assertEqual(list(resumed.results_by_route), ["MAD.AIRPORT-SHA.CITY", "MAD.AIRPORT-PEK.AIRPORT"])
+
+        with RunJournal(self.path) as journal:
+            self.assertIsNotNone(journal.load_run(run_id)["completed_at"])
+
+    def test_resume_refetches_failed_cells(self):
+        first = self._start(ScraperFactoryStub(failing={"2025-07-03"}))
+        with RunJournal(self.path) as journal:
+            self.assertEqual(journal.failed_cells(first.run_id), [4, 5])
+
+        stub = ScraperFactoryStub()
+        scraper = self._scraper()
+        with mock.patch(CREATE_SCRAPER, side_effect=stub):
+            scraper.resume(first.run_id)
+        self.assertEqual(stub.requested, ["2025-07-03", "2025-07-03"])
+        self.assertEqual(scraper.results.records(), self._start(ScraperFactoryStub()).results.records())
+
+    def test_resume_completed_run(self):
+        """已经结束的运行只重新请求失败的日期组合，其余日期组合不会在价格历史中重复记录"""
+        from flight_scraper.core.storage.price_history import PriceHistoryStore
+        history_path = os.path.join(self.tmp_dir.name, "history.db")
+        self.config["booking"]["history"] = {"enable": True, "path": history_path}
+        first = self._start(ScraperFactoryStub(failing={"2025-07-03"}))
+        with PriceHistoryStore(history_path) as store:
+            observations = len(store)
+        self.assertEqual(observations, 10)
+
+        stub = ScraperFactoryStub()
+        with mock.patch(CREATE_SCRAPER, side_effect=stub):
+            scraper = self._scraper()
+            scraper.resume(first.run_id)
+        self.assertEqual(stub.requested, ["2025-07-03", "2025-07-03"])
+        with PriceHistoryStore(history_path) as store:
+            # 只新增重新请求的两个日期组合
+            self.assertEqual(len(store), observations + 2)
+
+        # 没有失败的日期组合时不能再继续
+        with mock.patch(CREATE_SCRAPER, side_effect=stub):
+            with self.assertRaises(ValueError):
+                self._scraper().resume(first.run_id)
+        self.assertEqual(len(stub.requested), 2)
+        with PriceHistoryStore(history_path) as store:
+            self.assertEqual(len(store), observations + 2)
+
+    def test_resume_unknown_run(self):
+        with self.assertRaises(ValueError):
+            self._scraper().resume("missing")
+        del self.config["booking"]["checkpoint"]
+        with self.assertRaises(ValueError):
+            self._scraper().resume("missing")
+
+
+if __name__ == "__main__":
+    unittest.main()
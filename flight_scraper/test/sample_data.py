@@ -0,0 +1,76 @@
+# 测试用的Booking响应样例数据
+
+
+def make_airport(code, name, city):
+    return {"code": code, "name": name, "city": city, "cityName": city}
+
+
+MAD = make_airport("MAD", "Adolfo Suárez Madrid–Barajas Airport", "MAD")
+PEK = make_airport("PEK", "Beijing Capital International Airport", "BJS")
+PVG = make_airport("PVG", "Shanghai Pudong International Airport", "SHA")
+
+CARRIERS = {
+    "CA": {"name": "Air China", "code": "CA", "logo": "https://example.com/ca.png"},
+    "MU": {"name": "China Eastern", "code": "MU", "logo": "https://example.com/mu.png"},
+}
+
+
+def make_leg(departure_airport, arrival_airport, departure_time, arrival_time, carrier="CA", flight_number=1):
+    return {
+        "departureAirport": departure_airport,
+        "arrivalAirport": arrival_airport,
+        "departureTime": departure_time,
+        "arrivalTime": arrival_time,
+        "carriersData": [CARRIERS[carrier]],
+        "flightInfo": {
+            "flightNumber": flight_number,
+            "carrierInfo": {"operatingCarrier": carrier, "marketingCarrier": carrier},
+        },
+    }
+
+
+def make_segment(legs, total_time):
+    return {
+        "departureAirport": legs[0]["departureAirport"],
+        "arrivalAirport": legs[-1]["arrivalAirport"],
+        "departureTime": legs[0]["departureTime"],
+        "arrivalTime": legs[-1]["arrivalTime"],
+        "totalTime": total_time,
+        "legs": legs,
+    }
+
+
+def make_offer(units, nanos=0, token="token", depart="2025-07-14", ret="2025-08-19", carrier="CA",
+               cabin_label="1 cabin bag"):
+    """生成一个往返航班报价，去程经北京中转，返程直飞"""
+    outbound = make_segment([
+        make_leg(MAD, PEK, f"{depart}T10:15:00", f"{depart}T20:40:00", carrier, 908),
+        make_leg(PEK, PVG, f"{depart}T22:10:00", f"{depart}T23:55:00", carrier, 1501),
+    ], 49200)
+    inbound = make_segment([
+        make_leg(PVG, MAD, f"{ret}T01:30:00", f"{ret}T07:45:00", carrier, 907),
+    ], 48300)
+    return {
+        "token": token,
+        "priceBreakdown": {
+            "total": {"units": units, "nanos": nanos},
+            "currencyCode": "EUR",
+        },
+        "segments": [outbound, inbound],
+        "brandedFareInfo": {
+            "features": [
+                {"featureName": "PERSONAL_BAGGAGE", "label": "1 personal item"},
+                {"featureName": "CABIN_BAGGAGE", "label": cabin_label},
+            ]
+        },
+    }
+
+
+def make_response(prices, depart="2025-07-14", ret="2025-08-19"):
+    """生成包含多个报价的Booking响应"""
+    return {
+        "flightOffers": [
+            make_offer(units, token=f"token-{i}", depart=depart, ret=ret)
+            for i, units in enumerate(prices)
+        ]
+    }
@@ -0,0 +1,63 @@
+import unittest
+import json
+import os
+import sys
+
+project_root = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+sys.path.append(project_root)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from flight_scraper.core.data.stream_decoder import JsonArrayStreamDecoder, iter_json_array
+from sample_data import make_response
+
+
+def split_bytes(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class TestJsonArrayStreamDecoder(unittest.TestCase):
+    """测试flightOffers数组的增量解码"""
+
+    def test_matches_json_loads(self):
+        """任意分块大小的结果都与一次性解析一致"""
+        body = make_response([620, 480, 530])
+        body["aggregation"] = {"flightOffers": "嵌套的同名键不影响", "total": 3}
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        for size in (1, 2, 7, 64, len(data)):
+            offers = list(iter_json_array(split_bytes(data, size), "flightOffers"))
+            self.assertEqual(offers, body["flightOffers"], f"分块大小 {size}")
+
+    def test_key_after_other_fields(self):
+        """数组前面有其他字段、字符串里有转义和结构字符"""
+        data = '{"note": "a \\" [tricky] {value}", "nested": {"flightOffers": [0]}, "flightOffers": [1, "x]", {"a": [2]}, null]}'
+        for size in (1, 3, len(data)):
+            chunks = [data[i:i + size] for i in range(0, len(data), size)]
+            self.assertEqual(list(iter_json_array(chunks, "flightOffers")), [1, "x]", {"a": [2]}, None])
+
+    def test_yields_before_stream_ends(self):
+        """元素读完就立即返回，不等整个响应"""
+        decoder = JsonArrayStreamDecoder("flightOffers")
+        self.assertEqual(decoder.feed('{"flightOffers": [{"p": 1}, {"p"'), [{"p": 1}])
+        self.assertEqual(decoder.feed(': 2}'), [{"p": 2}])
+        self.assertFalse(decoder.done)
+        self.assertEqual(decoder.feed('], "searchId": "abc"}'), [])
+        self.assertTrue(decoder.done)
+
+    def test_buffer_keeps_only_pending_element(self):
+        """已解析的元素不会留在缓冲区里"""
+        decoder = JsonArrayStreamDecoder("flightOffers")
+        decoder.feed('{"flightOffers": [')
+        for i in range(100):
+            decoder.feed(json.dumps({"token": "t" * 100, "i": i}) + ",")
+        self.assertLess(len(decoder._buf), 10)
+
+    def test_missing_or_truncated_array(self):
+        with self.assertRaises(ValueError):
+            list(iter_json_array([b"<html>blocked</html>"], "flightOffers"))
+        with self.assertRaises(ValueError):
+            list(iter_json_array([b'{"flightOffers": [{"a": 1}, {"b"'], "flightOffers"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+import os
+import random
+import sys
+import threading
+
+project_root = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+sys.path.append(project_root)
+from flight_scraper.core.data.top_k import TopKCollector
+
+
+class TestTopKCollector(unittest.TestCase):
+    """测试TopKCollector"""
+
+    def test_keeps_smallest(self):
+        values = [random.randint(0, 1000) for _ in range(500)]
+        collector = TopKCollector(10)
+        for i, value in enumerate(values):
+            collector.push((value, i), value)
+        self.assertEqual(len(collector), 10)
+        self.assertEqual(collector.seen, 500)
+        self.assertEqual(collector.sorted_items(), sorted(values)[:10])
+
+    def test_ties_keep_first(self):
+        collector = TopKCollector(2)
+        for name in "abc":
+            collector.push((1,), name)
+        self.assertEqual(collector.sorted_items(), ["a", "b"])
+        self.assertEqual(collector.worst_key(), (1,))
+
+    def test_unbounded(self):
+        collector = TopKCollector(0)
+        collector.extend(((value,), value) for value in range(100, 0, -1))
+        self.assertEqual(collector.sorted_items(), list(range(1, 101)))
+        self.assertIsNone(collector.worst_key())
+
+    def test_concurrent_push(self):
+        collector = TopKCollector(5)
+
+        def worker(offset):
+            collector.extend(((value,), value) for value in range(offset, 1000, 4))
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(collector.sorted_items(), [0, 1, 2, 3, 4])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,204 @@
+import unittest
+import os
+import sys
+import tempfile
+from datetime import date, datetime, timedelta
+from unittest import mock
+
+project_root = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+sys.path.append(project_root)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from flight_scraper.core.data.processor.processor_factory import DataProcessorFactory
+from flight_scraper.core.storage.price_alerts import DROP, AlertThresholds
+from flight_scraper.core.scheduler.watch_scheduler import (RefreshPolicy, RequestBudget, WatchItem,
+                                                           WatchScheduler)
+from flight_scraper.platforms.booking.watch_daemon import WatchDaemon
+from multiDateScraperTest import FakeScraper, fake_create_scraper
+from sample_data import make_response
+
+TODAY = date(2025, 7, 1)
+
+
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestWatchScheduler(unittest.TestCase):
+    """测试监控列表的刷新调度"""
+
+    def test_policy_interval(self):
+        policy = RefreshPolicy(min_interval=100, max_interval=1000, near_days=10, far_days=100)
+        self.assertEqual(policy.interval("2025-07-05", TODAY), 100)
+        self.assertEqual(policy.interval("2025-07-11", TODAY), 100)
+        self.assertEqual(policy.interval("2025-10-09", TODAY), 1000)
+        self.assertEqual(policy.interval("2026-07-01", TODAY), 1000)
+        self.assertEqual(policy.interval("2025-08-25", TODAY), 550)
+
+    def test_budget(self):
+        clock = FakeClock()
+        budget = RequestBudget(3600, burst=5, clock=clock)
+        self.assertEqual(budget.available(), 5)
+        budget.take(5)
+        self.assertEqual(budget.available(), 0)
+        self.assertEqual(budget.seconds_until(2), 2)
+        clock.now = 3
+        self.assertEqual(budget.available(), 3)
+        clock.now = 100
+        self.assertEqual(budget.available(), 5)
+        self.assertIsNone(RequestBudget(0).available())
+
+    def test_take_due_respects_budget(self):
+        clock = FakeClock()
+        item = WatchItem("MAD", "PEK", start_in_days=1, days_range=10, min_return_days=30)
+        scheduler = WatchScheduler([item], RefreshPolicy(), RequestBudget(3600, burst=4, clock=clock))
+        scheduler.sync(0, TODAY)
+        self.assertEqual(len(scheduler), 10)
+
+        first = scheduler.take_due(0, limit=10)
+        self.assertEqual([cell.depart_date for cell in first],
+                         ["2025-07-02", "2025-07-03", "2025-07-04", "2025-07-05"])
+        self.assertEqual(scheduler.take_due(0), [])
+        # 预算不足时按请求预算计算下次唤醒时间
+        self.assertEqual(scheduler.next_wakeup(0), 1)
+
+        clock.now = 2
+        self.assertEqual([cell.depart_date for cell in scheduler.take_due(2)], ["2025-07-06", "2025-07-07"])
+
+    def test_near_departures_refresh_more_often(self):
+        item = WatchItem("MAD", "PEK", start_in_days=1, days_range=200, min_return_days=30)
+        policy = RefreshPolicy(min_interval=100, max_interval=1000, near_days=10, far_days=100)
+        scheduler = WatchScheduler([item], policy, RequestBudget(0))
+        scheduler.sync(0, TODAY)
+        cells = scheduler.take_due(0)
+        self.assertEqual(len(cells), 200)
+        scheduler.reschedule(cells, 0, TODAY)
+
+        self.assertEqual(scheduler.take_due(99), [])
+        due = scheduler.take_due(100)
+        self.assertEqual(len(due), 10)
+        self.assertTrue(all(cell.depart_date <= "2025-07-11" for cell in due))
+        self.assertEqual(scheduler.next_wakeup(100), 110)
+        self.assertEqual(len(scheduler.take_due(1000)), 190)
+
+    def test_window_rolls(self):
+        item = WatchItem("MAD", "PEK", start_in_days=1, days_range=3, min_return_days=30, max_return_days=31)
+        scheduler = WatchScheduler([item], RefreshPolicy(), RequestBudget(0))
+        scheduler.sync(0, TODAY)
+        cells = scheduler.take_due(0)
+        self.assertEqual(len(cells), 6)
+
+        # 第二天最早的出发日期移出窗口，新的出发日期立即到期
+        tomorrow = TODAY + timedelta(days=1)
+        scheduler.sync(10, tomorrow)
+        scheduler.reschedule(cells, 10, tomorrow)
+        self.assertEqual(len(scheduler), 6)
+        due = scheduler.take_due(10)
+        self.assertEqual({(cell.depart_date, cell.return_date) for cell in due},
+                         {("2025-07-05", "2025-08-04"), ("2025-07-05", "2025-08-05")})
+
+
+class TestWatchDaemon(unittest.TestCase):
+    """测试监控进程的一轮刷新"""
+
+    def setUp(self):
+        self.config = {
+            "booking": {
+                "api_url": "https://test-api.example.com",
+                "booking_search_condition": {
+                    "from": "MAD.AIRPORT",
+                    "to": "SHA.CITY",
+                    "depart": "2025-07-01",
+                    "return": "2025-08-01",
+                },
+                "concurrency": {"max_workers": 2, "requests_per_second": 0},
+                "cache": {"enable": False},
+                "daemon": {
+                    "requests_per_hour": 0,
+                    "batch_size": 5,
+                    "watchlist": [
+                        {"from": "MAD.AIRPORT", "to": "SHA.CITY", "days_range": 4, "return_days": 30},
+                        {"from": "BCN.AIRPORT", "to": "PEK.AIRPORT", "days_range": 2, "return_days": 20},
+                    ],
+                },
+            }
+        }
+
+    def test_run_once(self):
+        clock = FakeClock(datetime(2025, 7, 1, 12).timestamp())
+        refreshed = []
+
+        def on_refresh(scraper, cells):
+            refreshed.append(({route: len([cell for cell in cells if cell.route == route])
+                               for route in scraper.routes},
+                              {route: len(table) for route, table in scraper.results_by_route.items()}))
+
+        with mock.patch("flight_scraper.platforms.booking.multi_date_scraper.ScraperFactory.create_scraper",
+                        side_effect=fake_create_scraper):
+            with WatchDaemon(self.config, on_refresh=on_refresh, clock=clock) as daemon:
+                self.assertEqual(daemon.run_once(), 5)
+                self.assertEqual(daemon.run_once(), 1)
+                self.assertEqual(daemon.run_once(), 0)
+                # 通知与刷新使用同一个会话，进程结束时一起关闭
+                self.assertFalse(daemon.session.closed)
+        self.assertTrue(daemon.session.closed)
+
+        # 按出发日期到期，同一轮中所有航线的日期组合合并为一次多航线搜索
+        self.assertEqual([cells for cells, _ in refreshed],
+                         [{"MAD.AIRPORT-SHA.CITY": 3, "BCN.AIRPORT-PEK.AIRPORT": 2},
+                          {"MAD.AIRPORT-SHA.CITY": 1, "BCN.AIRPORT-PEK.AIRPORT": 0}])
+        self.assertTrue(all(counts["MAD.AIRPORT-SHA.CITY"] > 0 for _, counts in refreshed))
+
+    def test_alerts_compare_each_cell_with_its_own_history(self):
+        """两轮刷新之间隔着只覆盖其他日期组合的一轮，降价仍与该日期组合上次的价格比较"""
+        clock = FakeClock(datetime(2025, 7, 1, 12).timestamp())
+        prices = {"price": 50000}
+        alerts = []
+
+        def create_scraper(platform_name, config=None, dedupe=False, **kwargs):
+            condition = config["booking"]["booking_search_condition"]
+            scraper = FakeScraper(config, dedupe)
+            raw_data = make_response([prices["price"] / 100], condition["depart"], condition["return"])
+            scraper._processed_offers = DataProcessorFactory.create_processor("booking", raw_data).process()
+            return scraper
+
+        def on_refresh(scraper, cells):
+            changes = scraper.price_changes(AlertThresholds(new_lows=False))
+            alerts.append((sorted(cell.depart_date for cell in cells),
+                           None if changes is None else [(change.kind, change.depart_date) for change in changes]))
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            self.config["booking"]["history"] = {"enable": True, "path": os.path.join(tmp_dir, "history.db")}
+            self.config["booking"]["daemon"]["batch_size"] = 2
+            self.config["booking"]["daemon"]["watchlist"] = [
+                {"from": "MAD.AIRPORT", "to": "SHA.CITY", "days_range": 3, "return_days": 30},
+            ]
+            with mock.patch("flight_scraper.platforms.booking.multi_date_scraper.ScraperFactory.create_scraper",
+                            side_effect=create_scraper):
+                with WatchDaemon(self.config, on_refresh=on_refresh, clock=clock) as daemon:
+                    self.assertEqual(daemon.run_once(), 2)
+                    self.assertEqual(daemon.run_once(), 1)
+                    clock.now += 2 * 3600
+                    prices["price"] = 40000
+                    self.assertEqual(daemon.run_once(), 2)
+
+        (first, _), (second, second_changes), (third, third_changes) = alerts
+        # 第三轮刷新的日期组合与第一轮相同，上一轮只覆盖了另一个日期组合
+        self.assertEqual(third, first)
+        self.assertNotIn(second[0], third)
+        self.assertEqual(second_changes, [])
+        self.assertEqual(third_changes, [(DROP, depart) for depart in third])
+
+    def test_empty_watchlist(self):
+        self.config["booking"]["daemon"]["watchlist"] = []
+        with self.assertRaises(ValueError):
+            WatchDaemon(self.config)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,200 @@
+import unittest
+import os
+import sys
+import tempfile
+import threading
+from unittest import mock
+
+project_root = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+sys.path.append(project_root)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from flight_scraper.core.storage.work_queue import DONE, FAILED, LEASED, QUEUED, SqliteWorkQueue, WorkQueue
+from flight_scraper.platforms.booking.multi_date_scraper import MultiDateBookingScraper
+from flight_scraper.platforms.booking.queue_worker import QueueWorker
+from multiDateScraperTest import FakeScraper, fake_create_scraper
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestSqliteWorkQueue(unittest.TestCase):
+    """测试基于SQLite的工作队列"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "queue.db")
+        self.clock = FakeClock()
+        self.queue = SqliteWorkQueue(self.path, lease_seconds=60, max_attempts=2, retry_delay=10, clock=self.clock)
+
+    def tearDown(self):
+        self.queue.close()
+        self.tmp_dir.cleanup()
+
+    def test_interface_is_abstract(self):
+        with self.assertRaises(TypeError):
+            WorkQueue()
+        self.assertIsInstance(self.queue, WorkQueue)
+
+    def test_lease_and_ack(self):
+        self.assertEqual(self.queue.submit("b1", [{"index": i} for i in range(3)]), 3)
+        jobs = [self.queue.lease("w1") for _ in range(3)]
+        self.assertEqual([job.payload["index"] for job in jobs], [0, 1, 2])
+        self.assertIsNone(self.queue.lease("w1"))
+        self.assertEqual(self.queue.counts("b1"), {LEASED: 3})
+
+        for job in reversed(jobs):
+            self.assertTrue(self.queue.ack(job, [job.payload["index"] * 10]))
+        self.assertEqual(self.queue.pending("b1"), 0)
+        self.assertEqual(self.queue.results("b1"), [({"index": i}, [i * 10]) for i in range(3)])
+
+    def test_retry_with_backoff(self):
+        self.queue.submit("b1", [{"index": 0}])
+        job = self.queue.lease("w1")
+        self.queue.fail(job, "timeout")
+        self.assertEqual(self.queue.counts("b1"), {QUEUED: 1})
+        self.assertIsNone(self.queue.lease("w1"))
+
+        self.clock.now += 10
+        job = self.queue.lease("w2")
+        self.assertEqual(job.attempts, 2)
+        self.queue.fail(job, "503")
+        self.assertEqual(self.queue.counts("b1"), {FAILED: 1})
+        self.assertEqual(self.queue.failures("b1"), [({"index": 0}, "503")])
+        self.assertEqual(self.queue.results("b1"), [])
+
+    def test_expired_lease_is_reclaimed(self):
+        self.queue.submit("b1", [{"index": 0}])
+        stale = self.queue.lease("w1")
+        self.clock.now += 30
+        self.assertTrue(self.queue.extend(stale))
+        self.clock.now += 60
+        # 租约过期后按排队统计，另一个worker可以取走
+        self.assertEqual(self.queue.counts("b1"), {QUEUED: 1})
+        job = self.queue.lease("w2")
+        self.assertEqual(job.job_id, stale.job_id)
+        self.assertFalse(self.queue.ack(stale, ["stale"]))
+        self.assertFalse(self.queue.extend(stale))
+        self.assertTrue(self.queue.ack(job, ["fresh"]))
+        self.assertEqual(self.queue.results("b1"), [({"index": 0}, ["fresh"])])
+
+    def test_concurrent_workers_never_share_a_job(self):
+        """多个连接同时租用任务，每个任务只被租用一次"""
+        self.queue.submit("b1", [{"index": i} for i in range(60)])
+        leased = []
+        lock = threading.Lock()
+
+        def worker():
+            with SqliteWorkQueue(self.path) as queue:
+                while True:
+                    job = queue.lease(threading.current_thread().name)
+                    if job is None:
+                        return
+                    queue.ack(job, None)
+                    with lock:
+                        leased.append(job.payload["index"])
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(leased), list(range(60)))
+        self.assertEqual(self.queue.counts(), {DONE: 60})
+
+
+class FlakyScraper(FakeScraper):
+    """每个日期组合的第一次请求失败"""
+
+    failed = set()
+    lock = threading.Lock()
+
+    def __init__(self, config, dedupe=False):
+        super().__init__(config, dedupe)
+        self._depart = config["booking"]["booking_search_condition"]["depart"]
+
+    def fetch_response_body(self):
+        with self.lock:
+            if self._depart not in self.failed:
+                self.failed.add(self._depart)
+                return None, False
+        return super().fetch_response_body()
+
+
+class TestQueueWorkers(unittest.TestCase):
+    """测试协调者提交任务、多个worker执行、协调者合并结果"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.config = {
+            "booking": {
+                "api_url": "https://test-api.example.com",
+                "booking_search_condition": {
+                    "from": "MAD.AIRPORT",
+                    "to": "SHA.CITY",
+                    "depart": "2025-07-01",
+                    "return": "2025-08-01",
+                },
+                "routes": [{"to": "SHA.CITY"}, {"to": "PEK.AIRPORT"}],
+                "cache": {"enable": False},
+            }
+        }
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _scraper(self):
+        scraper = MultiDateBookingScraper(self.config, requests_per_second=0, top_k=8, dedupe=True)
+        scraper.prepare_date_configs(scraper.generate_date_range("2025-07-01", 6, 30))
+        return scraper
+
+    def test_distributed_matches_local(self):
+        local = self._scraper()
+        with mock.patch("flight_scraper.platforms.booking.multi_date_scraper.ScraperFactory.create_scraper",
+                        side_effect=fake_create_scraper):
+            local.scrape_all_dates()
+
+        path = os.path.join(self.tmp_dir.name, "queue.db")
+        coordinator = self._scraper()
+        FlakyScraper.failed = set()
+        with SqliteWorkQueue(path, retry_delay=0) as queue:
+            batch_id = coordinator.submit_to_queue(queue)
+
+            def work():
+                with SqliteWorkQueue(path, retry_delay=0) as worker_queue:
+                    with QueueWorker(self.config, worker_queue, poll_interval=0.01) as worker:
+                        worker.run()
+
+            with mock.patch("flight_scraper.platforms.booking.queue_worker.ScraperFactory.create_scraper",
+                            side_effect=lambda platform_name, config=None, dedupe=False, **kwargs:
+                            FlakyScraper(config, dedupe)):
+                threads = [threading.Thread(target=work) for _ in range(3)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+
+            self.assertEqual(queue.counts(batch_id), {DONE: 12})
+            coordinator.collect_from_queue(queue, batch_id, poll_interval=0)
+
+        self.assertEqual(coordinator.results.records(), local.results.records())
+        for route, table in local.results_by_route.items():
+            self.assertEqual(coordinator.results_by_route[route].records(), table.records())
+
+    def test_worker_waits_for_jobs(self):
+        """队列为空时worker等待idle_timeout秒后退出"""
+        sleeps = []
+        with SqliteWorkQueue(os.path.join(self.tmp_dir.name, "queue.db")) as queue:
+            with QueueWorker(self.config, queue, poll_interval=5, sleep=sleeps.append) as worker:
+                self.assertEqual(worker.run(idle_timeout=12), 0)
+        self.assertEqual(sleeps, [5, 5, 5])
+
+
+if __name__ == "__main__":
+    unittest.main()
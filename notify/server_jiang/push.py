@@ -1,18 +1,22 @@
 import os
-import requests
 import logging
 from dotenv import load_dotenv
 
+from flight_scraper.core.http.session import get_default_session
+
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s - %(filename)s[line:%(lineno)d] - %(levelname)s: %(message)s",
 )
 
 class server_jiang:
-    def __init__(self, key=None):
+    def __init__(self, key=None, session=None):
         # 首先加载.env文件
         load_dotenv()
 
+        # 与爬虫共享连接池和超时设置
+        self.session = session or get_default_session()
+
         # 尝试从多个来源获取密钥
         self.key = key
 
@@ -32,7 +36,7 @@ class server_jiang:
 
     def send(self, title, content):
         data = {"text": title, "desp": content}
-        response = requests.post(self.url, headers=self.headers, data=data)
+        response = self.session.post(self.url, headers=self.headers, data=data)
         return response
 
     def main(self, title, content):
@@ -1,16 +1,62 @@
-# 这是一个测试本地代理连接的小脚本。通过开启抓包软件Raqable，其端口为9000，另外我还开启了Warp，这样子能够隐藏个人的IP。防止IP为封掉
+# 这是一个测试代理连接的小脚本。默认检查config_booking.json中配置的所有代理，
+# 另外也会检查本地抓包软件Raqable的代理（端口9000，配合Warp隐藏个人IP，防止IP被封掉）
+import os
+import sys
+import json
+import argparse
+
 import requests
 import urllib3
 
 urllib3.disable_warnings()
 
-proxies = {"http": "http://127.0.0.1:9000", "https": "http://127.0.0.1:9000"}
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from flight_scraper.proxy.pool import ProxyPool, mask_proxy_url
+
+LOCAL_PROXY = "http://127.0.0.1:9000"
+
+
+def load_proxies_config():
+    """读取Booking配置中的代理"""
+    config_path = os.path.join(project_root, "config", "configs", "config_booking.json")
+    with open(config_path, "r", encoding="utf-8") as f:
+        booking_config = json.load(f).get("booking", {})
+    return booking_config.get("proxies") or {}, booking_config.get("proxy_pool") or {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="检查代理是否可用")
+    parser.add_argument("--no-local", action="store_true", help="不检查本地代理")
+    parser.add_argument("--timeout", type=float, default=None, help="检查超时（秒）")
+    args = parser.parse_args()
+
+    proxies_config, pool_config = load_proxies_config()
+    proxies_config = dict(proxies_config)
+    if not args.no_local:
+        proxies_config["local"] = LOCAL_PROXY
+
+    pool = ProxyPool(
+        proxies_config,
+        check_url=pool_config.get("check_url", "https://httpbin.org/ip"),
+        check_timeout=args.timeout or pool_config.get("check_timeout", 5),
+        # Raqable会拦截TLS，不校验证书
+        verify=False,
+    )
+    healthy = pool.health_check()
+
+    for proxy in pool.proxies:
+        if proxy.healthy:
+            print(f"[可用] {proxy.name:<10} {mask_proxy_url(proxy.url)}  延迟: {proxy.latency:.2f}s")
+        else:
+            print(f"[失败] {proxy.name:<10} {mask_proxy_url(proxy.url)}")
+
+    if not healthy:
+        r = requests.get("https://httpbin.org/ip", timeout=args.timeout or pool_config.get("check_timeout", 5))
+        print("没有可用的代理! 当前使用本地IP")
+        print(f"响应: {r.text}")
+
 
-try:
-    # 测试基本连接
-    r = requests.get("https://httpbin.org/ip", proxies=proxies, verify=False)
-    print(f"连接成功! 响应: {r.text}")
-except Exception as e:
-    r = requests.get("https://httpbin.org/ip")
-    print("连接失败! 已切换到本地IP")
-    print(f"响应: {r.text}")
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,8 @@ import os
 import json
 import logging
 import argparse
-from datetime import datetime
+import subprocess
+from datetime import datetime, timedelta
 
 # 设置日志配置
 logging.basicConfig(
@@ -23,6 +24,11 @@ from flight_scraper.platforms.booking.multi_date_scraper import MultiDateBooking
 from config.json_parse import JsonParse
 from config.config_manager import ConfigManager
 from notify.server_jiang import server_jiang
+from flight_scraper.core.storage.price_alerts import AlertThresholds, format_changes
+from flight_scraper.platforms.booking.watch_daemon import WatchDaemon
+from flight_scraper.platforms.booking.queue_worker import QueueWorker
+from flight_scraper.platforms.booking.config import BookingConfig
+from flight_scraper.core.factory.factory import ScraperFactory
 
 
 def load_booking_config():
@@ -43,12 +49,24 @@ def load_notify_config():
     )
 
 
-def send_notification(title, content, notify_config):
-    """发送通知"""
+def send_notification(title, content, notify_config, session=None):
+    """
+    发送通知
+
+    Args:
+        title: 通知标题
+        content: 通知内容
+        notify_config: 通知配置数据
+        session: 发送通知使用的HttpSession，通常是本次运行的会话；None则根据Booking配置创建一个临时会话
+    """
     # 检查Server酱是否启用
     if notify_config.get("server_jiang", {}).get("enable", True):
         logger.info("通过Server酱发送通知")
-        server_jiang().main(title, content)
+        if session is None:
+            with ScraperFactory.create_session("booking", load_booking_config(), max_workers=1) as session:
+                server_jiang(session=session).main(title, content)
+        else:
+            server_jiang(session=session).main(title, content)
     else:
         logger.info("Server酱通知未启用")
 
@@ -65,6 +83,93 @@ def send_notification(title, content, notify_config):
     logger.info(f"内容已保存到文件: {filepath}")
 
 
+def notification_content(multi_date_scraper, results, notify_config):
+    """
+    生成通知内容
+
+    启用price_alerts时只通知与上次运行相比的新低、达到阈值的降价和消失的日期组合；
+    没有上次运行可比较（例如首次运行或未启用价格历史）时通知完整结果
+
+    Returns:
+        str: 通知内容，没有值得提醒的变化时为空字符串
+    """
+    alerts_config = notify_config.get("price_alerts", {})
+    if not alerts_config.get("enable", False):
+        return results
+    changes = multi_date_scraper.price_changes(AlertThresholds.from_config(alerts_config))
+    if changes is None:
+        return results
+    return format_changes(changes)
+
+
+def run_daemon(booking_config, args):
+    """
+    以常驻监控模式运行
+
+    每轮只刷新一部分日期组合，每个日期组合与自己上次被观察时比较，通知新低、降价和请求成功但没有航班的日期组合；
+    未启用price_alerts或指定--no-notify时只记录价格历史
+    """
+    notify_config = load_notify_config()
+    alerts_config = notify_config.get("price_alerts", {})
+    notify = not args.no_notify and alerts_config.get("enable", False)
+    thresholds = AlertThresholds.from_config(alerts_config)
+
+    def on_refresh(scraper, cells):
+        if not notify:
+            return
+        changes = scraper.price_changes(thresholds)
+        if changes:
+            send_notification(args.title, format_changes(changes), notify_config, session=daemon.session)
+
+    with WatchDaemon(booking_config, on_refresh=on_refresh) as daemon:
+        try:
+            daemon.run()
+        except KeyboardInterrupt:
+            logger.info("监控进程已停止")
+
+
+def run_worker(booking_config):
+    """以worker模式运行，从工作队列租用日期组合执行，直到队列中没有任务"""
+    queue_config = BookingConfig(booking_config).get_queue_config()
+    with ScraperFactory.create_work_queue("booking", booking_config) as queue:
+        with QueueWorker(booking_config, queue) as worker:
+            worker.run(idle_timeout=queue_config["worker_idle_seconds"])
+
+
+def run_meta_search(args):
+    """
+    跨平台元搜索：按config_meta_search.json并发搜索所有启用的平台，合并为一个按价格排序的结果
+
+    指定--start-date时出发日期为该日期，返程日期为出发后--return-days天，否则使用配置中的搜索条件
+    """
+    search_condition = {}
+    if args.start_date is not None:
+        depart = datetime.strptime(args.start_date, "%Y-%m-%d")
+        search_condition = {
+            "depart": args.start_date,
+            "return": (depart + timedelta(days=args.return_days)).strftime("%Y-%m-%d"),
+        }
+
+    with ScraperFactory.create_scraper("meta_search") as meta_search:
+        logger.info(f"在 {len(meta_search.platforms)} 个平台上搜索: {', '.join(meta_search.platforms)}")
+        content = meta_search.search(search_condition).format_result()
+
+    if not args.no_notify:
+        send_notification(args.title, content, load_notify_config())
+    else:
+        print("\n======= 爬取结果 =======")
+        print(content)
+        print("======================\n")
+
+
+def spawn_workers(count):
+    """在本机启动count个worker进程"""
+    return [
+        subprocess.Popen([sys.executable, os.path.abspath(__file__), "--worker"], cwd=project_root)
+        for _ in range(count)
+    ]
+
+
 def main():
     """主函数"""
     try:
@@ -76,6 +181,8 @@ def main():
                             help="出发日期范围天数，默认为1天")
         parser.add_argument("--return-days", type=int, default=36,
                             help="返程天数，默认为36天")
+        parser.add_argument("--max-return-days", type=int, default=None,
+                            help="最长停留天数，指定后搜索从--return-days到该值的所有停留天数")
         parser.add_argument("--top-n", type=int, default=5,
                             help="显示前几个最便宜的航班，默认为5个")
         parser.add_argument("--title", type=str, default="十天内最便宜航班信息",
@@ -84,46 +191,134 @@ def main():
                             help="不发送通知，只保存到文件")
         parser.add_argument("--save-csv", action="store_true",
                             help="保存结果为CSV格式")
+        parser.add_argument("--save-parquet", action="store_true",
+                            help="把结果追加到按航线和观察日期分区的Parquet数据集（需要pyarrow）")
         parser.add_argument("--save-excel", action="store_true", default=True,
                             help="保存结果为Excel格式(默认启用)")
+        parser.add_argument("--max-workers", type=int, default=None,
+                            help="同时进行的最大请求数，默认使用配置文件中的值")
+        parser.add_argument("--rps", type=float, default=None,
+                            help="每个主机每秒允许的请求数，默认使用配置文件中的值")
+        parser.add_argument("--no-cache", action="store_true",
+                            help="不读取也不写入响应缓存")
+        parser.add_argument("--refresh", action="store_true",
+                            help="忽略已有缓存重新请求，并刷新缓存")
+        parser.add_argument("--per-date", type=int, default=None,
+                            help="每个日期组合保留最便宜的几个航班，默认使用配置文件中的值")
+        parser.add_argument("--top-k", type=int, default=None,
+                            help="整次运行保留最便宜的几个航班，0表示全部保留，默认使用配置文件中的值")
+        parser.add_argument("--process-workers", type=int, default=None,
+                            help="解码和处理响应的进程数，0表示在当前进程处理，默认使用配置文件中的值")
+        parser.add_argument("--no-dedupe", action="store_true",
+                            help="不合并行程相同的航班，默认使用配置文件中的值")
+        parser.add_argument("--no-history", action="store_true",
+                            help="本次运行不写入价格历史库")
+        parser.add_argument("--daemon", action="store_true",
+                            help="以常驻监控模式运行，按配置文件中的daemon.watchlist持续刷新")
+        parser.add_argument("--worker", action="store_true",
+                            help="以worker模式运行，从工作队列租用日期组合执行")
+        parser.add_argument("--distributed", action="store_true",
+                            help="把日期组合提交到工作队列，由worker执行，本进程合并结果")
+        parser.add_argument("--spawn-workers", type=int, default=0,
+                            help="使用--distributed时在本机启动几个worker进程")
+        parser.add_argument("--resume", type=str, default=None, metavar="RUN_ID",
+                            help="继续检查点日志中中断的运行，只重新请求缺失和失败的日期组合")
+        parser.add_argument("--meta-search", action="store_true",
+                            help="按config_meta_search.json并发搜索所有启用的平台，合并排名后输出")
         args = parser.parse_args()
 
-        # 如果未指定开始日期，使用配置中的日期
+        if args.meta_search:
+            run_meta_search(args)
+            return 0
+
         booking_config = load_booking_config()
-        if args.start_date is None:
+        if args.daemon:
+            run_daemon(booking_config, args)
+            return 0
+        if args.worker:
+            run_worker(booking_config)
+            return 0
+
+        # 如果未指定开始日期，使用配置中的日期
+        if args.start_date is None and args.resume is None:
             args.start_date = booking_config["booking"]["booking_search_condition"]["depart"]
             logger.info(f"使用配置中的出发日期: {args.start_date}")
 
-        # 创建多日期爬虫
-        multi_date_scraper = MultiDateBookingScraper(booking_config)
-
-        # 运行爬虫
-        logger.info(f"开始爬取从 {args.start_date} 起的 {args.days_range} 天内最便宜航班...")
-        results = multi_date_scraper.run(
-            args.start_date,
-            args.days_range,
-            args.return_days,
-            args.top_n
-        )
-
-        # 保存结果
-        if args.save_csv:
-            csv_path = multi_date_scraper.save_results_csv()
-            logger.info(f"结果已保存为CSV: {csv_path}")
-
-        if args.save_excel:
-            excel_path = multi_date_scraper.save_results_xlsx()
-            logger.info(f"结果已保存为Excel: {excel_path}")
-
-        # 发送通知
-        if not args.no_notify:
-            notify_config = load_notify_config()
-            send_notification(args.title, results, notify_config)
-        else:
-            # 直接打印结果
-            print("\n======= 爬取结果 =======")
-            print(results)
-            print("======================\n")
+        # 爬虫和通知共享同一个会话，使用配置中的超时、连接池和代理设置
+        with ScraperFactory.create_session("booking", booking_config, max_workers=args.max_workers,
+                                           requests_per_second=args.rps) as session:
+            # 创建多日期爬虫
+            multi_date_scraper = MultiDateBookingScraper(
+                booking_config,
+                max_workers=args.max_workers,
+                requests_per_second=args.rps,
+                use_cache=not args.no_cache,
+                refresh_cache=args.refresh,
+                per_date_depth=args.per_date,
+                top_k=args.top_k,
+                process_workers=args.process_workers,
+                dedupe=False if args.no_dedupe else None,
+                record_history=not args.no_history,
+                session=session
+            )
+
+            # 使用工作队列时，worker可以先于任务提交启动，队列为空时会等待一段时间
+            queue = None
+            workers = []
+            if args.distributed:
+                queue = ScraperFactory.create_work_queue("booking", booking_config)
+                workers = spawn_workers(args.spawn_workers)
+
+            # 运行爬虫
+            if args.resume is not None:
+                logger.info(f"继续运行 {args.resume}...")
+            else:
+                logger.info(f"开始爬取从 {args.start_date} 起的 {args.days_range} 天内最便宜航班...")
+            try:
+                results = multi_date_scraper.run(
+                    args.start_date,
+                    args.days_range,
+                    args.return_days,
+                    args.top_n,
+                    max_return_days=args.max_return_days,
+                    queue=queue,
+                    poll_interval=BookingConfig(booking_config).get_queue_config()["poll_interval"],
+                    resume_run_id=args.resume
+                )
+            finally:
+                if queue is not None:
+                    queue.close()
+                # 结果合并时所有任务都已完成，空闲等待中的worker不再需要
+                for worker in workers:
+                    worker.terminate()
+                    worker.wait()
+
+            # 保存结果
+            if args.save_csv:
+                csv_path = multi_date_scraper.save_results_csv()
+                logger.info(f"结果已保存为CSV: {csv_path}")
+
+            if args.save_parquet:
+                parquet_path = multi_date_scraper.save_results_parquet()
+                logger.info(f"结果已追加到Parquet数据集: {parquet_path}")
+
+            if args.save_excel:
+                excel_path = multi_date_scraper.save_results_xlsx()
+                logger.info(f"结果已保存为Excel: {excel_path}")
+
+            # 发送通知
+            if not args.no_notify:
+                notify_config = load_notify_config()
+                content = notification_content(multi_date_scraper, results, notify_config)
+                if content:
+                    send_notification(args.title, content, notify_config, session=session)
+                else:
+                    logger.info("与上次运行相比没有值得提醒的价格变化，不发送通知")
+            else:
+                # 直接打印结果
+                print("\n======= 爬取结果 =======")
+                print(results)
+                print("======================\n")
 
         logger.info("多日期航班搜索完成")
 